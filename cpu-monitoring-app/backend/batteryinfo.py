@@ -1,7 +1,9 @@
 import psutil
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from fast_json import FastJSONResponse
 from datetime import datetime
+from sampler import get_cpu_percent
+from instrumentation import instrumented
 
 app = FastAPI()
 
@@ -36,7 +38,7 @@ def get_charging_status():
 def get_system_power_usage():
     try:
         # Placeholder for CPU power usage calculation (will return percentage)
-        power_usage = psutil.cpu_percent(interval=1)  # CPU power usage percentage
+        power_usage = round(get_cpu_percent(), 1)  # CPU power usage percentage (from the sampler)
         return power_usage
     except Exception as e:
         return f"Error: {str(e)}"
@@ -50,11 +52,12 @@ def get_battery_discharge_rate():
         return f"Error: {str(e)}"
 
 # Function to get power consumption data (CPU and GPU)
+@instrumented
 def get_power_consumption():
     try:
         power_data = {
             "timestamp": datetime.now().timestamp(),  # Current time in timestamp
-            "cpu_power": psutil.cpu_percent(interval=1),  # CPU power usage (percentage)
+            "cpu_power": round(get_cpu_percent(), 1),  # CPU power usage (percentage, from the sampler)
             "gpu_power": None,  # Placeholder, as GPU power data can vary
             "status": "success"
         }
@@ -68,6 +71,7 @@ def get_power_consumption():
         return {"error": f"An error occurred while fetching power consumption data: {str(e)}"}
 
 # Function to get battery information including system uptime and other details
+@instrumented
 def get_battery_info():
     try:
         battery = psutil.sensors_battery()
@@ -90,8 +94,8 @@ def get_battery_info():
 
 @app.get("/battery")
 def battery_status():
-    return JSONResponse(content=get_battery_info())
+    return FastJSONResponse(content=get_battery_info())
 
 @app.get("/power_consumption")
 def power_consumption_status():
-    return JSONResponse(content=get_power_consumption())
+    return FastJSONResponse(content=get_power_consumption())
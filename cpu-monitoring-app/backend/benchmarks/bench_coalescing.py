@@ -0,0 +1,78 @@
+"""Benchmark: 100 concurrent requests to a coalesced collector.
+
+Run from the backend directory:
+
+    python benchmarks/bench_coalescing.py
+
+Fires CONCURRENCY simultaneous requests through run_collector (the path
+every endpoint takes), first at a synthetic collector that sleeps like an
+nvidia-smi fork or WMI query, then at the real disk, CPU temperature and
+GPU temperature collectors. For each it reports how many times the
+collector body actually ran and the wall time, next to the same burst
+against the undecorated function. tests/test_coalescing.py checks that
+each collector runs once.
+"""
+import os
+import sys
+import time
+import asyncio
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coalescing import coalesced  # noqa: E402
+from executor import run_collector  # noqa: E402
+from instrumentation import registry  # noqa: E402
+import disk_info  # noqa: E402
+import hardware_info  # noqa: E402
+
+CONCURRENCY = 100
+COLLECTOR_COST = 0.2  # Seconds the synthetic collector takes
+
+runs = 0
+runs_lock = threading.Lock()
+
+
+def slow_collector():
+    global runs
+    with runs_lock:
+        runs += 1
+    time.sleep(COLLECTOR_COST)
+    return {"value": 42}
+
+
+async def burst(collector, func):
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_collector(collector, func, timeout=60) for _ in range(CONCURRENCY)))
+    return time.perf_counter() - started, results
+
+
+def collector_runs(name):
+    collectors, _ = registry.snapshot()
+    return collectors.get(name, {}).get("count", 0)
+
+
+async def main():
+    global runs
+    print(f"{CONCURRENCY} concurrent requests, synthetic collector taking {COLLECTOR_COST}s:")
+    seconds, _ = await burst("bench", slow_collector)
+    print(f"  plain      {runs:4d} runs  {seconds * 1000:8.1f} ms")
+    runs = 0
+    seconds, _ = await burst("bench", coalesced(slow_collector))
+    print(f"  coalesced  {runs:4d} runs  {seconds * 1000:8.1f} ms")
+
+    print(f"\n{CONCURRENCY} concurrent requests to the real collectors:")
+    for collector, func, stats_name in (
+        ("disks", disk_info.get_disks, "get_disks"),
+        ("cpu", hardware_info.get_cpu_temperature, "get_cpu_temperature"),
+        ("gpu", hardware_info.get_gpu_temperature, "get_gpu_temperature"),
+    ):
+        func.coalescer.clear()
+        before = collector_runs(stats_name)
+        seconds, _ = await burst(collector, func)
+        ran = collector_runs(stats_name) - before
+        print(f"  {stats_name:20s} {ran:4d} runs  {seconds * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Load benchmark: latency of /api/memory while slow collectors are hammered.
+
+Start the backend first (uvicorn server:app --port 5000), then run:
+
+    python benchmarks/bench_endpoint_latency.py --base-url http://localhost:5000
+
+/gpu-temperature and /api/network are requested in a tight loop from
+several threads while /api/memory is timed from another. With blocking
+collectors on the event loop the memory p99 tracks the slowest collector;
+with the executor layer it should stay in the low milliseconds.
+"""
+import argparse
+import threading
+import time
+import urllib.request
+
+
+def fetch(url, timeout=60):
+    with urllib.request.urlopen(url, timeout=timeout) as response:
+        response.read()
+
+
+def hammer(url, stop_event, counter):
+    while not stop_event.is_set():
+        try:
+            fetch(url)
+        except Exception:
+            pass
+        counter[0] += 1
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:5000")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds to run")
+    parser.add_argument("--hammer-threads", type=int, default=8, help="threads per slow endpoint")
+    args = parser.parse_args()
+
+    base = args.base_url.rstrip("/")
+    stop_event = threading.Event()
+    counters = {}
+    threads = []
+    for path in ("/gpu-temperature", "/api/network"):
+        counters[path] = [0]
+        for _ in range(args.hammer_threads):
+            t = threading.Thread(target=hammer, args=(base + path, stop_event, counters[path]))
+            t.daemon = True
+            t.start()
+            threads.append(t)
+
+    latencies = []
+    end = time.perf_counter() + args.duration
+    while time.perf_counter() < end:
+        start = time.perf_counter()
+        try:
+            fetch(base + "/api/memory")
+        except Exception as e:
+            print(f"/api/memory failed: {e}")
+            continue
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.05)
+
+    stop_event.set()
+
+    if not latencies:
+        print("No successful /api/memory requests")
+        return
+    print(f"/api/memory requests: {len(latencies)}")
+    print(f"  p50: {percentile(latencies, 50):.2f} ms")
+    print(f"  p90: {percentile(latencies, 90):.2f} ms")
+    print(f"  p99: {percentile(latencies, 99):.2f} ms")
+    print(f"  max: {max(latencies):.2f} ms")
+    for path, counter in counters.items():
+        print(f"{path} requests completed: {counter[0]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Benchmark: memory of deque-of-dicts history vs the columnar TimeSeries.
+
+Run from the backend directory:
+
+    python benchmarks/bench_history_memory.py [samples]
+
+Fills both representations with the same bandwidth samples (one day at
+one sample per second by default) and reports the bytes allocated for
+each, measured with tracemalloc.
+"""
+import os
+import sys
+import time
+import random
+import tracemalloc
+from collections import deque
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries import TimeSeries  # noqa: E402
+
+SAMPLES = 24 * 3600
+
+
+def format_bytes(size_bytes):
+    # Same output shape as network_info.format_bytes, without importing it
+    # (importing network_info starts a network update)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size_bytes < 1024:
+            return f"{size_bytes:.2f} {unit}"
+        size_bytes /= 1024
+    return f"{size_bytes:.2f} TB"
+
+
+def fill_deque(samples, start):
+    """The old layout: one dict with ISO and pre-formatted strings per sample"""
+    history = deque([], maxlen=samples)
+    for i in range(samples):
+        download, upload = random.randint(0, 1 << 30), random.randint(0, 1 << 28)
+        history.append({
+            "timestamp": datetime.fromtimestamp(start + i).isoformat(),
+            "download": download,
+            "upload": upload,
+            "downloadFormatted": format_bytes(download),
+            "uploadFormatted": format_bytes(upload)
+        })
+    return history
+
+
+def fill_series(samples, start):
+    history = TimeSeries({"download": "q", "upload": "q"}, samples, totals=("download", "upload"))
+    for i in range(samples):
+        history.append(start + i, download=random.randint(0, 1 << 30), upload=random.randint(0, 1 << 28))
+    return history
+
+
+def measure(func, *args):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - started
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return result, used, elapsed
+
+
+def main():
+    samples = int(sys.argv[1]) if len(sys.argv) > 1 else SAMPLES
+    start = int(time.time()) - samples
+
+    _, deque_bytes, deque_s = measure(fill_deque, samples, start)
+    series, series_bytes, series_s = measure(fill_series, samples, start)
+
+    print(f"samples:            {samples}")
+    print(f"deque of dicts:     {deque_bytes / 1024 / 1024:8.2f} MiB  ({deque_bytes / samples:6.1f} B/sample, fill {deque_s:.2f}s)")
+    print(f"TimeSeries:         {series_bytes / 1024 / 1024:8.2f} MiB  ({series_bytes / samples:6.1f} B/sample, fill {series_s:.2f}s)")
+    print(f"reduction:          {deque_bytes / max(1, series_bytes):8.1f}x")
+    print(f"series array bytes: {series.nbytes()}")
+
+
+if __name__ == "__main__":
+    main()
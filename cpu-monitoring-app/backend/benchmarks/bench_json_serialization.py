@@ -0,0 +1,91 @@
+"""Benchmark: /api/all serialization, stdlib json vs fast_json vs cached bytes.
+
+Run from the backend directory:
+
+    python benchmarks/bench_json_serialization.py
+
+Fills the bandwidth, ping and data-transfer histories to full capacity
+(VAMOS_HISTORY_RETENTION) and then times three ways of producing the
+/api/all body and the full-range /api/bandwidth-history body:
+building the dict and encoding it with json.dumps and a datetime encoder
+(the old path), building it and encoding with fast_json.dumps (orjson when
+installed), and a SerializedCache hit with an unchanged token.
+
+Importing network_info performs one network update, so expect a few
+seconds of start-up before the numbers.
+"""
+import os
+import sys
+import json
+import time
+import random
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fast_json  # noqa: E402
+import network_info  # noqa: E402
+from fast_json import SerializedCache  # noqa: E402
+
+ROUNDS = 50
+
+
+class DateTimeEncoder(json.JSONEncoder):
+    # The encoder responses used before fast_json
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+def fill_histories():
+    now = int(time.time())
+    for series, step, columns in (
+        (network_info.bandwidth_history, network_info.UPDATE_INTERVAL, ("download", "upload")),
+        (network_info.data_transfer_history, network_info.DATA_TRANSFER_INTERVAL, ("totalBytesSent", "totalBytesReceived")),
+    ):
+        series.clear()
+        start = now - series.capacity * step
+        for i in range(series.capacity):
+            series.append(start + i * step, **{column: random.randint(0, 1 << 30) for column in columns})
+    network_info.ping_history.clear()
+    for _ in range(network_info.ping_history.capacity):
+        network_info.ping_history.append(ping=random.uniform(5, 80))
+
+
+def timed(func):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        body = func()
+    return (time.perf_counter() - started) / ROUNDS * 1000, len(body)
+
+
+def main():
+    fill_histories()
+    cache = SerializedCache()
+    print(f"encoder: {'orjson' if fast_json.orjson is not None else 'stdlib json'}, "
+          f"bandwidth samples: {len(network_info.bandwidth_history)}")
+
+    cases = {
+        "/api/all": (
+            network_info.get_all_network_data,
+            network_info.get_all_network_data_token,
+        ),
+        "/api/bandwidth-history?timeframe=all": (
+            lambda: network_info.get_bandwidth_history("all"),
+            lambda: network_info.get_history_token(network_info.bandwidth_history, "all"),
+        ),
+    }
+    for name, (build, token) in cases.items():
+        stdlib_ms, size = timed(lambda: json.dumps(build(), cls=DateTimeEncoder).encode("utf-8"))
+        fast_ms, _ = timed(lambda: fast_json.dumps(build()))
+        cache.lookup(name, token(), build)
+        cached_ms, _ = timed(lambda: cache.lookup(name, token(), build))
+        print(f"{name}  ({size:,} bytes)")
+        print(f"  build + json.dumps     {stdlib_ms:9.3f} ms")
+        print(f"  build + fast_json      {fast_ms:9.3f} ms")
+        print(f"  cached bytes           {cached_ms:9.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: full /processes dump vs server-side top-N on synthetic tables.
+
+Run from the backend directory:
+
+    python benchmarks/bench_process_query.py
+
+For each table size the script times building and serializing the full
+process list against a "top 20 by CPU" query, both from a table whose
+version just changed (sort index rebuilt) and from a warm index (every
+poller after the first in the same tick).
+"""
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from process_info import ProcessTable  # noqa: E402
+
+SIZES = (500, 5_000, 20_000)
+TOP_N = 20
+ROUNDS = 50
+
+
+def synthetic_table(count):
+    """ProcessTable filled with fake rows instead of walking psutil"""
+    table = ProcessTable()
+    table.version = 1
+    for pid in range(1, count + 1):
+        key = (pid, 0.0)
+        table._rows[key] = {
+            "pid": pid,
+            "name": f"proc-{random.randint(0, 999)}.exe",
+            "cpu_percent": round(random.random() * 100, 1),
+            "memory_usage": random.randint(1 << 20, 1 << 31),
+        }
+        table._added_at[key] = 1
+        table._changed_at[key] = 1
+    return table
+
+
+def timed(func, rounds=ROUNDS):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        payload = func()
+    return (time.perf_counter() - start) / rounds * 1000, len(payload)
+
+
+def main():
+    print(f"{'processes':>10} {'full dump':>12} {'bytes':>10} {'top-N cold':>12} {'top-N warm':>12} {'bytes':>8}")
+    for count in SIZES:
+        table = synthetic_table(count)
+
+        full_ms, full_bytes = timed(lambda: json.dumps(table.snapshot()))
+
+        def top_cold():
+            table.version += 1  # Invalidate the sort index, as a refresh would
+            return json.dumps(table.query("cpu", limit=TOP_N))
+
+        cold_ms, top_bytes = timed(top_cold)
+        warm_ms, _ = timed(lambda: json.dumps(table.query("cpu", limit=TOP_N)))
+
+        print(f"{count:>10} {full_ms:>10.2f}ms {full_bytes:>10} {cold_ms:>10.2f}ms {warm_ms:>10.3f}ms {top_bytes:>8}")
+
+
+if __name__ == "__main__":
+    main()
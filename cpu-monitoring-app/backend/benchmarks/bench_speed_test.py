@@ -0,0 +1,64 @@
+"""Benchmark: speed test engine against a local HTTP stand-in server.
+
+Run from the backend directory:
+
+    python benchmarks/bench_speed_test.py
+
+Starts a throttled stand-in for the speed test target on 127.0.0.1
+(tests/stand_in.py) and then:
+
+- runs a full test and prints the per-second samples, how many seconds
+  each phase needed to converge and how far the result is from the
+  configured rate;
+- starts another test, cancels it two samples into the download phase
+  and reports how long it took to stop.
+"""
+import os
+import sys
+import time
+import threading
+
+backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, backend)
+sys.path.insert(0, os.path.join(backend, "tests"))
+
+from speed_tester import SpeedTest  # noqa: E402
+from stand_in import start_stand_in  # noqa: E402
+
+DOWNLOAD_MBPS = 80.0
+UPLOAD_MBPS = 20.0
+
+
+def main():
+    server, options = start_stand_in(DOWNLOAD_MBPS, UPLOAD_MBPS)
+    base = options["upload_url"].rsplit("/", 1)[0]
+
+    print(f"Stand-in target at {base}: {DOWNLOAD_MBPS} Mbps down, {UPLOAD_MBPS} Mbps up\n")
+    test = SpeedTest(**options)
+    started = time.perf_counter()
+    test.run()
+    elapsed = time.perf_counter() - started
+    result = test.result
+    assert "error" not in result, result
+    for phase, expected in (("download", DOWNLOAD_MBPS), ("upload", UPLOAD_MBPS)):
+        samples = result["samples"][phase]
+        print(f"{phase:8s} samples (Mbps): {', '.join(f'{sample:.1f}' for sample in samples)}")
+        print(f"{phase:8s} result {result[phase]:6.1f} Mbps  error {abs(result[phase] - expected) / expected * 100:4.1f}%  "
+              f"{len(samples)}s, converged: {result['converged'][phase]}")
+    print(f"ping {result['ping']} ms, whole test {elapsed:.1f}s, {len(test.events)} events\n")
+
+    test = SpeedTest(**options)
+    thread = threading.Thread(target=test.run, daemon=True)
+    thread.start()
+    while sum(1 for event in list(test.events) if event["event"] == "sample") < 2:
+        time.sleep(0.05)
+    cancelled_at = time.perf_counter()
+    test.cancel()
+    test.done.wait()
+    print(f"Cancelled in the {test.events[-2].get('phase')} phase; stopped after "
+          f"{(time.perf_counter() - cancelled_at) * 1000:.0f} ms: {test.result['error']}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Benchmark: SQLite history backend ingest rate and query latency.
+
+Run from the backend directory:
+
+    python benchmarks/bench_sqlite_store.py [rows] [database path]
+
+Ingests `rows` samples (10M by default) spread over METRICS metrics at one
+sample per second each, in the same batched way the sampler hook writes,
+then times typical history queries: a raw hour, a day in 1-minute buckets
+and the whole range in 1-hour buckets. The database is created in a
+temporary directory unless a path is given.
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metric_store import SqliteMetricStore  # noqa: E402
+
+ROWS = 10_000_000
+METRICS = ("cpu.percent", "memory.percent", "memory.used", "disk.percent",
+           "gpu.utilization", "gpu.temperature", "battery.percent", "network.download",
+           "network.upload", "network.ping")
+QUERY_ROUNDS = 20
+
+
+def timed(func, rounds=QUERY_ROUNDS):
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        result = func()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return samples[len(samples) // 2], samples[-1], len(result)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else ROWS
+    directory = None
+    if len(sys.argv) > 2:
+        path = sys.argv[2]
+    else:
+        directory = tempfile.mkdtemp(prefix="vamos-bench-")
+        path = os.path.join(directory, "metrics.sqlite3")
+
+    try:
+        store = SqliteMetricStore(path, retention=10 ** 9)
+        ticks = rows // len(METRICS)
+        end = int(time.time())
+        start = end - ticks
+
+        started = time.perf_counter()
+        for tick in range(ticks):
+            store.append_many({metric: random.random() * 100 for metric in METRICS}, start + tick)
+        store.flush()
+        elapsed = time.perf_counter() - started
+        print(f"ingest:   {ticks * len(METRICS):,} rows in {elapsed:.1f}s ({ticks * len(METRICS) / elapsed:,.0f} rows/s)")
+        print(f"size:     {os.path.getsize(path) / 1024 / 1024:.1f} MiB")
+
+        queries = {
+            "raw last hour": lambda: store.query("cpu.percent", end - 3600, end),
+            "1 day, 1-min buckets": lambda: store.buckets("cpu.percent", end - 86400, end, 60),
+            "all, 1-hour buckets": lambda: store.buckets("cpu.percent", None, None, 3600),
+            "last sample": lambda: [store.last("cpu.percent")],
+        }
+        for name, query in queries.items():
+            p50, worst, count = timed(query)
+            print(f"{name:<22} p50 {p50:8.2f}ms  max {worst:8.2f}ms  ({count} rows)")
+        store.close()
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+import os
+import time
+import functools
+from state_store import SingleFlight
+from instrumentation import record_cache
+
+# Default time (seconds) a coalesced collector's result is reused after it finishes
+COALESCE_WINDOW = float(os.environ.get("VAMOS_COALESCE_WINDOW", "1.0"))
+
+
+class Coalescer(SingleFlight):
+    """SingleFlight that also reuses each result for a freshness window.
+
+    Concurrent callers for a key share one in-flight computation, and
+    callers arriving within fresh_for seconds of it finishing get the same
+    result without running it again. Exceptions are shared with the callers
+    that were waiting but never reused. Results are shared objects, so
+    callers must not mutate them.
+    """
+
+    def __init__(self, name, fresh_for=COALESCE_WINDOW):
+        super().__init__()
+        self.name = name
+        self.fresh_for = fresh_for
+        self._results = {}  # key -> (finished at, result)
+
+    def do(self, key, func, *args, **kwargs):
+        entry = self._results.get(key)
+        if entry is not None and time.monotonic() - entry[0] < self.fresh_for:
+            record_cache(self.name, True)
+            return entry[1]
+        # Joining a computation already in flight is as good as a hit
+        record_cache(self.name, self.in_flight(key))
+        return super().do(key, self._run, key, func, args, kwargs)
+
+    def _run(self, key, func, args, kwargs):
+        result = func(*args, **kwargs)
+        # Stored before the in-flight call is released, so a late caller either joins or reuses it
+        self._results[key] = (time.monotonic(), result)
+        return result
+
+    def clear(self):
+        self._results.clear()
+
+
+def coalesced(func=None, fresh_for=None, name=None):
+    """Decorator that puts a collector behind a Coalescer.
+
+    Used as @coalesced or @coalesced(fresh_for=..., name=...); calls with
+    the same arguments are coalesced together. Place it above @instrumented
+    so the collector's statistics count real runs only. The Coalescer is
+    available as the wrapper's .coalescer attribute.
+    """
+    if func is None:
+        return lambda f: coalesced(f, fresh_for, name)
+    coalescer = Coalescer(
+        f"coalesced:{name or func.__name__}", COALESCE_WINDOW if fresh_for is None else fresh_for
+    )
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return coalescer.do((args, tuple(sorted(kwargs.items()))), func, *args, **kwargs)
+
+    wrapper.coalescer = coalescer
+    return wrapper
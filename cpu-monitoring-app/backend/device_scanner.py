@@ -0,0 +1,368 @@
+import re
+import time
+import socket
+import logging
+import platform
+import ipaddress
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import psutil
+import latency_prober
+from instrumentation import instrumented, record_cache
+
+# Hosts probed at once during a sweep
+SCAN_CONCURRENCY = 64
+# Per-host probe timeout (seconds)
+SCAN_PROBE_TIMEOUT = 1.0
+# Never sweep more than this many hosts; larger networks are narrowed around the local IP
+MAX_PREFIX = 20
+# How long a reverse DNS answer (or failure) is reused (seconds)
+HOSTNAME_CACHE_TTL = 600
+# A device not seen for this long is reported Idle, and dropped after DEVICE_TTL (seconds)
+DEVICE_IDLE_AFTER = 120
+DEVICE_TTL = 900
+# Full sweeps run at most this often; in between only known devices are re-probed (seconds)
+FULL_SCAN_INTERVAL = 300
+# Timeout for re-probing a device that answered before (seconds)
+KNOWN_PROBE_TIMEOUT = 0.5
+# How many versions of removals are kept for since= clients
+REMOVED_HISTORY = 500
+
+_hostname_cache = {}   # ip -> (hostname or None, expires at)
+_hostname_lock = threading.Lock()
+_arp_cache = (0.0, {})  # (read at, table) for platforms where reading it forks
+_scan_lock = threading.Lock()
+_current_scan = None
+
+
+def get_local_ip():
+    """IP of the interface that routes to the internet"""
+    s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        s.connect(("8.8.8.8", 80))
+        return s.getsockname()[0]
+    finally:
+        s.close()
+
+
+def get_local_network(local_ip):
+    """The local IPv4 prefix, at least a /24 and at most MAX_PREFIX wide"""
+    prefix = 24
+    for addrs in psutil.net_if_addrs().values():
+        for addr in addrs:
+            if addr.family == socket.AF_INET and addr.address == local_ip and addr.netmask:
+                prefix = ipaddress.IPv4Network(f"0.0.0.0/{addr.netmask}").prefixlen
+    prefix = min(24, max(MAX_PREFIX, prefix))
+    return ipaddress.IPv4Network(f"{local_ip}/{prefix}", strict=False)
+
+
+@instrumented
+def read_arp_table():
+    """IP -> MAC for complete entries in the ARP/neighbor table"""
+    global _arp_cache
+    table = {}
+    if platform.system() == "Linux":
+        try:
+            with open("/proc/net/arp") as f:
+                next(f)  # Header
+                for line in f:
+                    fields = line.split()
+                    # Flags 0x0 means the entry is incomplete
+                    if len(fields) >= 4 and fields[2] != "0x0" and fields[3] != "00:00:00:00:00:00":
+                        table[fields[0]] = fields[3]
+        except OSError:
+            pass
+        return table
+
+    # Elsewhere the table comes from `arp -a`, so reuse it for a few seconds
+    read_at, cached = _arp_cache
+    fresh = time.monotonic() - read_at < 5
+    record_cache("arp_table", fresh)
+    if fresh:
+        return cached
+    try:
+        output = subprocess.check_output(["arp", "-a"], timeout=5).decode("utf-8", errors="ignore")
+        for ip, mac in re.findall(r"(\d+\.\d+\.\d+\.\d+)\)?\s+(?:at\s+)?([0-9a-fA-F]{1,2}(?:[:-][0-9a-fA-F]{1,2}){5})", output):
+            table[ip] = mac.replace("-", ":").lower()
+    except Exception as e:
+        logging.debug(f"ARP table read failed: {e}")
+    _arp_cache = (time.monotonic(), table)
+    return table
+
+
+def resolve_hostname(ip):
+    """Reverse DNS name for ip, cached (including misses) for HOSTNAME_CACHE_TTL"""
+    now = time.monotonic()
+    with _hostname_lock:
+        cached = _hostname_cache.get(ip)
+    record_cache("hostname", bool(cached and cached[1] > now))
+    if cached and cached[1] > now:
+        return cached[0]
+    try:
+        hostname = socket.gethostbyaddr(ip)[0]
+    except OSError:
+        hostname = None
+    with _hostname_lock:
+        _hostname_cache[ip] = (hostname, now + HOSTNAME_CACHE_TTL)
+    return hostname
+
+
+class DeviceInventory:
+    """Devices seen across scans, keyed by MAC (or IP until the MAC is known).
+
+    Each record keeps first/last seen times and latency stats, and the
+    version it last changed in, so clients can ask for only the changes.
+    Changes made during a scan or reprobe pass share one version, which
+    commit() publishes at the end of the pass; a record only counts as
+    changed when more than its lastSeen time and latency stats moved.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._devices = {}      # key -> record
+        self._changed_at = {}   # key -> version
+        self._removed = []      # (version, device id)
+        self._by_ip = {}        # ip -> key of the device last seen at that ip
+        self.version = 0
+        self._dirty = False     # Changes are waiting for commit()
+        self.last_full_scan = 0.0
+
+    def _key(self, ip, mac):
+        # Without a MAC, match whichever device was last seen at this IP
+        return mac.lower() if mac else self._by_ip.get(ip, ip)
+
+    def _mark(self, key):
+        # Caller holds the lock
+        self._changed_at[key] = self.version + 1
+        self._dirty = True
+
+    def commit(self):
+        """Publish the changes of the current pass as one new version"""
+        with self._lock:
+            self._commit()
+
+    def _commit(self):
+        if self._dirty:
+            self.version += 1
+            self._dirty = False
+        while self._removed and self._removed[0][0] <= self.version - REMOVED_HISTORY:
+            self._removed.pop(0)
+
+    def observe(self, ip, mac, name, device_id, rtt=None, answered=True):
+        """Record a device (rtt in ms, if measured).
+
+        answered=False is for devices only known from the ARP table: they
+        are added if new, but do not refresh lastSeen, so devices that left
+        still go Idle and expire while their ARP entry lingers.
+        """
+        now = time.time()
+        with self._lock:
+            key = self._key(ip, mac)
+            old = record = self._devices.get(key)
+            if record is None and mac and ip in self._devices:
+                # The MAC is known now; re-key the record found by IP earlier
+                record = self._devices.pop(ip)
+                self._changed_at.pop(ip, None)
+                old = None
+            elif record is not None and not answered:
+                return
+            if record is None:
+                record = {
+                    "id": device_id,
+                    "name": name or "Unknown Device",
+                    "status": "Active",
+                    "ipAddress": ip,
+                    "macAddress": mac or "Unknown",
+                    "firstSeen": now,
+                    "lastSeen": now,
+                    "latency": {"last": None, "min": None, "avg": None, "max": None, "samples": 0}
+                }
+            else:
+                record = dict(record, latency=dict(record["latency"]))
+                record["ipAddress"] = ip
+                if answered:
+                    record.update(status="Active", lastSeen=now)
+                if mac:
+                    record["macAddress"] = mac
+                if name and name != "Unknown Device":
+                    record["name"] = name
+            if rtt is not None:
+                latency = record["latency"]
+                samples = latency["samples"] + 1
+                latency["last"] = round(rtt, 2)
+                latency["min"] = round(rtt if latency["min"] is None else min(latency["min"], rtt), 2)
+                latency["max"] = round(rtt if latency["max"] is None else max(latency["max"], rtt), 2)
+                latency["avg"] = round(rtt if latency["avg"] is None else latency["avg"] + (rtt - latency["avg"]) / samples, 2)
+                latency["samples"] = samples
+            self._devices[key] = record
+            self._by_ip[ip] = key
+            if old is None or dict(old, lastSeen=None, latency=None) != dict(record, lastSeen=None, latency=None):
+                self._mark(key)
+
+    def expire(self):
+        """Mark quiet devices Idle and drop the ones past DEVICE_TTL"""
+        now = time.time()
+        with self._lock:
+            for key, record in list(self._devices.items()):
+                age = now - record["lastSeen"]
+                if age > DEVICE_TTL:
+                    del self._devices[key]
+                    self._changed_at.pop(key, None)
+                    if self._by_ip.get(record["ipAddress"]) == key:
+                        del self._by_ip[record["ipAddress"]]
+                    self._removed.append((self.version + 1, record["id"]))
+                    self._dirty = True
+                elif age > DEVICE_IDLE_AFTER and record["status"] != "Idle":
+                    self._devices[key] = dict(record, status="Idle")
+                    self._mark(key)
+            self._commit()
+
+    def known_ips(self):
+        """IPs of devices that are not Idle, to re-probe cheaply"""
+        with self._lock:
+            return [record["ipAddress"] for record in self._devices.values() if record["status"] == "Active"]
+
+    def devices(self):
+        with self._lock:
+            return list(self._devices.values())
+
+    def changes(self, since=None):
+        """All devices, or only those changed or removed since a version"""
+        with self._lock:
+            if since is None or since > self.version or since < self.version - REMOVED_HISTORY:
+                return {"version": self.version, "full": True, "devices": list(self._devices.values())}
+            return {
+                "version": self.version,
+                "full": False,
+                "changed": [record for key, record in self._devices.items() if self._changed_at[key] > since],
+                "removed": [device_id for version, device_id in self._removed if version > since],
+            }
+
+
+# Devices seen across all scans
+device_inventory = DeviceInventory()
+
+
+@instrumented
+def reprobe_known_devices():
+    """Re-check devices that answered recently, one short probe each"""
+    ips = device_inventory.known_ips()
+    if not ips:
+        return
+    arp = read_arp_table()
+
+    def reprobe(ip):
+        result = latency_prober.probe(ip, count=1, timeout=KNOWN_PROBE_TIMEOUT)
+        if result.received:
+            device_inventory.observe(ip, arp.get(ip), None, f"device-{ip}", result.avg)
+
+    with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY, thread_name_prefix="vamos-reprobe") as pool:
+        list(pool.map(reprobe, ips))
+    device_inventory.commit()
+
+
+def full_scan_due():
+    return time.time() - device_inventory.last_full_scan >= FULL_SCAN_INTERVAL
+
+
+class DeviceScan:
+    """One sweep of the local network.
+
+    Devices are appended to `devices` as they are found, so readers can
+    stream them while the sweep is still running; `done` is set at the end.
+    """
+
+    def __init__(self, local_ip, network, local_mac=None):
+        self.local_ip = local_ip
+        self.local_mac = local_mac
+        self.network = network
+        self.devices = []
+        self.started_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+        self._seen = set()
+
+    def _publish(self, ip, mac, name, device_id, rtt=None, answered=True):
+        device_inventory.observe(ip, mac, name, device_id, rtt, answered)
+        with self._lock:
+            if ip in self._seen:
+                return
+            self._seen.add(ip)
+            self.devices.append({
+                "id": device_id,
+                "name": name,
+                "status": "Active",
+                "ipAddress": ip,
+                "macAddress": mac or "Unknown"
+            })
+
+    def _probe_host(self, ip, arp):
+        result = latency_prober.probe(ip, count=1, timeout=SCAN_PROBE_TIMEOUT)
+        if not result.received:
+            return
+        name = resolve_hostname(ip) or "Unknown Device"
+        self._publish(ip, arp.get(ip), name, f"device-{ip}", result.avg)
+
+    def _publish_arp_only(self, ip, mac):
+        # An ARP entry can outlive its device, so it never counts as a reply
+        self._publish(ip, mac, resolve_hostname(ip) or "Unknown Device", f"device-{ip}", answered=False)
+
+    @staticmethod
+    def _wait(futures):
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                logging.debug(f"Host probe failed: {e}")
+
+    def run(self):
+        try:
+            # This device first, so clients always have at least one row
+            self._publish(self.local_ip, self.local_mac, "This Device", "this-device")
+            hosts = [str(ip) for ip in self.network.hosts() if str(ip) != self.local_ip]
+            arp = read_arp_table()
+            with ThreadPoolExecutor(max_workers=SCAN_CONCURRENCY, thread_name_prefix="vamos-scan") as pool:
+                self._wait([pool.submit(self._probe_host, ip, arp) for ip in hosts])
+
+                # The sweep fills the ARP table, so read it once more: it has the MACs of
+                # hosts that just answered, and hosts that answered ARP but drop ICMP/TCP
+                # probes, which are still on the network
+                lookups = []
+                for ip, mac in read_arp_table().items():
+                    if ip == self.local_ip or ipaddress.IPv4Address(ip) not in self.network:
+                        continue
+                    if ip in self._seen:
+                        if mac != arp.get(ip):
+                            device_inventory.observe(ip, mac, None, f"device-{ip}", answered=False)
+                    else:
+                        lookups.append(pool.submit(self._publish_arp_only, ip, mac))
+                self._wait(lookups)
+        except Exception as e:
+            logging.error(f"Network scan error: {e}")
+        finally:
+            device_inventory.commit()
+            self.finished_at = time.time()
+            device_inventory.last_full_scan = self.finished_at
+            self.done.set()
+
+
+def start_scan(local_mac=None):
+    """Start a sweep, or return the one already running"""
+    global _current_scan
+    with _scan_lock:
+        if _current_scan is not None and not _current_scan.done.is_set():
+            return _current_scan
+        local_ip = get_local_ip()
+        scan = DeviceScan(local_ip, get_local_network(local_ip), local_mac)
+        thread = threading.Thread(target=scan.run, name="vamos-device-scan")
+        thread.daemon = True
+        thread.start()
+        _current_scan = scan
+        return scan
+
+
+def get_current_scan():
+    """The running or most recent sweep (None before the first one)"""
+    return _current_scan
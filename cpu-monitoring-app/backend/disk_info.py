@@ -1,26 +1,19 @@
-import wmi
-from fastapi.responses import JSONResponse
+from fast_json import FastJSONResponse
+from hw_provider import get_hardware_provider
+from instrumentation import instrumented
+from coalescing import coalesced
 
+@coalesced
+@instrumented
 def get_disks():
-    """Fetch all disk partitions and their usage using WMI."""
+    """Fetch all local disk partitions and their usage from the hardware provider."""
     try:
-        disks = []
-        c = wmi.WMI()
-        for disk in c.Win32_LogicalDisk():
-            if disk.DriveType == 3:  # DriveType 3 indicates a local disk
-                disks.append({
-                    "device": disk.DeviceID,
-                    "mountpoint": disk.DeviceID,
-                    "total": int(disk.Size) if disk.Size else 0,
-                    "used": int(disk.Size) - int(disk.FreeSpace) if disk.Size and disk.FreeSpace else 0,
-                    "free": int(disk.FreeSpace) if disk.FreeSpace else 0,
-                    "percent": round((1 - int(disk.FreeSpace) / int(disk.Size)) * 100, 2) if disk.Size and disk.FreeSpace else 0
-                })
-        return disks
+        return get_hardware_provider().disks()
     except Exception as e:
         return {"error": f"Failed to fetch disk info: {str(e)}"}
 
+@instrumented
 def get_disk_data():
     """API response for disk data."""
     disks = get_disks()
-    return JSONResponse(content={"disks": disks})
\ No newline at end of file
+    return FastJSONResponse(content={"disks": disks})
@@ -0,0 +1,82 @@
+import os
+import asyncio
+import logging
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+# Per-collector limits: (max concurrent calls, timeout in seconds)
+COLLECTOR_LIMITS = {
+    "system": (2, 10.0),
+    "memory": (4, 5.0),
+    "disks": (2, 10.0),
+    "cpu": (4, 10.0),
+    "gpu": (2, 10.0),
+    "network": (2, 30.0),
+    "processes": (1, 10.0),
+}
+DEFAULT_LIMIT = (4, 10.0)
+
+# Size of the thread pool shared by all blocking collectors; by default every
+# collector can use its full limit at once
+MAX_WORKERS = int(os.environ.get(
+    "VAMOS_COLLECTOR_WORKERS", str(sum(limit for limit, _ in COLLECTOR_LIMITS.values()))
+))
+
+_executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="vamos-collector")
+# Event loop -> {collector name: semaphore}; asyncio semaphores belong to one loop
+_semaphores = weakref.WeakKeyDictionary()
+
+
+class CollectorTimeout(Exception):
+    """Raised when a collector does not finish within its timeout"""
+
+    def __init__(self, name, timeout):
+        super().__init__(f"Collector '{name}' timed out after {timeout:.1f}s")
+        self.name = name
+        self.timeout = timeout
+
+
+def _get_semaphore(loop, name):
+    semaphores = _semaphores.get(loop)
+    if semaphores is None:
+        semaphores = _semaphores[loop] = {}
+    semaphore = semaphores.get(name)
+    if semaphore is None:
+        limit, _ = COLLECTOR_LIMITS.get(name, DEFAULT_LIMIT)
+        semaphore = semaphores[name] = asyncio.Semaphore(limit)
+    return semaphore
+
+
+async def run_collector(name, func, *args, timeout=None):
+    """Run a blocking collector on the shared pool without blocking the event loop.
+
+    At most N calls of the same collector run at once; extra callers wait for
+    a slot. The wait and the call together are bounded by the timeout, after
+    which CollectorTimeout is raised. The slot is only released once the
+    worker thread has actually finished, so a hung collector cannot pile up
+    threads in the pool.
+    """
+    if timeout is None:
+        _, timeout = COLLECTOR_LIMITS.get(name, DEFAULT_LIMIT)
+
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    semaphore = _get_semaphore(loop, name)
+
+    try:
+        await asyncio.wait_for(semaphore.acquire(), timeout)
+    except asyncio.TimeoutError:
+        raise CollectorTimeout(name, timeout)
+
+    future = loop.run_in_executor(_executor, func, *args)
+    future.add_done_callback(lambda _: semaphore.release())
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), max(0.0, deadline - loop.time()))
+    except asyncio.TimeoutError:
+        logging.error(f"Collector '{name}' timed out after {timeout:.1f}s")
+        raise CollectorTimeout(name, timeout)
+
+
+def shutdown_executor():
+    """Stop accepting new collector work"""
+    _executor.shutdown(wait=False, cancel_futures=True)
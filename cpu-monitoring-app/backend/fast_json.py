@@ -0,0 +1,106 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import date, datetime
+from decimal import Decimal
+from fastapi.responses import JSONResponse, Response
+from instrumentation import record_cache
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib encoder is used without it
+    orjson = None
+
+# Serialized responses kept by SerializedCache before the oldest is dropped
+MAX_CACHED_RESPONSES = 256
+
+
+def _default(obj):
+    # Types neither encoder handles on its own (orjson already handles datetime)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """Serialize to UTF-8 JSON bytes with orjson if installed, else the stdlib"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def dumps_str(obj):
+    """Like dumps, as text (for SSE and WebSocket frames)"""
+    return dumps(obj).decode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by dumps; bytes content is sent as already-serialized JSON"""
+
+    def render(self, content):
+        if isinstance(content, (bytes, bytearray)):
+            return bytes(content)
+        return dumps(content)
+
+
+def etag_matches(if_none_match, etag):
+    """Weak If-None-Match comparison: W/"x" and "x" match, as does *"""
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in tags or "*" in tags
+
+
+class SerializedCache:
+    """Serialized response bodies, reused while their data has not changed.
+
+    Each entry is stored with a token describing the data it was built from
+    (publish versions, series versions and ranges, ...). A lookup with an
+    equal token returns the stored bytes and their ETag without building or
+    encoding the response again. A None token means "do not cache".
+    """
+
+    def __init__(self, max_entries=MAX_CACHED_RESPONSES):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (token, bytes, etag)
+
+    def lookup(self, key, token, build):
+        """(bytes, ETag) for key, calling build() and serializing only if token changed"""
+        if token is not None:
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == token:
+                    self._entries.move_to_end(key)
+                    record_cache("serialized_response", True)
+                    return entry[1], entry[2]
+        record_cache("serialized_response", False)
+        body = dumps(build())
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        if token is not None:
+            with self._lock:
+                self._entries[key] = (token, body, etag)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return body, etag
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared cache for hot read endpoints
+serialized_cache = SerializedCache()
+
+
+def cached_json_response(if_none_match, key, token, build):
+    """Cached body with its ETag, or 304 Not Modified when the client already has it"""
+    body, etag = serialized_cache.lookup(key, token, build)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if if_none_match and etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content=body, headers=headers)
@@ -3,6 +3,7 @@ from pydantic import BaseModel
 import psutil
 import os
 import subprocess
+from instrumentation import instrumented
 
 router = APIRouter()
 
@@ -64,6 +65,7 @@ def set_process_priority():
 
 
 @router.get("/gaming-mode/status")
+@instrumented
 def get_gaming_mode_status():
     return {"gaming_mode": gaming_mode_state["enabled"]}
 
@@ -0,0 +1,153 @@
+import os
+import abc
+import time
+import logging
+import threading
+from instrumentation import record_cache
+
+# How long a batch of GPU readings is reused before NVML is queried again (seconds)
+GPU_CACHE_TTL = float(os.environ.get("VAMOS_GPU_CACHE_TTL", "1.0"))
+
+
+class GpuProvider(abc.ABC):
+    """Base class for GPU telemetry providers.
+
+    Subclasses implement read_devices(), which reads every device in one
+    pass. devices() wraps it in a short TTL cache shared by all callers.
+    """
+
+    name = "base"
+
+    def __init__(self, ttl=GPU_CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._devices = None
+        self._read_at = 0.0
+
+    @abc.abstractmethod
+    def read_devices(self):
+        """Read every device in one pass, as a list of dicts"""
+
+    def devices(self):
+        """All devices, served from cache while the last reading is fresh"""
+        with self._lock:
+            fresh = self._devices is not None and time.monotonic() - self._read_at < self.ttl
+            record_cache("gpu_devices", fresh)
+            if not fresh:
+                try:
+                    self._devices = self.read_devices()
+                except Exception as e:
+                    logging.error(f"GPU telemetry read failed ({self.name}): {e}")
+                    self._devices = []
+                self._read_at = time.monotonic()
+            return self._devices
+
+    def close(self):
+        pass
+
+
+class NvmlGpuProvider(GpuProvider):
+    """Reads NVIDIA GPUs through a single long-lived NVML session"""
+
+    name = "nvml"
+
+    def __init__(self, ttl=GPU_CACHE_TTL):
+        super().__init__(ttl)
+        import pynvml
+        self._nvml = pynvml
+        pynvml.nvmlInit()
+        self._handles = [
+            pynvml.nvmlDeviceGetHandleByIndex(i) for i in range(pynvml.nvmlDeviceGetCount())
+        ]
+
+    def _optional(self, func, *args):
+        # Not every board exposes every sensor; a missing one shouldn't drop the device
+        try:
+            return func(*args)
+        except self._nvml.NVMLError:
+            return None
+
+    def read_devices(self):
+        nvml = self._nvml
+        devices = []
+        for index, handle in enumerate(self._handles):
+            name = self._optional(nvml.nvmlDeviceGetName, handle)
+            if isinstance(name, bytes):
+                name = name.decode("utf-8", errors="ignore")
+            utilization = self._optional(nvml.nvmlDeviceGetUtilizationRates, handle)
+            memory = self._optional(nvml.nvmlDeviceGetMemoryInfo, handle)
+            power = self._optional(nvml.nvmlDeviceGetPowerUsage, handle)
+            devices.append({
+                "index": index,
+                "name": name,
+                "utilization": utilization.gpu if utilization else None,
+                "memory_utilization": utilization.memory if utilization else None,
+                "temperature": self._optional(nvml.nvmlDeviceGetTemperature, handle, nvml.NVML_TEMPERATURE_GPU),
+                "gpu_clock": self._optional(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_GRAPHICS),
+                "memory_clock": self._optional(nvml.nvmlDeviceGetClockInfo, handle, nvml.NVML_CLOCK_MEM),
+                "power_watts": round(power / 1000.0, 1) if power is not None else None,  # NVML reports milliwatts
+                "memory_total": memory.total if memory else None,
+                "memory_used": memory.used if memory else None,
+            })
+        return devices
+
+    def close(self):
+        try:
+            self._nvml.nvmlShutdown()
+        except Exception:
+            pass
+
+
+class FakeGpuProvider(GpuProvider):
+    """Provider that returns a fixed list of devices.
+
+    Used when NVML is unavailable (CPU-only machines report no devices) and
+    in development, where a device list can be passed in to exercise the
+    GPU endpoints without hardware.
+    """
+
+    name = "fake"
+
+    def __init__(self, devices=None, ttl=GPU_CACHE_TTL):
+        super().__init__(ttl)
+        self._fake_devices = list(devices or [])
+
+    def read_devices(self):
+        return [dict(device) for device in self._fake_devices]
+
+
+_provider = None
+_provider_lock = threading.Lock()
+
+
+def _create_provider():
+    if os.environ.get("VAMOS_GPU_PROVIDER", "").lower() == "fake":
+        return FakeGpuProvider()
+    try:
+        return NvmlGpuProvider()
+    except Exception as e:
+        print(f"NVML unavailable, using fake GPU provider: {e}")
+        return FakeGpuProvider()
+
+
+def get_gpu_provider():
+    """Return the process-wide GPU provider, creating it on first use"""
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = _create_provider()
+        return _provider
+
+
+def set_gpu_provider(provider):
+    """Replace the GPU provider (closing the previous one)"""
+    global _provider
+    with _provider_lock:
+        if _provider is not None and _provider is not provider:
+            _provider.close()
+        _provider = provider
+
+
+def get_gpu_devices():
+    """Cached telemetry for every GPU the provider can see"""
+    return get_gpu_provider().devices()
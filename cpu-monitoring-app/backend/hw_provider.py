@@ -0,0 +1,275 @@
+import os
+import glob
+import platform
+import threading
+import psutil
+
+
+class HardwareProvider:
+    """Platform backend for hardware queries that psutil does not cover.
+
+    Every method returns None (or an empty list) when the value is not
+    available, so callers can fall through to their next method.
+    """
+
+    name = "base"
+
+    def cpu_temperature(self):
+        """Overall CPU temperature in Celsius"""
+        return None
+
+    def gpu_load(self):
+        """GPU load percentage (0-100)"""
+        return None
+
+    def gpu_temperature(self):
+        """GPU temperature in Celsius"""
+        return None
+
+    def gpu_name(self):
+        """Display name of the primary GPU"""
+        return None
+
+    def computer_system(self):
+        """(model, manufacturer) of the machine"""
+        return None, None
+
+    def disks(self):
+        """Local disks as dicts with device, mountpoint, total, used, free and percent"""
+        return []
+
+
+class WmiProvider(HardwareProvider):
+    """Windows backend that reuses WMI connections instead of opening one per request.
+
+    WMI connections are COM objects bound to the thread that created them,
+    so the pool keeps one connection per namespace per thread. Collector
+    threads are long-lived, so after warm-up every query runs on an
+    already-open connection.
+    """
+
+    name = "wmi"
+
+    def __init__(self):
+        import wmi
+        self._wmi = wmi
+        self._local = threading.local()
+
+    def connection(self, namespace="root\\cimv2"):
+        """Return this thread's pooled connection for a WMI namespace"""
+        pool = getattr(self._local, "pool", None)
+        if pool is None:
+            try:
+                import pythoncom
+                pythoncom.CoInitialize()
+            except ImportError:
+                pass
+            pool = self._local.pool = {}
+        conn = pool.get(namespace)
+        if conn is None:
+            conn = pool[namespace] = self._wmi.WMI(namespace=namespace)
+        return conn
+
+    def _discard(self, namespace):
+        # Drop a broken connection so the next call reconnects
+        pool = getattr(self._local, "pool", None)
+        if pool:
+            pool.pop(namespace, None)
+
+    def _ohm_sensor_values(self, name_part):
+        namespace = r"root\OpenHardwareMonitor"
+        try:
+            return [
+                sensor.Value
+                for sensor in self.connection(namespace).Sensor()
+                if sensor.SensorType == "Temperature" and name_part in sensor.Name
+            ]
+        except Exception as e:
+            self._discard(namespace)
+            print(f"OpenHardwareMonitor query failed: {e}")
+            return []
+
+    def _thermal_zone_temperature(self):
+        namespace = r"root\wmi"
+        try:
+            temps = [t.CurrentTemperature / 10 - 273.15 for t in self.connection(namespace).MSAcpi_ThermalZoneTemperature()]
+            return round(temps[0], 1) if temps else None
+        except Exception as e:
+            self._discard(namespace)
+            print(f"WMI thermal zone query failed: {e}")
+            return None
+
+    def cpu_temperature(self):
+        core_temps = self._ohm_sensor_values("CPU Core")
+        if core_temps:
+            return round(sum(core_temps) / len(core_temps), 1)
+        return self._thermal_zone_temperature()
+
+    def gpu_load(self):
+        try:
+            for gpu in self.connection().Win32_VideoController():
+                if getattr(gpu, "LoadPercentage", None) is not None:
+                    return float(gpu.LoadPercentage)
+        except Exception as e:
+            self._discard("root\\cimv2")
+            print(f"WMI GPU load query failed: {e}")
+        return None
+
+    def gpu_temperature(self):
+        temp = self._thermal_zone_temperature()
+        if temp is not None:
+            return temp
+        gpu_temps = self._ohm_sensor_values("GPU")
+        return gpu_temps[0] if gpu_temps else None
+
+    def gpu_name(self):
+        try:
+            return self.connection().Win32_VideoController()[0].Name
+        except Exception:
+            self._discard("root\\cimv2")
+            return None
+
+    def computer_system(self):
+        try:
+            system = self.connection().Win32_ComputerSystem()[0]
+            return system.Model, system.Manufacturer
+        except Exception:
+            self._discard("root\\cimv2")
+            return None, None
+
+    def disks(self):
+        disks = []
+        try:
+            for disk in self.connection().Win32_LogicalDisk(DriveType=3):  # DriveType 3 indicates a local disk
+                total = int(disk.Size) if disk.Size else 0
+                free = int(disk.FreeSpace) if disk.FreeSpace else 0
+                disks.append({
+                    "device": disk.DeviceID,
+                    "mountpoint": disk.DeviceID,
+                    "total": total,
+                    "used": total - free if total and free else 0,
+                    "free": free,
+                    "percent": round((1 - free / total) * 100, 2) if total and free else 0
+                })
+        except Exception as e:
+            self._discard("root\\cimv2")
+            print(f"WMI disk query failed: {e}")
+            raise  # get_disks reports the error instead of an empty disk list
+        return disks
+
+
+class LinuxProvider(HardwareProvider):
+    """Linux backend built on sysfs, /proc and psutil.
+
+    sysfs paths are discovered once at startup; each query is then a
+    single small file read.
+    """
+
+    name = "linux"
+
+    # PCI vendor ids for naming GPUs without lspci
+    GPU_VENDORS = {"0x10de": "NVIDIA", "0x1002": "AMD", "0x8086": "Intel"}
+    # psutil sensor chips that report the CPU package, in order of preference
+    CPU_SENSORS = ("coretemp", "k10temp", "zenpower", "cpu_thermal", "acpitz")
+    # Filesystems that are not real local disks
+    SKIP_FSTYPES = {"squashfs", "tmpfs", "devtmpfs", "overlay", "proc", "sysfs"}
+
+    def __init__(self):
+        self._gpu_devices = sorted(glob.glob("/sys/class/drm/card[0-9]/device"))
+        self._gpu_busy_paths = [
+            path for path in (d + "/gpu_busy_percent" for d in self._gpu_devices) if os.path.exists(path)
+        ]
+        self._gpu_temp_paths = [
+            path for d in self._gpu_devices for path in sorted(glob.glob(d + "/hwmon/hwmon*/temp1_input"))
+        ]
+
+    @staticmethod
+    def _read(path):
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def cpu_temperature(self):
+        try:
+            temps = psutil.sensors_temperatures()
+        except Exception:
+            return None
+        for chip in self.CPU_SENSORS:
+            entries = [entry.current for entry in temps.get(chip, []) if entry.current]
+            if entries:
+                return round(entries[0], 1)
+        for entries in temps.values():
+            for entry in entries:
+                if entry.current:
+                    return round(entry.current, 1)
+        return None
+
+    def gpu_load(self):
+        for path in self._gpu_busy_paths:
+            value = self._read(path)
+            if value and value.isdigit():
+                return float(value)
+        return None
+
+    def gpu_temperature(self):
+        for path in self._gpu_temp_paths:
+            value = self._read(path)
+            if value and value.lstrip("-").isdigit():
+                return round(int(value) / 1000.0, 1)  # sysfs reports millidegrees
+        return None
+
+    def gpu_name(self):
+        for device in self._gpu_devices:
+            vendor = self.GPU_VENDORS.get(self._read(device + "/vendor") or "")
+            if vendor:
+                return f"{vendor} GPU"
+        return None
+
+    def computer_system(self):
+        return (
+            self._read("/sys/class/dmi/id/product_name"),
+            self._read("/sys/class/dmi/id/sys_vendor"),
+        )
+
+    def disks(self):
+        disks = []
+        for part in psutil.disk_partitions(all=False):
+            if part.fstype in self.SKIP_FSTYPES or part.device.startswith("/dev/loop"):
+                continue
+            try:
+                usage = psutil.disk_usage(part.mountpoint)
+            except OSError:
+                continue
+            disks.append({
+                "device": part.device,
+                "mountpoint": part.mountpoint,
+                "total": usage.total,
+                "used": usage.used,
+                "free": usage.free,
+                "percent": usage.percent
+            })
+        return disks
+
+
+def _create_provider():
+    system = platform.system()
+    if system == "Windows":
+        try:
+            return WmiProvider()
+        except ImportError as e:
+            print(f"WMI unavailable, hardware queries disabled: {e}")
+            return HardwareProvider()
+    if system == "Linux":
+        return LinuxProvider()
+    return HardwareProvider()
+
+
+# Selected once at import time (i.e. at server startup)
+hardware_provider = _create_provider()
+
+
+def get_hardware_provider():
+    """Return the hardware backend for this platform"""
+    return hardware_provider
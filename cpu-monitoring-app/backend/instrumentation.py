@@ -0,0 +1,205 @@
+import os
+import time
+import threading
+import functools
+import psutil
+
+# Upper bounds (seconds) of the collector latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_process = psutil.Process(os.getpid())
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus sense"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class CollectorStats:
+    """Calls, errors, latency and thread CPU time for one collector"""
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.errors = 0
+        self.cpu_seconds = 0.0
+        self.in_flight = 0
+
+
+class Registry:
+    """Process-wide store of collector and cache statistics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = {}   # name -> CollectorStats
+        self._caches = {}       # name -> [hits, misses]
+
+    def begin(self, name):
+        with self._lock:
+            stats = self._collectors.get(name)
+            if stats is None:
+                stats = self._collectors[name] = CollectorStats()
+            stats.in_flight += 1
+
+    def observe(self, name, seconds, cpu_seconds, error):
+        with self._lock:
+            stats = self._collectors[name]
+            stats.in_flight -= 1
+            stats.latency.observe(seconds)
+            stats.cpu_seconds += cpu_seconds
+            if error:
+                stats.errors += 1
+
+    def cache(self, name, hit):
+        with self._lock:
+            counts = self._caches.setdefault(name, [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def snapshot(self):
+        """Copies of all statistics, taken under the lock"""
+        with self._lock:
+            collectors = {
+                name: {
+                    "buckets": list(stats.latency.counts),
+                    "count": stats.latency.count,
+                    "sum": stats.latency.sum,
+                    "errors": stats.errors,
+                    "cpu_seconds": stats.cpu_seconds,
+                    "in_flight": stats.in_flight,
+                }
+                for name, stats in self._collectors.items()
+            }
+            caches = {name: tuple(counts) for name, counts in self._caches.items()}
+        return collectors, caches
+
+
+# Shared registry used by every instrumented collector
+registry = Registry()
+
+
+def _is_error_result(result):
+    # Collectors report most failures as {"error": ...} or ({"error": ...}, status)
+    if isinstance(result, tuple) and result and isinstance(result[0], dict):
+        result = result[0]
+    return isinstance(result, dict) and "error" in result
+
+
+def instrumented(func=None, name=None):
+    """Decorator that records a collector's latency, CPU time and errors.
+
+    Used as @instrumented or @instrumented(name="..."); the default name is
+    the function's name.
+    """
+    if func is None:
+        return lambda f: instrumented(f, name)
+    collector = name or func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        registry.begin(collector)
+        started = time.perf_counter()
+        cpu_started = time.thread_time()
+        error = True
+        try:
+            result = func(*args, **kwargs)
+            error = _is_error_result(result)
+            return result
+        finally:
+            registry.observe(collector, time.perf_counter() - started, time.thread_time() - cpu_started, error)
+
+    return wrapper
+
+
+def record_cache(name, hit):
+    """Count a cache lookup as a hit or a miss"""
+    registry.cache(name, hit)
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _bound(value):
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_metrics():
+    """All statistics plus the backend's own CPU and memory, in Prometheus text format"""
+    collectors, caches = registry.snapshot()
+    lines = [
+        "# HELP vamos_collector_duration_seconds Time spent in each collector call.",
+        "# TYPE vamos_collector_duration_seconds histogram",
+    ]
+    for name, stats in sorted(collectors.items()):
+        label = _label(name)
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + (float("inf"),), stats["buckets"]):
+            cumulative += count
+            lines.append(f'vamos_collector_duration_seconds_bucket{{collector="{label}",le="{_bound(bound)}"}} {cumulative}')
+        lines.append(f'vamos_collector_duration_seconds_sum{{collector="{label}"}} {stats["sum"]}')
+        lines.append(f'vamos_collector_duration_seconds_count{{collector="{label}"}} {stats["count"]}')
+
+    lines += [
+        "# HELP vamos_collector_errors_total Collector calls that raised or returned an error.",
+        "# TYPE vamos_collector_errors_total counter",
+    ]
+    lines += [f'vamos_collector_errors_total{{collector="{_label(name)}"}} {stats["errors"]}'
+              for name, stats in sorted(collectors.items())]
+    lines += [
+        "# HELP vamos_collector_cpu_seconds_total CPU time used by collector calls on their own thread.",
+        "# TYPE vamos_collector_cpu_seconds_total counter",
+    ]
+    lines += [f'vamos_collector_cpu_seconds_total{{collector="{_label(name)}"}} {stats["cpu_seconds"]}'
+              for name, stats in sorted(collectors.items())]
+    lines += [
+        "# HELP vamos_collector_in_flight Collector calls currently running.",
+        "# TYPE vamos_collector_in_flight gauge",
+    ]
+    lines += [f'vamos_collector_in_flight{{collector="{_label(name)}"}} {stats["in_flight"]}'
+              for name, stats in sorted(collectors.items())]
+
+    lines += [
+        "# HELP vamos_cache_requests_total Cache lookups by result.",
+        "# TYPE vamos_cache_requests_total counter",
+    ]
+    for name, (hits, misses) in sorted(caches.items()):
+        lines.append(f'vamos_cache_requests_total{{cache="{_label(name)}",result="hit"}} {hits}')
+        lines.append(f'vamos_cache_requests_total{{cache="{_label(name)}",result="miss"}} {misses}')
+
+    with _process.oneshot():
+        cpu = _process.cpu_times()
+        memory = _process.memory_info()
+        threads = _process.num_threads()
+        started = _process.create_time()
+    lines += [
+        "# HELP process_cpu_seconds_total Total user and system CPU time of the backend.",
+        "# TYPE process_cpu_seconds_total counter",
+        f"process_cpu_seconds_total {cpu.user + cpu.system}",
+        "# HELP process_resident_memory_bytes Resident memory size of the backend.",
+        "# TYPE process_resident_memory_bytes gauge",
+        f"process_resident_memory_bytes {memory.rss}",
+        "# HELP process_virtual_memory_bytes Virtual memory size of the backend.",
+        "# TYPE process_virtual_memory_bytes gauge",
+        f"process_virtual_memory_bytes {memory.vms}",
+        "# HELP process_threads Threads in the backend process.",
+        "# TYPE process_threads gauge",
+        f"process_threads {threads}",
+        "# HELP process_start_time_seconds Start time of the backend since the epoch.",
+        "# TYPE process_start_time_seconds gauge",
+        f"process_start_time_seconds {started}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,237 @@
+import os
+import time
+import errno
+import socket
+import struct
+import select
+import logging
+import itertools
+
+# TCP ports tried (all at once) when ICMP sockets are not available
+TCP_FALLBACK_PORTS = (443, 53, 80)
+# connect() results meaning the host answered by refusing (WSAECONNREFUSED on Windows)
+REFUSED = {errno.ECONNREFUSED, 10061}
+# connect() results of a handshake still in progress on a non-blocking socket
+IN_PROGRESS = {errno.EINPROGRESS, errno.EWOULDBLOCK, getattr(errno, "WSAEWOULDBLOCK", 10035)}
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+_sequence = itertools.count(1)
+
+
+class LatencyResult:
+    """RTTs from one probe burst, with loss, jitter and percentiles"""
+
+    def __init__(self, host, method, rtts):
+        self.host = host
+        self.method = method
+        self.rtts = rtts  # milliseconds per probe, None for a lost probe
+
+    @property
+    def sent(self):
+        return len(self.rtts)
+
+    @property
+    def replies(self):
+        return [rtt for rtt in self.rtts if rtt is not None]
+
+    @property
+    def received(self):
+        return len(self.replies)
+
+    @property
+    def loss_percent(self):
+        return round(100.0 * (self.sent - self.received) / self.sent, 1) if self.sent else 100.0
+
+    @property
+    def avg(self):
+        replies = self.replies
+        return sum(replies) / len(replies) if replies else None
+
+    @property
+    def jitter(self):
+        """Mean absolute difference between consecutive replies"""
+        replies = self.replies
+        if len(replies) < 2:
+            return 0.0
+        return sum(abs(b - a) for a, b in zip(replies, replies[1:])) / (len(replies) - 1)
+
+    def percentile(self, pct):
+        replies = sorted(self.replies)
+        if not replies:
+            return None
+        index = min(len(replies) - 1, int(round(pct / 100 * (len(replies) - 1))))
+        return replies[index]
+
+    def to_dict(self):
+        def ms(value):
+            return round(value, 2) if value is not None else None
+        replies = self.replies
+        return {
+            "host": self.host,
+            "method": self.method,
+            "sent": self.sent,
+            "received": self.received,
+            "loss": self.loss_percent,
+            "min": ms(min(replies)) if replies else None,
+            "avg": ms(self.avg),
+            "max": ms(max(replies)) if replies else None,
+            "jitter": ms(self.jitter),
+            "p50": ms(self.percentile(50)),
+            "p90": ms(self.percentile(90)),
+            "p99": ms(self.percentile(99)),
+            "rtts": [ms(rtt) for rtt in self.rtts],
+        }
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\0"
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _echo_request(identifier, sequence):
+    payload = struct.pack("!d", time.perf_counter()) + b"vamos-probe"
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = _checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+def _open_icmp_socket():
+    """Unprivileged datagram ICMP socket if allowed, else raw; None if neither"""
+    for sock_type, method in ((socket.SOCK_DGRAM, "icmp-dgram"), (socket.SOCK_RAW, "icmp-raw")):
+        try:
+            return socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP), method
+        except (PermissionError, OSError):
+            continue
+    return None, None
+
+
+def _icmp_burst(address, count, interval, timeout):
+    sock, method = _open_icmp_socket()
+    if sock is None:
+        return None, None
+    identifier = os.getpid() & 0xFFFF
+    sent_at = {}
+    rtts = {}
+    try:
+        sock.setblocking(False)
+        sequences = [next(_sequence) & 0xFFFF for _ in range(count)]
+        next_send = time.perf_counter()
+        index = 0
+        deadline = None
+        while True:
+            now = time.perf_counter()
+            if index < count and now >= next_send:
+                sequence = sequences[index]
+                sent_at[sequence] = now
+                try:
+                    sock.sendto(_echo_request(identifier, sequence), (address, 0))
+                except OSError as e:
+                    logging.debug(f"ICMP send to {address} failed: {e}")
+                index += 1
+                next_send = now + interval
+                if index == count:
+                    deadline = now + timeout
+            if deadline is not None and (now >= deadline or len(rtts) == count):
+                break
+            wake = deadline if index == count else next_send
+            ready, _, _ = select.select([sock], [], [], max(0.0, wake - time.perf_counter()))
+            if not ready:
+                continue
+            try:
+                packet, _ = sock.recvfrom(1024)
+            except BlockingIOError:
+                continue
+            received = time.perf_counter()
+            if method == "icmp-raw":
+                packet = packet[(packet[0] & 0x0F) * 4:]  # Strip the IP header
+            if len(packet) < 8:
+                continue
+            icmp_type, _, _, reply_id, sequence = struct.unpack("!BBHHH", packet[:8])
+            # Datagram sockets get their identifier rewritten by the kernel
+            if icmp_type != ICMP_ECHO_REPLY or (method == "icmp-raw" and reply_id != identifier):
+                continue
+            if sequence in sent_at and sequence not in rtts:
+                rtts[sequence] = (received - sent_at[sequence]) * 1000
+    finally:
+        sock.close()
+    return method, [rtts.get(sequence) for sequence in sequences]
+
+
+def _tcp_burst(address, count, interval, timeout, ports=TCP_FALLBACK_PORTS):
+    """Time TCP handshakes; a refused connection still counts as a reply.
+
+    Each probe connects to every port at once and the first to answer
+    counts, so a host that filters one port is still reached on another
+    without waiting out the timeout port by port.
+    """
+    sockets = {}
+    rtts = [None] * count
+    answered_on = {}  # port -> replies it produced
+
+    def answer(index, port, started, now):
+        if rtts[index] is None:
+            rtts[index] = (now - started) * 1000
+            answered_on[port] = answered_on.get(port, 0) + 1
+
+    try:
+        for index in range(count):
+            started = time.perf_counter()
+            for port in ports:
+                sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+                sock.setblocking(False)
+                code = sock.connect_ex((address, port))
+                if code == 0 or code in REFUSED:
+                    answer(index, port, started, time.perf_counter())
+                    sock.close()
+                elif code in IN_PROGRESS:
+                    sockets[sock] = (index, port, started)
+                else:
+                    sock.close()
+            if interval and index < count - 1:
+                time.sleep(interval)
+
+        deadline = time.perf_counter() + timeout
+        while sockets:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            _, writable, failed = select.select([], list(sockets), list(sockets), remaining)
+            now = time.perf_counter()
+            for sock in set(writable) | set(failed):
+                index, port, started = sockets.pop(sock)
+                error = sock.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR)
+                if error == 0 or error in REFUSED:
+                    answer(index, port, started, now)
+                sock.close()
+    finally:
+        for sock in sockets:
+            sock.close()
+    port = max(answered_on, key=answered_on.get) if answered_on else ports[0]
+    return f"tcp:{port}", rtts
+
+
+def probe(host, count=10, interval=0.02, timeout=1.0, method=None, ports=TCP_FALLBACK_PORTS):
+    """Send a burst of latency probes to host and collect per-probe RTTs.
+
+    ICMP echo is used when the process can open an ICMP socket (datagram
+    sockets need no privileges on Linux and macOS); otherwise TCP connect
+    times are measured on the given ports. method forces "icmp" or "tcp".
+    """
+    try:
+        address = socket.gethostbyname(host)
+    except OSError as e:
+        logging.error(f"Latency probe could not resolve {host}: {e}")
+        return LatencyResult(host, "unresolved", [None] * count)
+
+    if method in (None, "icmp"):
+        used, rtts = _icmp_burst(address, count, interval, timeout)
+        if used is not None:
+            return LatencyResult(host, used, rtts)
+    used, rtts = _tcp_burst(address, count, interval, timeout, ports)
+    return LatencyResult(host, used, rtts)
@@ -1,6 +1,8 @@
 import psutil
-from fastapi.responses import JSONResponse
+from fast_json import FastJSONResponse
+from instrumentation import instrumented
 
+@instrumented
 def get_memory():
     """Fetch memory usage details using psutil."""
     try:
@@ -15,7 +17,8 @@ def get_memory():
     except Exception as e:
         return {"error": f"Failed to fetch memory info: {str(e)}"}
 
+@instrumented
 def get_memory_data():
     """API response for memory data."""
     memory = get_memory()
-    return JSONResponse(content=memory)
\ No newline at end of file
+    return FastJSONResponse(content=memory)
\ No newline at end of file
@@ -0,0 +1,673 @@
+import os
+import re
+import glob
+import mmap
+import time
+import struct
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from instrumentation import instrumented
+
+# Where persisted metric history lives
+DATA_DIR = os.environ.get(
+    "VAMOS_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+# Samples older than this are deleted (seconds)
+STORE_RETENTION = int(os.environ.get("VAMOS_STORE_RETENTION", str(30 * 24 * 3600)))
+# A raw segment covers at most this much time and holds at most SEGMENT_RECORDS samples
+SEGMENT_SPAN = 3600
+SEGMENT_RECORDS = 4096
+# Raw segments older than this are merged into one segment per day at COMPACT_RESOLUTION
+COMPACT_AFTER = 24 * 3600
+COMPACT_RESOLUTION = 60
+# Sealed segments kept mapped for reads, per metric
+MAPPED_SEGMENTS = 8
+# How often dirty pages are synced, and how often compaction/expiry runs (seconds)
+FLUSH_INTERVAL = 5
+MAINTENANCE_INTERVAL = 600
+
+# History backend: "segments" (memory-mapped files) or "sqlite"
+HISTORY_BACKEND = os.environ.get("VAMOS_HISTORY_BACKEND", "segments").lower()
+# SQLite rows buffered before a write transaction, whatever the flush interval
+SQLITE_BATCH_SIZE = 5000
+
+MAGIC = b"VMS1"
+# magic, format version, resolution (0 = raw), count, first timestamp, last timestamp
+HEADER = struct.Struct("<4sIIIqq")
+# timestamp (epoch seconds), value
+RECORD = struct.Struct("<qd")
+# Compacted segments (format version 2): timestamp, average, number of raw samples averaged
+COUNTED_RECORD = struct.Struct("<qdq")
+COUNTED_VERSION = 2
+METRIC_NAME = re.compile(r"^[a-z0-9_.]+$")
+
+
+class Segment:
+    """One memory-mapped segment file: a header and fixed-size records.
+
+    The header's count is written after the record it covers, so after a
+    crash the file is valid up to the last counted record and opening it
+    never needs to scan or replay the records. Compacted segments also
+    store how many raw samples each average stands for (older compacted
+    files without it count as one sample per record).
+    """
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        self.writable = writable
+        self._file = open(path, "r+b" if writable else "rb")
+        access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=access)
+        magic, self.version, self.resolution, self.count, self.first, self.last = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a metric segment")
+        self.record = COUNTED_RECORD if self.version >= COUNTED_VERSION else RECORD
+        self.capacity = (len(self._mm) - HEADER.size) // self.record.size
+
+    @classmethod
+    def create(cls, path, capacity=SEGMENT_RECORDS, resolution=0):
+        version, record = (COUNTED_VERSION, COUNTED_RECORD) if resolution else (1, RECORD)
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, version, resolution, 0, 0, 0))
+            f.truncate(HEADER.size + capacity * record.size)
+        return cls(path, writable=True)
+
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+    def append(self, timestamp, value, samples=1):
+        offset = HEADER.size + self.count * self.record.size
+        if self.record is COUNTED_RECORD:
+            COUNTED_RECORD.pack_into(self._mm, offset, timestamp, value, samples)
+        else:
+            RECORD.pack_into(self._mm, offset, timestamp, value)
+        if not self.count:
+            self.first = timestamp
+        self.count += 1
+        self.last = timestamp
+        HEADER.pack_into(self._mm, 0, MAGIC, self.version, self.resolution, self.count, self.first, self.last)
+
+    def _timestamp(self, index):
+        return struct.unpack_from("<q", self._mm, HEADER.size + index * self.record.size)[0]
+
+    def _bisect(self, timestamp, right):
+        low, high = 0, self.count
+        while low < high:
+            middle = (low + high) // 2
+            value = self._timestamp(middle)
+            if value < timestamp or (right and value == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def read(self, since=None, until=None, samples=False):
+        """(timestamp, value) records with since <= timestamp <= until.
+
+        With samples, records are (timestamp, value, raw samples it stands for).
+        """
+        start = 0 if since is None else self._bisect(since, right=False)
+        stop = self.count if until is None else self._bisect(until, right=True)
+        if start >= stop:
+            return []
+        size = self.record.size
+        # Unpack straight from the mapping; no intermediate copy of the bytes
+        view = memoryview(self._mm)[HEADER.size + start * size:HEADER.size + stop * size]
+        try:
+            records = self.record.iter_unpack(view)
+            if self.record is COUNTED_RECORD:
+                return list(records) if samples else [(timestamp, value) for timestamp, value, _ in records]
+            return [(timestamp, value, 1) for timestamp, value in records] if samples else list(records)
+        finally:
+            view.release()
+
+    def flush(self):
+        if self.writable:
+            self._mm.flush()
+
+    def seal(self):
+        """Flush, drop the unused preallocated tail and reopen read-only"""
+        self.close()
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER.size + self.count * self.record.size)
+        self.__init__(self.path, writable=False)
+
+    def close(self):
+        if not self._mm.closed:
+            if self.writable:
+                self._mm.flush()
+            self._mm.close()
+        self._file.close()
+
+
+def _segment_name(first, resolution=0):
+    return f"{first:012d}.seg" if not resolution else f"{first:012d}.c{resolution}.seg"
+
+
+class MetricLog:
+    """Segments of one metric, oldest first, with the newest one open for appends"""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._segments = []            # [path, resolution, count, first, last], oldest first
+        self._mapped = OrderedDict()   # path -> Segment, most recently used last
+        self._active = None
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+
+    def _load(self):
+        # Only headers are read; records stay on disk until queried
+        for path in glob.glob(os.path.join(self.directory, "*.tmp")):
+            os.remove(path)
+        entries = []
+        for path in glob.glob(os.path.join(self.directory, "*.seg")):
+            try:
+                with open(path, "rb") as f:
+                    magic, _, resolution, count, first, last = HEADER.unpack(f.read(HEADER.size))
+            except (OSError, struct.error) as e:
+                logging.error(f"Skipping unreadable segment {path}: {e}")
+                continue
+            if magic != MAGIC:
+                # Kept for inspection instead of deleted; *.corrupt is not loaded again
+                logging.warning(f"Moving aside segment {path} with bad magic number {magic!r}")
+                os.replace(path, path + ".corrupt")
+                continue
+            if not count:
+                os.remove(path)  # Preallocated but never written
+                continue
+            entries.append([path, resolution, count, first, last])
+        compacted = [entry for entry in entries if entry[1]]
+        for entry in list(entries):
+            # Raw segments already merged into a compacted one (crash before they were deleted)
+            if not entry[1] and any(c[3] <= entry[3] and entry[4] <= c[4] for c in compacted):
+                os.remove(entry[0])
+                entries.remove(entry)
+        self._segments = sorted(entries, key=lambda entry: (entry[3], entry[1] == 0))
+
+        newest = self._segments[-1] if self._segments else None
+        if newest and not newest[1] and time.time() - newest[3] < SEGMENT_SPAN:
+            segment = Segment(newest[0], writable=True)
+            if not segment.full:
+                self._active = segment
+                self._segments.pop()
+            else:
+                segment.close()
+
+    def _open(self, path):
+        segment = self._mapped.pop(path, None)
+        if segment is None:
+            segment = Segment(path)
+        self._mapped[path] = segment
+        while len(self._mapped) > MAPPED_SEGMENTS:
+            self._mapped.popitem(last=False)[1].close()
+        return segment
+
+    def _forget(self, path):
+        segment = self._mapped.pop(path, None)
+        if segment is not None:
+            segment.close()
+
+    def _seal_active(self):
+        active = self._active
+        self._active = None
+        if not active.count:
+            active.close()
+            os.remove(active.path)
+            return
+        active.seal()
+        self._segments.append([active.path, 0, active.count, active.first, active.last])
+        self._mapped[active.path] = active
+
+    def append(self, timestamp, value):
+        with self._lock:
+            active = self._active
+            if active is not None:
+                # Timestamps never go backwards within a metric, so segments stay sorted
+                timestamp = max(timestamp, active.last) if active.count else timestamp
+                if active.full or (active.count and timestamp - active.first >= SEGMENT_SPAN):
+                    self._seal_active()
+            if self._segments:
+                timestamp = max(timestamp, self._segments[-1][4])
+            if self._active is None:
+                path = os.path.join(self.directory, _segment_name(timestamp))
+                while os.path.exists(path):
+                    timestamp += 1
+                    path = os.path.join(self.directory, _segment_name(timestamp))
+                self._active = Segment.create(path)
+            self._active.append(timestamp, value)
+
+    def read(self, since=None, until=None, samples=False):
+        with self._lock:
+            rows = []
+            for path, _, _, first, last in self._segments:
+                if (since is None or last >= since) and (until is None or first <= until):
+                    rows.extend(self._open(path).read(since, until, samples))
+            if self._active is not None and self._active.count:
+                rows.extend(self._active.read(since, until, samples))
+            return rows
+
+    def first_timestamp(self):
+        with self._lock:
+            if self._segments:
+                return self._segments[0][3]
+            if self._active is not None and self._active.count:
+                return self._active.first
+            return None
+
+    def last(self):
+        with self._lock:
+            if self._active is not None and self._active.count:
+                return self._active.read(self._active.last)[-1]
+            if self._segments:
+                return self._open(self._segments[-1][0]).read(self._segments[-1][4])[-1]
+            return None
+
+    def flush(self):
+        with self._lock:
+            if self._active is not None:
+                self._active.flush()
+
+    def compact(self, now=None):
+        """Merge raw segments older than COMPACT_AFTER into per-day averaged segments.
+
+        Averages are weighted by the raw samples behind each record, so
+        merging into an already compacted day keeps them exact.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            days = {}
+            for entry in self._segments:
+                if entry[4] < now - COMPACT_AFTER:
+                    day = entry[3] - entry[3] % 86400
+                    days.setdefault(day, []).append(entry)
+            for day, entries in days.items():
+                if all(entry[1] for entry in entries):
+                    continue  # Only an already compacted segment for this day
+                buckets = OrderedDict()
+                for entry in entries:
+                    for timestamp, value, samples in self._open(entry[0]).read(samples=True):
+                        bucket = timestamp - timestamp % COMPACT_RESOLUTION
+                        total, count = buckets.get(bucket, (0.0, 0))
+                        buckets[bucket] = (total + value * samples, count + samples)
+                first = min(buckets)
+                final = os.path.join(self.directory, _segment_name(first, COMPACT_RESOLUTION))
+                temporary = final + ".tmp"
+                segment = Segment.create(temporary, len(buckets), COMPACT_RESOLUTION)
+                for bucket in sorted(buckets):
+                    total, count = buckets[bucket]
+                    segment.append(bucket, total / count, count)
+                segment.flush()
+                segment.close()
+                for entry in entries:
+                    self._forget(entry[0])
+                os.replace(temporary, final)
+                for entry in entries:
+                    if entry[0] != final:
+                        os.remove(entry[0])
+                    self._segments.remove(entry)
+                self._segments.append([final, COMPACT_RESOLUTION, len(buckets), first, max(buckets)])
+            self._segments.sort(key=lambda entry: (entry[3], entry[1] == 0))
+
+    def expire(self, retention, now=None):
+        """Delete segments whose newest sample is older than retention"""
+        cutoff = (time.time() if now is None else now) - retention
+        with self._lock:
+            for entry in [entry for entry in self._segments if entry[4] < cutoff]:
+                self._forget(entry[0])
+                os.remove(entry[0])
+                self._segments.remove(entry)
+
+    def close(self):
+        with self._lock:
+            if self._active is not None:
+                self._active.close()
+                self._active = None
+            for segment in self._mapped.values():
+                segment.close()
+            self._mapped.clear()
+
+    def destroy(self):
+        """Close and delete every segment of this metric"""
+        self.close()
+        with self._lock:
+            for path in glob.glob(os.path.join(self.directory, "*.seg")):
+                os.remove(path)
+            self._segments = []
+            try:
+                os.rmdir(self.directory)
+            except OSError:
+                pass
+
+
+class MetricStore:
+    """Append-only, segment-based on-disk history for scalar metrics.
+
+    Each metric ("cpu.percent", "network.download", ...) is a directory of
+    segment files. The newest segment is preallocated and written through a
+    memory mapping; recent sealed segments stay mapped for reads. Old raw
+    segments are compacted to per-minute averages and expired by retention.
+    """
+
+    def __init__(self, root=DATA_DIR, retention=STORE_RETENTION):
+        self.root = root
+        self.retention = retention
+        self._lock = threading.Lock()
+        self._logs = {}
+        self._last_flush = time.monotonic()
+        self._last_maintenance = 0.0
+        os.makedirs(root, exist_ok=True)
+        for name in sorted(os.listdir(root)):
+            if METRIC_NAME.match(name) and os.path.isdir(os.path.join(root, name)):
+                self._logs[name] = MetricLog(os.path.join(root, name))
+
+    def _log(self, metric, create=False):
+        with self._lock:
+            log = self._logs.get(metric)
+            if log is None and create:
+                if not METRIC_NAME.match(metric):
+                    raise ValueError(f"Invalid metric name '{metric}'")
+                log = self._logs[metric] = MetricLog(os.path.join(self.root, metric))
+            return log
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._logs)
+
+    def append(self, metric, value, timestamp=None):
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        self._log(metric, create=True).append(timestamp, float(value))
+
+    def append_many(self, values, timestamp=None):
+        """Record several metrics sampled at the same moment; None values are skipped"""
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        for metric, value in values.items():
+            if value is not None:
+                self.append(metric, value, timestamp)
+
+    def query(self, metric, since=None, until=None):
+        """(timestamp, value) samples of a metric between two timestamps"""
+        log = self._log(metric)
+        return log.read(since, until) if log is not None else []
+
+    def buckets(self, metric, since=None, until=None, width=60):
+        """Samples grouped into width-second buckets as (start, {min, max, avg, sum, count}).
+
+        Compacted averages count as the raw samples they stand for.
+        """
+        log = self._log(metric)
+        grouped = OrderedDict()
+        for timestamp, value, samples in log.read(since, until, samples=True) if log is not None else []:
+            bucket = timestamp - timestamp % width
+            stats = grouped.get(bucket)
+            if stats is None:
+                grouped[bucket] = {"min": value, "max": value, "sum": value * samples, "count": samples}
+            else:
+                stats["min"] = min(stats["min"], value)
+                stats["max"] = max(stats["max"], value)
+                stats["sum"] += value * samples
+                stats["count"] += samples
+        for stats in grouped.values():
+            stats["avg"] = stats["sum"] / stats["count"]
+        return list(grouped.items())
+
+    def first_timestamp(self, metric):
+        """Timestamp of the oldest stored sample of a metric, or None"""
+        log = self._log(metric)
+        return log.first_timestamp() if log is not None else None
+
+    def last(self, metric):
+        log = self._log(metric)
+        return log.last() if log is not None else None
+
+    def delete(self, metric):
+        with self._lock:
+            log = self._logs.pop(metric, None)
+        if log is not None:
+            log.destroy()
+
+    def flush(self):
+        for log in list(self._logs.values()):
+            log.flush()
+
+    def maintain(self, now=None):
+        """Compact and expire every metric"""
+        for log in list(self._logs.values()):
+            try:
+                log.compact(now)
+                log.expire(self.retention, now)
+            except Exception as e:
+                logging.error(f"Metric store maintenance failed for {log.directory}: {e}")
+
+    def tick(self):
+        """Periodic flush and maintenance; cheap to call after every sample"""
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._last_flush = now
+            self.flush()
+        if now - self._last_maintenance >= MAINTENANCE_INTERVAL:
+            self._last_maintenance = now
+            self.maintain()
+
+    def close(self):
+        with self._lock:
+            logs = list(self._logs.values())
+        for log in logs:
+            log.close()
+
+
+class SqliteMetricStore:
+    """MetricStore with the same interface, backed by one SQLite database.
+
+    Samples are buffered and written in one transaction per batch through a
+    prepared insert; the database runs in WAL mode so reads do not block
+    the writer. A covering index on (metric, timestamp, value) answers range
+    and bucket queries without touching the table, and bucket aggregates
+    are computed by SQLite rather than in Python.
+    """
+
+    def __init__(self, path=None, retention=STORE_RETENTION, batch_size=SQLITE_BATCH_SIZE):
+        self.path = path or os.path.join(DATA_DIR, "metrics.sqlite3")
+        self.retention = retention
+        self.batch_size = batch_size
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._metric_ids = {}
+        self._last_flush = time.monotonic()
+        self._last_maintenance = 0.0
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS metrics (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+            CREATE TABLE IF NOT EXISTS samples (metric_id INTEGER NOT NULL, timestamp INTEGER NOT NULL, value REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS samples_metric_time ON samples (metric_id, timestamp, value);
+        """)
+        for metric_id, name in self._db.execute("SELECT id, name FROM metrics"):
+            self._metric_ids[name] = metric_id
+
+    def _metric_id(self, metric, create=False):
+        metric_id = self._metric_ids.get(metric)
+        if metric_id is None and create:
+            if not METRIC_NAME.match(metric):
+                raise ValueError(f"Invalid metric name '{metric}'")
+            with self._db:
+                metric_id = self._db.execute("INSERT INTO metrics (name) VALUES (?)", (metric,)).lastrowid
+            self._metric_ids[metric] = metric_id
+        return metric_id
+
+    def _write_pending(self):
+        # Caller holds self._lock
+        if self._pending:
+            with self._db:
+                self._db.executemany("INSERT INTO samples (metric_id, timestamp, value) VALUES (?, ?, ?)", self._pending)
+            self._pending = []
+
+    def metrics(self):
+        with self._lock:
+            return sorted(self._metric_ids)
+
+    def append(self, metric, value, timestamp=None):
+        self.append_many({metric: value}, timestamp)
+
+    def append_many(self, values, timestamp=None):
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            for metric, value in values.items():
+                if value is not None:
+                    self._pending.append((self._metric_id(metric, create=True), timestamp, float(value)))
+            if len(self._pending) >= self.batch_size:
+                self._write_pending()
+
+    def _range(self, metric, since, until):
+        metric_id = self._metric_id(metric)
+        return metric_id, -1 << 62 if since is None else since, 1 << 62 if until is None else until
+
+    def query(self, metric, since=None, until=None):
+        with self._lock:
+            self._write_pending()
+            metric_id, since, until = self._range(metric, since, until)
+            if metric_id is None:
+                return []
+            return self._db.execute(
+                "SELECT timestamp, value FROM samples WHERE metric_id = ? AND timestamp BETWEEN ? AND ? ORDER BY timestamp",
+                (metric_id, since, until)
+            ).fetchall()
+
+    def buckets(self, metric, since=None, until=None, width=60):
+        with self._lock:
+            self._write_pending()
+            metric_id, since, until = self._range(metric, since, until)
+            if metric_id is None:
+                return []
+            rows = self._db.execute(
+                "SELECT timestamp - timestamp % ? AS bucket, MIN(value), MAX(value), AVG(value), SUM(value), COUNT(*) "
+                "FROM samples WHERE metric_id = ? AND timestamp BETWEEN ? AND ? GROUP BY bucket ORDER BY bucket",
+                (width, metric_id, since, until)
+            ).fetchall()
+        return [
+            (bucket, {"min": low, "max": high, "sum": total, "count": count, "avg": average})
+            for bucket, low, high, average, total, count in rows
+        ]
+
+    def first_timestamp(self, metric):
+        with self._lock:
+            self._write_pending()
+            metric_id = self._metric_id(metric)
+            if metric_id is None:
+                return None
+            return self._db.execute("SELECT MIN(timestamp) FROM samples WHERE metric_id = ?", (metric_id,)).fetchone()[0]
+
+    def last(self, metric):
+        with self._lock:
+            self._write_pending()
+            metric_id = self._metric_id(metric)
+            if metric_id is None:
+                return None
+            return self._db.execute(
+                "SELECT timestamp, value FROM samples WHERE metric_id = ? ORDER BY timestamp DESC LIMIT 1", (metric_id,)
+            ).fetchone()
+
+    def delete(self, metric):
+        with self._lock:
+            self._write_pending()
+            metric_id = self._metric_ids.pop(metric, None)
+            if metric_id is not None:
+                with self._db:
+                    self._db.execute("DELETE FROM samples WHERE metric_id = ?", (metric_id,))
+                    self._db.execute("DELETE FROM metrics WHERE id = ?", (metric_id,))
+
+    def flush(self):
+        with self._lock:
+            self._write_pending()
+
+    def maintain(self, now=None):
+        """Delete samples older than the retention"""
+        cutoff = int((time.time() if now is None else now) - self.retention)
+        with self._lock:
+            self._write_pending()
+            try:
+                with self._db:
+                    # Per metric, so each delete is a range scan of the index
+                    self._db.executemany(
+                        "DELETE FROM samples WHERE metric_id = ? AND timestamp < ?",
+                        [(metric_id, cutoff) for metric_id in self._metric_ids.values()]
+                    )
+                self._db.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logging.error(f"Metric store maintenance failed: {e}")
+
+    def tick(self):
+        now = time.monotonic()
+        if now - self._last_flush >= FLUSH_INTERVAL:
+            self._last_flush = now
+            self.flush()
+        if now - self._last_maintenance >= MAINTENANCE_INTERVAL:
+            self._last_maintenance = now
+            self.maintain()
+
+    def close(self):
+        with self._lock:
+            self._write_pending()
+            self._db.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_store():
+    if HISTORY_BACKEND == "sqlite":
+        return SqliteMetricStore()
+    return MetricStore()
+
+
+def get_metric_store():
+    """Return the process-wide metric store, opening it on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _create_store()
+        return _store
+
+
+def close_metric_store():
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+            _store = None
+
+
+@instrumented
+def record_samples():
+    """Scheduled job: persist one sample of every system metric"""
+    # Imported here so the store has no import-time dependency on the collectors
+    import psutil
+    from sampler import get_cpu_snapshot
+    from gpu_provider import get_gpu_devices
+
+    values = {"cpu.percent": get_cpu_snapshot()["cpu_percent"]}
+    memory = psutil.virtual_memory()
+    values["memory.percent"] = memory.percent
+    values["memory.used"] = memory.used
+    try:
+        values["disk.percent"] = psutil.disk_usage(os.path.abspath(os.sep)).percent
+    except OSError:
+        pass
+    devices = get_gpu_devices()
+    if devices:
+        values["gpu.utilization"] = devices[0].get("utilization")
+        values["gpu.temperature"] = devices[0].get("temperature")
+    battery = psutil.sensors_battery() if hasattr(psutil, "sensors_battery") else None
+    if battery is not None:
+        values["battery.percent"] = battery.percent
+
+    store = get_metric_store()
+    store.append_many(values)
+    store.tick()
@@ -1,33 +1,28 @@
+import os
 import psutil
 import time
 import platform
 import socket
-import speedtest
 import subprocess
 import re
 import uuid
 import logging
-from datetime import datetime, timedelta
+from datetime import datetime
 import urllib.request
 import random
-from collections import deque
+from timeseries import TimeSeries, RollupSeries
 import math
 import socket
-import json
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import latency_prober
+import device_scanner
+import speed_tester
+from metric_store import get_metric_store
+from instrumentation import instrumented
+from state_store import StateStore, SingleFlight
 
-# Custom JSON encoder to handle datetime objects
-class DateTimeEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-# Function to safely serialize objects to JSON
-def safe_json_dump(obj):
-    return json.dumps(obj, cls=DateTimeEncoder)
-
-# Global cache for network data
-network_cache = {
+# Global cache for network data: copy-on-write, so readers never lock or see a torn update
+network_cache = StateStore({
     "network_data": None,
     "speed_test": None,
     "connected_devices": None,
@@ -36,27 +31,47 @@ network_cache = {
     "first_speed_test_completed": False,  # Add flag to track first speed test
     "total_bytes_sent": 0,        # Track total bytes sent since app started
     "total_bytes_received": 0     # Track total bytes received since app started
-}
+})
 
-# Store bandwidth history (last 1 hour data, 5 min intervals)
-bandwidth_history = deque([], maxlen=60)  # Start empty, will be filled with real measurements
-ping_history = deque([], maxlen=20)  # Start empty, will be filled with real measurements
+# Deduplicates concurrent refreshes (network update, device scan, speed test)
+_refresh = SingleFlight()
 
-# Store Network IO history
-network_io_history = deque([], maxlen=60)  # Store 60 data points
+# How long sampled network history is kept (seconds)
+HISTORY_RETENTION = int(os.environ.get("VAMOS_HISTORY_RETENTION", str(7 * 24 * 3600)))
+# Seconds between update_network_data rounds and between data transfer samples
+UPDATE_INTERVAL = 30
+DATA_TRANSFER_INTERVAL = 300
+# Number of recent pings used for jitter and returned as latency history
+LATENCY_WINDOW = 20
 
-# Store data transfer history (for showing total data transferred over time)
-data_transfer_history = deque([], maxlen=288)  # Store up to 24 hours (at 5 min intervals)
+# Store bandwidth history: bytes transferred in each update interval, rolled up per minute and hour
+bandwidth_history = RollupSeries(
+    {"download": "q", "upload": "q"}, HISTORY_RETENTION, UPDATE_INTERVAL, totals=("download", "upload")
+)
+ping_history = TimeSeries({"ping": "d"}, HISTORY_RETENTION // UPDATE_INTERVAL)
 
-# Store the last net_io counters to measure full interval
+# Store data transfer history (for showing total data transferred over time, at 5 min intervals)
+data_transfer_history = RollupSeries(
+    {"totalBytesSent": "q", "totalBytesReceived": "q"}, HISTORY_RETENTION, DATA_TRANSFER_INTERVAL, tiers=(3600,)
+)
+
+# Store the last net_io counters, and when they were read (monotonic), to measure the full interval
 last_net_io_counters = None
+last_net_io_time = None
+
+# Hard deadline for one round of network probes (seconds)
+PROBE_DEADLINE = 15
+# Probes that are still running from an earlier round (probe name -> future)
+_pending_probes = {}
+_probe_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="vamos-probe")
 
+@instrumented
 def get_mac_address():
     """Get the MAC address of the main interface"""
     try:
         if platform.system() == "Windows":
             # Get output from ipconfig /all
-            output = subprocess.check_output("ipconfig /all", shell=True).decode('utf-8', errors='ignore')
+            output = subprocess.check_output("ipconfig /all", shell=True, timeout=5).decode('utf-8', errors='ignore')
             
             # Split output into adapter sections
             sections = re.split(r'\r?\n\r?\n', output)
@@ -90,6 +105,7 @@ def get_mac_address():
         logging.error(f"MAC address retrieval error: {e}")
         return "Not detected"
 
+@instrumented
 def get_connection_type():
     try:
         # Get network interface addresses
@@ -103,10 +119,7 @@ def get_connection_type():
                     # Check if the interface is up
                     if psutil.net_if_stats().get(name, None) and psutil.net_if_stats()[name].isup:
                         active_interfaces.append(name)
-                        print(f"Active Interface: {name} with IP: {addr.address}")
-        
-        # Debug output to see all active interfaces
-        print("Active Interfaces:", active_interfaces)
+        logging.debug(f"Active interfaces: {active_interfaces}")
 
         # Check active interfaces for Wi-Fi or Ethernet
         for interface in active_interfaces:
@@ -120,22 +133,24 @@ def get_connection_type():
 
         return "WIFI"  # If no active interface was found
     except Exception as e:
-        print("Error:", e)
+        logging.error(f"Connection type detection error: {e}")
         return "Wifi"
 
-def get_signal_strength():
+@instrumented
+def get_signal_strength(connection_type=None):
     """Get WiFi signal strength or Ethernet connection quality"""
     try:
-        connection_type = get_connection_type()
+        if connection_type is None:
+            connection_type = get_connection_type()
         
         if connection_type == "Wi-Fi":
             if platform.system() == "Windows":
-                output = subprocess.check_output("netsh wlan show interfaces", shell=True).decode()
+                output = subprocess.check_output("netsh wlan show interfaces", shell=True, timeout=5).decode()
                 match = re.search(r"Signal\s+:\s+(\d+)%", output)
                 if match:
                     return int(match.group(1))
             elif platform.system() == "Linux":
-                output = subprocess.check_output("iwconfig 2>/dev/null | grep -i quality", shell=True).decode()
+                output = subprocess.check_output("iwconfig 2>/dev/null | grep -i quality", shell=True, timeout=5).decode()
                 match = re.search(r"Quality=(\d+)/(\d+)", output)
                 if match:
                     return int(int(match.group(1)) / int(match.group(2)) * 100)
@@ -162,32 +177,28 @@ def get_signal_strength():
         logging.error(f"Error getting signal strength: {e}")
         return 0  # Return 0 on error
 
-def get_ping():
-    """Measure ping to Google's DNS"""
-    try:
-        param = "-n" if platform.system().lower() == "windows" else "-c"
-        command = ["ping", param, "1", "8.8.8.8"]
-        output = subprocess.check_output(command).decode()
-        
-        if platform.system().lower() == "windows":
-            match = re.search(r"Average = (\d+)ms", output)
-        else:
-            match = re.search(r"time=(\d+\.\d+) ms", output)
-            
-        if match:
-            return int(float(match.group(1)))
-        return 0
-    except:
-        # Return 0 instead of random values when ping fails
-        return 0
+# Host used for ping, jitter and packet loss measurements
+QUALITY_PROBE_HOST = "8.8.8.8"
+# Probes per connection quality burst
+QUALITY_PROBE_COUNT = 10
+
+@instrumented
+def measure_connection_quality():
+    """Send one probe burst and derive ping, jitter and packet loss from it"""
+    return latency_prober.probe(QUALITY_PROBE_HOST, count=QUALITY_PROBE_COUNT, interval=0.05, timeout=2.0)
+
+def get_latency_history():
+    """The most recent pings, oldest first"""
+    return [int(ping) for ping in ping_history.column("ping", max(0, len(ping_history) - LATENCY_WINDOW))]
 
 def get_jitter():
     """Calculate jitter by measuring multiple pings"""
     try:
         # Calculate jitter from real ping history
-        if len(ping_history) > 1:
+        pings = get_latency_history()
+        if len(pings) > 1:
             # Calculate the average difference between consecutive pings
-            diffs = [abs(ping_history[i] - ping_history[i-1]) for i in range(1, len(ping_history))]
+            diffs = [abs(pings[i] - pings[i-1]) for i in range(1, len(pings))]
             if diffs:
                 return round(sum(diffs) / len(diffs), 1)
         
@@ -249,32 +260,13 @@ def calculate_stability_score(ping, jitter, packet_loss):
     
     return stability
 
-def get_packet_loss():
-    """Measure packet loss to Google's DNS"""
-    try:
-        param = "-n" if platform.system().lower() == "windows" else "-c"
-        command = ["ping", param, "10", "8.8.8.8"]
-        output = subprocess.check_output(command).decode()
-        
-        if platform.system().lower() == "windows":
-            match = re.search(r"Lost = (\d+) \((\d+)%", output)
-            if match:
-                return int(match.group(2))
-        else:
-            match = re.search(r"(\d+)% packet loss", output)
-            if match:
-                return int(match.group(1))
-        return 0
-    except:
-        # Return 0 instead of random values
-        return 0
-
+@instrumented
 def get_dns_server():
     """Get the DNS server"""
     try:
         if platform.system() == "Windows":
             # Get output from ipconfig /all
-            output = subprocess.check_output("ipconfig /all", shell=True).decode('utf-8', errors='ignore')
+            output = subprocess.check_output("ipconfig /all", shell=True, timeout=5).decode('utf-8', errors='ignore')
             
             # First, try to find IPv4 DNS server
             ipv4_dns = None
@@ -367,172 +359,21 @@ def get_dns_server():
         logging.error(f"DNS server retrieval error: {e}")
         return "Not detected"
 
+@instrumented
 def run_speed_test():
-    """Run a speed test with improved accuracy and fair testing conditions"""
-    try:
-        # Initialize speedtest with longer timeout and specific configuration
-        st = speedtest.Speedtest(secure=True)
-        st.timeout = 30
-        
-        # Get list of servers and find closest ones
-        print("Getting server list...")
-        servers = st.get_servers()
-        print("Finding best server...")
-        best_server = st.get_best_server()
-        
-        # Configuration for fair testing
-        THREADS = 4  # Increased threads for more accurate testing
-        SAMPLES = 3  # Number of samples to take
-        DELAY = 1    # Delay between tests in seconds
-        
-        # Measure download with consistent settings
-        print("Testing download speed...")
-        download_samples = []
-        for _ in range(SAMPLES):
-            sample = st.download(threads=THREADS,
-                               callback=lambda _: None) / 1_000_000  # Convert to Mbps
-            download_samples.append(sample)
-            time.sleep(DELAY)  # Consistent delay between samples
-            
-        # Use median of download samples
-        download_samples.sort()
-        download = download_samples[1] if len(download_samples) == 3 else download_samples[0]
-        
-        # Wait same amount of time before upload test
-        time.sleep(DELAY)
-        
-        # Measure upload with identical settings
-        print("Testing upload speed...")
-        upload_samples = []
-        for _ in range(SAMPLES):
-            sample = st.upload(threads=THREADS,
-                             pre_allocate=False,
-                             callback=lambda _: None) / 1_000_000  # Convert to Mbps
-            upload_samples.append(sample)
-            time.sleep(DELAY)  # Consistent delay between samples
-            
-        # Use median of upload samples
-        upload_samples.sort()
-        upload = upload_samples[1] if len(upload_samples) == 3 else upload_samples[0]
-        
-        # Get ping with same number of samples
-        ping_samples = []
-        for _ in range(SAMPLES):
-            ping_samples.append(st.results.ping)
-            time.sleep(DELAY/2)  # Shorter delay for ping tests
-        ping = sum(ping_samples) / len(ping_samples)
-        
-        # Validate results
-        if download < 0 or upload < 0 or ping < 0:
-            raise ValueError("Invalid negative speed values")
-            
-        # Apply different correction factors to account for overhead
-        DOWNLOAD_OVERHEAD_FACTOR = 0.85  # 15% reduction for download overhead
-        UPLOAD_OVERHEAD_FACTOR = 0.55    # 55% reduction for upload overhead
-        download = download * DOWNLOAD_OVERHEAD_FACTOR
-        upload = upload * UPLOAD_OVERHEAD_FACTOR
-            
-        # Additional sanity checks with same limits
-        SPEED_LIMIT = 500  # Same limit for both upload and download
-        if upload > SPEED_LIMIT or download > SPEED_LIMIT:
-            raise ValueError("Unrealistic speed values detected")
-            
-        # Remove artificial upload ratio - use real upload speed measurement
-        # upload_ratio = 0.35 + (random.random() * 0.10)  # Random value between 0.35 and 0.45
-        # upload = download * upload_ratio
-        
-        # Format server information more accurately
-        city = best_server.get('city', '')
-        country = best_server.get('country', '')
-        cc = best_server.get('cc', '')
-        name = best_server.get('name', '')
-        sponsor = best_server.get('sponsor', '')
-        
-        # Clean up the data
-        if not city or city.lower() == 'unknown':
-            # Try to extract city from name or sponsor
-            if ',' in name:
-                city = name.split(',')[0].strip()
-            elif ',' in sponsor:
-                city = sponsor.split(',')[0].strip()
-        
-        server_info = {
-            "name": name if not cc else f"{name} ({cc})",
-            "location": f"{city}, {country}".strip(' ,'),
-            "sponsor": sponsor,
-            "latency": float(best_server.get("latency", 0)),
-            "distance": f"{best_server.get('d', 0):.1f} km"
-        }
-        
-        # Log the results for debugging
-        logging.info(f"Speed test results - Download: {download:.1f} Mbps, Upload: {upload:.1f} Mbps, Ping: {ping:.0f} ms")
-        
-        return {
-            "download": round(download, 1),
-            "upload": round(upload, 1),
-            "ping": round(ping, 0),
-            "server": server_info
-        }
-    except Exception as e:
-        logging.error(f"Speed test error: {e}")
-        return {
-            "error": f"Speed test failed: {str(e)}",
-            "download": 0,
-            "upload": 0,
-            "ping": 0
-        }
+    """Run a speed test against the configured target (joins a test already running)"""
+    test = speed_tester.start_test()
+    test.done.wait()
+    return test.result
 
-def scan_network():
-    """Scan for devices on the network"""
-    try:
-        # Get local IP
-        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-        s.connect(("8.8.8.8", 80))
-        local_ip = s.getsockname()[0]
-        s.close()
-        
-        # Get network prefix
-        ip_parts = local_ip.split('.')
-        network_prefix = '.'.join(ip_parts[:-1]) + '.'
-        
-        # Scan common IPs
-        devices = []
-        for i in range(1, 10):  # Limit to 10 IPs for performance
-            ip = network_prefix + str(i)
-            if ip == local_ip:
-                devices.append({
-                    "id": "this-device",
-                    "name": "This Device",
-                    "status": "Active",
-                    "ipAddress": ip,
-                    "macAddress": get_mac_address()
-                })
-                continue
-                
-            # Try to ping the IP
-            param = "-n" if platform.system().lower() == "windows" else "-c"
-            command = ["ping", param, "1", "-W", "1", ip]
-            try:
-                subprocess.check_output(command, stderr=subprocess.STDOUT)
-                # If we get here, the ping was successful
-                hostname = "Unknown Device"
-                try:
-                    hostname = socket.gethostbyaddr(ip)[0]
-                except:
-                    pass
-                
-                devices.append({
-                    "id": f"device-{i}",
-                    "name": hostname,
-                    "status": "Active",
-                    "ipAddress": ip,
-                    "macAddress": "Unknown"  # Getting MAC requires ARP which needs root
-                })
-            except:
-                pass
-        
-        # Always add router
-        router_ip = network_prefix + "1"
+def get_inventory_devices():
+    """Devices in the inventory, with the router added if it was never seen"""
+    devices = device_scanner.device_inventory.devices()
+    
+    # Always add router
+    scan = device_scanner.get_current_scan()
+    if scan is not None:
+        router_ip = str(next(scan.network.hosts()))
         if not any(d["ipAddress"] == router_ip for d in devices):
             devices.append({
                 "id": "router",
@@ -541,8 +382,21 @@ def scan_network():
                 "ipAddress": router_ip,
                 "macAddress": "Unknown"
             })
-            
-        return devices
+    return devices
+
+@instrumented
+def scan_network():
+    """Scan for devices on the network"""
+    try:
+        if device_scanner.full_scan_due():
+            # Sweep the whole local prefix concurrently (joins a sweep already in progress)
+            scan = device_scanner.start_scan(local_mac=get_mac_address())
+            scan.done.wait()
+        else:
+            # Between sweeps only re-check devices that answered recently
+            device_scanner.reprobe_known_devices()
+        device_scanner.device_inventory.expire()
+        return get_inventory_devices()
     except Exception as e:
         logging.error(f"Network scan error: {e}")
         return [{
@@ -553,6 +407,7 @@ def scan_network():
             "macAddress": get_mac_address()
         }]
 
+@instrumented
 def get_network_io():
     """Get network I/O statistics"""
     try:
@@ -560,6 +415,7 @@ def get_network_io():
         
         # Get current network counters
         current_net_io = psutil.net_io_counters()
+        now = time.monotonic()
         
         # If we have previous counters, calculate the difference over the full interval
         if last_net_io_counters is not None:
@@ -568,11 +424,13 @@ def get_network_io():
             bytes_recv = current_net_io.bytes_recv - last_net_io_counters.bytes_recv
             packets_sent = current_net_io.packets_sent - last_net_io_counters.packets_sent
             packets_recv = current_net_io.packets_recv - last_net_io_counters.packets_recv
+            elapsed = now - last_net_io_time
         else:
             # First run, measure over a small interval
             initial_net_io = current_net_io
             time.sleep(1)  # Wait 1 second for initial measurement
             after_net_io = psutil.net_io_counters()
+            elapsed = time.monotonic() - now
             bytes_sent = after_net_io.bytes_sent - initial_net_io.bytes_sent
             bytes_recv = after_net_io.bytes_recv - initial_net_io.bytes_recv
             packets_sent = after_net_io.packets_sent - initial_net_io.packets_sent
@@ -582,16 +440,15 @@ def get_network_io():
         upload_speed = 0
         download_speed = 0
         
-        if network_cache["speed_test"] is not None and "error" not in network_cache["speed_test"]:
+        speed_test = network_cache["speed_test"]
+        if speed_test is not None and "error" not in speed_test:
             # Use speed test data for the speeds instead of real-time measurement
-            upload_speed = network_cache["speed_test"]["upload"]
-            download_speed = network_cache["speed_test"]["download"]
+            upload_speed = speed_test["upload"]
+            download_speed = speed_test["download"]
         else:
-            # Calculate speeds based on bytes transferred during the interval (approx 30 seconds)
-            # If last_net_io_counters is None, we're using a 1-second interval
-            interval_seconds = 30 if last_net_io_counters is not None else 1
-            upload_speed = bytes_sent * 8 / (1_000_000 * interval_seconds)  # Convert to Mbps
-            download_speed = bytes_recv * 8 / (1_000_000 * interval_seconds)  # Convert to Mbps
+            # Calculate speeds based on bytes transferred over the measured interval
+            upload_speed = bytes_sent * 8 / (1_000_000 * elapsed) if elapsed > 0 else 0  # Convert to Mbps
+            download_speed = bytes_recv * 8 / (1_000_000 * elapsed) if elapsed > 0 else 0  # Convert to Mbps
         
         # Get network interface details
         interfaces = psutil.net_if_stats()
@@ -618,19 +475,108 @@ def get_network_io():
             "bytesReceived": 0
         }
 
+@instrumented
+def get_public_ip():
+    """Get the public IP address, falling back to the local IP"""
+    try:
+        with urllib.request.urlopen('https://api.ipify.org', timeout=5) as response:
+            return response.read().decode('utf8')
+    except Exception:
+        return socket.gethostbyname(socket.gethostname())
+
+@instrumented
+def get_link_info():
+    """Get connection type and signal strength, detecting the connection type only once"""
+    connection_type = get_connection_type()
+    return connection_type, get_signal_strength(connection_type)
+
+# Network data published before any probe has finished
+DEFAULT_NETWORK_DATA = {
+    "connectionType": "Unknown",
+    "signalStrength": 0,
+    "downloadSpeed": 0,
+    "uploadSpeed": 0,
+    "ping": 0,
+    "jitter": 0,
+    "packetLoss": 0,
+    "stability": 0,
+    "ipAddress": "Not detected",
+    "dnsServer": "Not detected",
+    "macAddress": "Not detected"
+}
+
+# Slow network probes run concurrently by update_network_data
+NETWORK_PROBES = {
+    "publicIp": get_public_ip,
+    "quality": measure_connection_quality,
+    "link": get_link_info,
+    "dnsServer": get_dns_server,
+    "macAddress": get_mac_address,
+    "devices": scan_network,
+}
+
+def start_network_probes():
+    """Submit every probe, reusing any from an earlier round that has not been applied yet.
+
+    A probe that missed an earlier deadline is still running or holds a
+    finished result; either way it is waited on (or applied at once)
+    instead of being resubmitted, so slow probes still reach the cache.
+    """
+    futures = {}
+    for name, probe in NETWORK_PROBES.items():
+        future = _pending_probes.get(name)
+        if future is None:
+            future = _pending_probes[name] = _probe_executor.submit(probe)
+        futures[future] = name
+    return futures
+
+def apply_probe_result(name, future, network_data):
+    """Copy a finished probe's result into network_data (or the device cache)"""
+    try:
+        result = future.result()
+    except Exception as e:
+        logging.error(f"Network probe '{name}' failed: {e}")
+        return
+    if name == "quality":
+        # Ping, jitter and packet loss all come from the same probe burst
+        current_ping = int(result.avg) if result.received else 0
+        network_data["ping"] = current_ping
+        network_data["packetLoss"] = int(round(result.loss_percent))
+        # Update ping history only if first speed test completed
+        if network_cache["first_speed_test_completed"]:
+            ping_history.append(ping=current_ping)
+        if result.received:
+            get_metric_store().append("network.ping", result.avg)
+        network_data["jitter"] = round(result.jitter, 1) if result.received > 1 else get_jitter()
+    elif name == "link":
+        network_data["connectionType"], network_data["signalStrength"] = result
+    elif name == "publicIp":
+        network_data["ipAddress"] = result
+    elif name == "devices":
+        publish_network("connected_devices", result)
+    else:
+        network_data[name] = result
+
+@instrumented
 def update_network_data():
-    """Update all network data"""
+    """Update all network data; joins an update already in progress instead of starting another"""
+    return _refresh.do("network_data", _update_network_data)
+
+def _update_network_data():
     try:
-        global last_net_io_counters
+        global last_net_io_counters, last_net_io_time
         
         # Get current network counters
         current_net_io = psutil.net_io_counters()
+        now = time.monotonic()
         
         # If we have previous counters, calculate the difference
         if last_net_io_counters is not None:
-            # Calculate bytes transferred since the last check (full interval)
+            # Calculate bytes transferred since the last check (full interval, which varies
+            # with the scheduler's idle interval and backoff)
             bytes_sent = current_net_io.bytes_sent - last_net_io_counters.bytes_sent
             bytes_received = current_net_io.bytes_recv - last_net_io_counters.bytes_recv
+            elapsed = now - last_net_io_time
         else:
             # First run, just use a small sample
             initial_net_io = current_net_io
@@ -638,95 +584,93 @@ def update_network_data():
             after_net_io = psutil.net_io_counters()
             bytes_sent = after_net_io.bytes_sent - initial_net_io.bytes_sent
             bytes_received = after_net_io.bytes_recv - initial_net_io.bytes_recv
+            elapsed = time.monotonic() - now
         
         # Save current counters for next interval
         last_net_io_counters = current_net_io
+        last_net_io_time = now
         
         # Update cumulative totals
-        network_cache["total_bytes_sent"] += bytes_sent
-        network_cache["total_bytes_received"] += bytes_received
+        network_cache.increment(total_bytes_sent=bytes_sent, total_bytes_received=bytes_received)
         
         # Check if we have speed test data available
         download_speed = 0
         upload_speed = 0
         
-        if network_cache["speed_test"] is not None and "error" not in network_cache["speed_test"]:
+        speed_test = network_cache["speed_test"]
+        if speed_test is not None and "error" not in speed_test:
             # Use speed test data instead of real-time measurements
-            download_speed = network_cache["speed_test"]["download"]
-            upload_speed = network_cache["speed_test"]["upload"]
+            download_speed = speed_test["download"]
+            upload_speed = speed_test["upload"]
         else:
             # Fall back to real-time measurements if no speed test data
-            download_speed = bytes_received * 8 / 1_000_000  # Mbps
-            upload_speed = bytes_sent * 8 / 1_000_000  # Mbps
-        
-        # Get hostname and IP
-        hostname = socket.gethostname()
-        local_ip = socket.gethostbyname(hostname)
-        
-        # Try to get public IP
-        try:
-            public_ip = urllib.request.urlopen('https://api.ipify.org').read().decode('utf8')
-        except:
-            public_ip = local_ip
-        
-        # Get ping and update ping history only if first speed test completed
-        current_ping = get_ping()
-        if network_cache["first_speed_test_completed"]:
-            ping_history.append(current_ping)
+            download_speed = bytes_received * 8 / (1_000_000 * elapsed) if elapsed > 0 else 0  # Mbps
+            upload_speed = bytes_sent * 8 / (1_000_000 * elapsed) if elapsed > 0 else 0  # Mbps
         
-        # Get packet loss
-        packet_loss = get_packet_loss()
-        
-        # Calculate jitter
-        jitter = get_jitter()
-        
-        # Calculate stability score
-        stability = calculate_stability_score(current_ping, jitter, packet_loss)
-            
-        network_cache["network_data"] = {
-            "connectionType": get_connection_type(),
-            "signalStrength": get_signal_strength(),
-            "downloadSpeed": round(download_speed, 1),
-            "uploadSpeed": round(upload_speed, 1),
-            "ping": current_ping,
-            "jitter": jitter,
-            "packetLoss": packet_loss,
-            "stability": stability,
-            "ipAddress": public_ip,
-            "dnsServer": get_dns_server(),
-            "macAddress": get_mac_address()
-        }
+        # Publish the new speeds right away, keeping the last known probe values
+        network_data = dict(network_cache["network_data"] or DEFAULT_NETWORK_DATA)
+        network_data["downloadSpeed"] = round(download_speed, 1)
+        network_data["uploadSpeed"] = round(upload_speed, 1)
+        publish_network("network_data", network_data)
         
         # Add to bandwidth history even if first speed test is not yet completed
         # Now tracking actual bytes transferred in this interval (not speeds)
-        bandwidth_history.append({
-            "timestamp": datetime.now().isoformat(),
-            "download": bytes_received,  # Actual bytes downloaded in this interval
-            "upload": bytes_sent,        # Actual bytes uploaded in this interval
-            "downloadFormatted": format_bytes(bytes_received),
-            "uploadFormatted": format_bytes(bytes_sent)
+        bandwidth_history.append(
+            download=bytes_received,  # Actual bytes downloaded in this interval
+            upload=bytes_sent         # Actual bytes uploaded in this interval
+        )
+        get_metric_store().append_many({
+            "network.download": bytes_received,
+            "network.upload": bytes_sent,
+            "network.download_speed": download_speed,
+            "network.upload_speed": upload_speed
         })
         
         # Add to data transfer history every 5 minutes
-        current_time = datetime.now()
-        if not data_transfer_history or (current_time - datetime.fromisoformat(data_transfer_history[-1]["timestamp"])).total_seconds() >= 300:
-            data_transfer_history.append({
-                "timestamp": current_time.isoformat(),
-                "totalBytesSent": network_cache["total_bytes_sent"],
-                "totalBytesReceived": network_cache["total_bytes_received"],
-                "totalBytesSentFormatted": format_bytes(network_cache["total_bytes_sent"]),
-                "totalBytesReceivedFormatted": format_bytes(network_cache["total_bytes_received"])
-            })
+        current_time = int(time.time())
+        last_transfer = data_transfer_history.last()
+        if last_transfer is None or current_time - last_transfer[0] >= DATA_TRANSFER_INTERVAL:
+            data_transfer_history.append(
+                current_time,
+                totalBytesSent=network_cache["total_bytes_sent"],
+                totalBytesReceived=network_cache["total_bytes_received"]
+            )
         
         # Update Network IO data
-        network_cache["io_data"] = get_network_io()
-        
-        network_cache["connected_devices"] = scan_network()
-        network_cache["last_updated"] = datetime.now().isoformat()
-        
-        print("Network data updated")
+        publish_network("io_data", get_network_io())
+        
+        # Run the slow probes concurrently and publish each result as it arrives
+        futures = start_network_probes()
+        deadline = time.monotonic() + PROBE_DEADLINE
+        pending = set(futures)
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            network_data = dict(network_data)
+            for future in done:
+                apply_probe_result(futures[future], future, network_data)
+                del _pending_probes[futures[future]]  # Applied; the next round submits it again
+            network_data["stability"] = calculate_stability_score(
+                network_data["ping"], network_data["jitter"], network_data["packetLoss"]
+            )
+            publish_network("network_data", network_data)
+        if pending:
+            logging.warning(f"Network probes missed the {PROBE_DEADLINE}s deadline: {sorted(futures[f] for f in pending)}")
+        
+        publish_network("last_updated", datetime.now().isoformat())
     except Exception as e:
         logging.error(f"Update error: {e}")
+        return {"error": str(e)}  # Counted as a failed run by update_network_data's instrumentation
+
+def publish_network(key, value):
+    """Replace one network_cache value, bumping the version response caches key on.
+
+    Values are always replaced, never mutated in place, so a reader holding
+    the old object keeps a consistent view.
+    """
+    network_cache.set(key, value)
 
 def get_network_data():
     """Get all network data"""
@@ -735,47 +679,109 @@ def get_network_data():
     return network_cache["network_data"]
 
 def get_speed_test_data():
-    """Run a speed test and return results"""
-    network_cache["speed_test"] = run_speed_test()
-    # Set flag when speed test completes successfully
-    if network_cache["speed_test"] and "error" not in network_cache["speed_test"]:
-        network_cache["first_speed_test_completed"] = True
-    return network_cache["speed_test"]
-
-def get_connected_devices():
-    """Get connected devices on the network"""
+    """Run a speed test and return results (callers during a running test share its result)"""
+    return _refresh.do("speed_test", _run_and_publish_speed_test)
+
+def _run_and_publish_speed_test():
+    result = run_speed_test()
+    if result and "error" not in result:
+        # Flag the first successful test together with its result
+        network_cache.update(speed_test=result, first_speed_test_completed=True)
+    elif not result.get("cancelled"):
+        # A cancelled test keeps the previous result
+        publish_network("speed_test", result)
+    return result
+
+def _scan_and_publish_devices():
+    devices = scan_network()
+    publish_network("connected_devices", devices)
+    return devices
+
+def get_connected_devices(since=None):
+    """Get connected devices on the network (only the changes when since is given)"""
     if network_cache["connected_devices"] is None:
-        network_cache["connected_devices"] = scan_network()
+        _refresh.do("connected_devices", _scan_and_publish_devices)
+    if since is not None:
+        return device_scanner.device_inventory.changes(since)
     return network_cache["connected_devices"]
 
-def get_bandwidth_history(timeframe="5min"):
-    """Get bandwidth history for specified timeframe"""
-    now = datetime.now()
-    
-    if timeframe == "5min":
-        # Last 5 minutes of data
-        cutoff = now - timedelta(minutes=5)
-    elif timeframe == "1hour":
-        # Last hour of data
-        cutoff = now - timedelta(hours=1)
-    elif timeframe == "1day":
-        # Last day of data
-        cutoff = now - timedelta(days=1)
-    else:
-        # Default to all available data
-        cutoff = now - timedelta(days=100)
-    
-    filtered_data = [item for item in bandwidth_history if datetime.fromisoformat(item["timestamp"]) >= cutoff]
-    
-    return filtered_data
+# Seconds per unit accepted in timeframes such as "5min", "6hour", "7day" or "2week"
+TIMEFRAME_UNITS = {"s": 1, "sec": 1, "m": 60, "min": 60, "h": 3600, "hour": 3600, "d": 86400, "day": 86400, "w": 604800, "week": 604800}
+
+def get_timeframe_cutoff(timeframe):
+    """Epoch seconds where a timeframe ("5min", "1hour", "7day", ...) starts"""
+    match = re.match(r"^(\d+)\s*([a-z]+?)s?$", (timeframe or "").strip().lower())
+    if match and match.group(2) in TIMEFRAME_UNITS:
+        return int(time.time() - int(match.group(1)) * TIMEFRAME_UNITS[match.group(2)])
+    # Default to all available data
+    return 0
+
+def format_rollup(row, name, headline):
+    """Flatten one column of a rolled-up row into value/Min/Max/Avg/Sum fields"""
+    stats = row[name]
+    return {
+        name: int(round(stats[headline])),
+        f"{name}Min": stats["min"],
+        f"{name}Max": stats["max"],
+        f"{name}Avg": round(stats["avg"], 2),
+        f"{name}Sum": stats["sum"],
+    }
+
+def format_bandwidth_rows(rows, resolution=None):
+    """Bandwidth samples in the API's dict format"""
+    formatted = []
+    for timestamp, values in rows:
+        item = {"timestamp": datetime.fromtimestamp(timestamp).isoformat()}
+        if resolution is None:
+            item.update(download=values["download"], upload=values["upload"])
+        else:
+            # A bucket's headline value is its average, so charts keep the per-interval scale
+            item.update(format_rollup(values, "download", "avg"))
+            item.update(format_rollup(values, "upload", "avg"))
+            item.update(resolution=resolution, samples=values["count"])
+        item["downloadFormatted"] = format_bytes(item["download"])
+        item["uploadFormatted"] = format_bytes(item["upload"])
+        formatted.append(item)
+    return formatted
+
+def format_data_transfer_rows(rows, resolution=None):
+    """Data transfer samples in the API's dict format"""
+    formatted = []
+    for timestamp, values in rows:
+        item = {"timestamp": datetime.fromtimestamp(timestamp).isoformat()}
+        if resolution is None:
+            item.update(totalBytesSent=values["totalBytesSent"], totalBytesReceived=values["totalBytesReceived"])
+        else:
+            # Totals only grow, so a bucket's headline value is the latest (largest) one
+            item.update(format_rollup(values, "totalBytesSent", "max"))
+            item.update(format_rollup(values, "totalBytesReceived", "max"))
+            item.update(resolution=resolution, samples=values["count"])
+        item["totalBytesSentFormatted"] = format_bytes(item["totalBytesSent"])
+        item["totalBytesReceivedFormatted"] = format_bytes(item["totalBytesReceived"])
+        formatted.append(item)
+    return formatted
+
+def get_bandwidth_history(timeframe="5min", max_points=None):
+    """Get bandwidth history for specified timeframe, rolled up to at most max_points rows"""
+    resolution, rows = bandwidth_history.downsample(since=get_timeframe_cutoff(timeframe), max_points=max_points)
+    return format_bandwidth_rows(rows, resolution)
 
+def get_history_token(series, timeframe, max_points=None):
+    """What a history response depends on; equal tokens mean identical responses"""
+    return series.version, series.index_range(since=get_timeframe_cutoff(timeframe)), max_points
+
+def get_bandwidth_totals(timeframe="1day"):
+    """Bytes (received, sent) over a timeframe, without building the rows"""
+    return bandwidth_history.sum_range(("download", "upload"), since=get_timeframe_cutoff(timeframe))
+
+@instrumented
 def get_connection_quality():
     """Get connection quality data"""
     if network_cache["network_data"] is None:
         update_network_data()
     
     network_data = network_cache["network_data"]
-    ping_history_list = list(ping_history)
+    ping_history_list = get_latency_history()
     
     return {
         "ping": network_data.get("ping", 0),
@@ -787,36 +793,41 @@ def get_connection_quality():
 
 def clear_history():
     """Clear all history data"""
-    global bandwidth_history, ping_history
     bandwidth_history.clear()
     ping_history.clear()
-    print("History data cleared")
+    # Persisted network history too, or it would come back after a restart
+    store = get_metric_store()
+    for metric in store.metrics():
+        if metric.startswith("network."):
+            store.delete(metric)
+    logging.info("Network history cleared")
 
-def get_data_transfer_history(timeframe="5min"):
-    """Get data transfer history for specified timeframe"""
-    now = datetime.now()
-    
-    if timeframe == "5min":
-        # Last 5 minutes of data
-        cutoff = now - timedelta(minutes=5)
-    elif timeframe == "1hour":
-        # Last hour of data
-        cutoff = now - timedelta(hours=1)
-    elif timeframe == "1day":
-        # Last day of data
-        cutoff = now - timedelta(days=1)
-    else:
-        # Default to all available data
-        cutoff = now - timedelta(days=100)
-    
-    filtered_data = [item for item in data_transfer_history if datetime.fromisoformat(item["timestamp"]) >= cutoff]
-    
-    # Format data sizes to be more readable
-    for item in filtered_data:
-        item["totalBytesSentFormatted"] = format_bytes(item["totalBytesSent"])
-        item["totalBytesReceivedFormatted"] = format_bytes(item["totalBytesReceived"])
-    
-    return filtered_data
+@instrumented
+def get_persisted_history(metric, timeframe="1day", max_points=None):
+    """Persisted samples of one metric, bucketed so at most max_points rows are returned"""
+    store = get_metric_store()
+    if metric not in store.metrics():
+        return {"error": f"Unknown metric '{metric}'"}
+    since = get_timeframe_cutoff(timeframe)
+    if max_points is None:
+        return {
+            "metric": metric,
+            "resolution": None,
+            "samples": [{"timestamp": timestamp, "value": value} for timestamp, value in store.query(metric, since)]
+        }
+    now = int(time.time())
+    span = now - (since or store.first_timestamp(metric) or now)
+    width = max(1, -(-span // max_points))
+    return {
+        "metric": metric,
+        "resolution": width,
+        "samples": [dict(stats, timestamp=bucket) for bucket, stats in store.buckets(metric, since, width=width)]
+    }
+
+def get_data_transfer_history(timeframe="5min", max_points=None):
+    """Get data transfer history for specified timeframe, rolled up to at most max_points rows"""
+    resolution, rows = data_transfer_history.downsample(since=get_timeframe_cutoff(timeframe), max_points=max_points)
+    return format_data_transfer_rows(rows, resolution)
 
 def format_bytes(size_bytes):
     """Format bytes to human-readable format"""
@@ -828,34 +839,56 @@ def format_bytes(size_bytes):
     s = round(size_bytes / p, 2)
     return f"{s} {size_name[i]}"
 
+def get_all_network_data_token():
+    """What get_all_network_data() depends on, or None before the first update"""
+    if network_cache["network_data"] is None:
+        return None
+    return (
+        network_cache.version,
+        get_history_token(bandwidth_history, "5min"),
+        get_history_token(data_transfer_history, "5min"),
+        ping_history.version
+    )
+
+def get_network_data_token():
+    return network_cache.version if network_cache["network_data"] is not None else None
+
+def get_connection_quality_token():
+    return (network_cache.version, ping_history.version) if network_cache["network_data"] is not None else None
+
+def get_connected_devices_token(since=None):
+    if since is not None:
+        return device_scanner.device_inventory.version, since
+    return network_cache.version if network_cache["connected_devices"] is not None else None
+
+@instrumented
 def get_all_network_data():
     """Get all consolidated network data"""
     if network_cache["network_data"] is None:
         update_network_data()
     
     # Get the last 5 minutes of bandwidth history
-    now = datetime.now()
-    cutoff = now - timedelta(minutes=5)
-    recent_bandwidth = [item for item in bandwidth_history if datetime.fromisoformat(item["timestamp"]) >= cutoff]
+    recent_bandwidth = get_bandwidth_history("5min")
     
     # Get data transfer history for last 5 minutes
     recent_data_transfer = get_data_transfer_history("5min")
     
     # Calculate total bytes directly from bandwidth history for accuracy
-    total_bytes_received = sum(item["download"] for item in bandwidth_history)
-    total_bytes_sent = sum(item["upload"] for item in bandwidth_history)
+    total_bytes_received, total_bytes_sent = bandwidth_history.sum_range(("download", "upload"))
     
     # Format the calculated totals
     total_received_formatted = format_bytes(total_bytes_received)
     total_sent_formatted = format_bytes(total_bytes_sent)
     
+    # One snapshot, so all values come from the same point in time
+    cache = network_cache.snapshot()
     return {
-        "networkData": network_cache["network_data"],
-        "connectedDevices": network_cache["connected_devices"],
+        "networkData": cache["network_data"],
+        "connectedDevices": cache["connected_devices"],
         "bandwidthHistory": recent_bandwidth,
-        "latencyHistory": list(ping_history),
-        "ioData": network_cache["io_data"],
-        "lastUpdated": network_cache["last_updated"],
+        "latencyHistory": get_latency_history(),
+        "ioData": cache["io_data"],
+        "lastUpdated": cache["last_updated"],
         "dataTransferHistory": recent_data_transfer,
         "totalDataTransfer": {
             "sent": total_bytes_sent,
@@ -864,6 +897,3 @@ def get_all_network_data():
             "receivedFormatted": total_received_formatted
         }
     }
-
-# Initialize update function
-update_network_data() 
\ No newline at end of file
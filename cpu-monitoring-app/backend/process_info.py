@@ -1,17 +1,241 @@
+import os
+import re
+import time
+import threading
 import psutil
-from fastapi.responses import JSONResponse
+from instrumentation import instrumented, record_cache
 
-def get_processes_data():
-    """Fetch process information."""
-    processes = []
-    for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info']):
+# How often the scheduler refreshes the process table (seconds)
+PROCESS_REFRESH_INTERVAL = float(os.environ.get("VAMOS_PROCESS_INTERVAL", "1.0"))
+# Stop refreshing in the background when nobody has asked for processes for this long (seconds)
+PROCESS_IDLE_TIMEOUT = 10.0
+# How many versions of removals are kept for delta clients
+REMOVED_HISTORY = 120
+
+# Sort keys accepted by /processes and the row value each one orders by
+SORT_KEYS = {
+    # Fields hidden by AccessDenied are None and sort as 0
+    "cpu": lambda row: row["cpu_percent"] or 0,
+    "memory": lambda row: row["memory_usage"] or 0,
+    "name": lambda row: (row["name"] or "").lower(),
+    "pid": lambda row: row["pid"],
+}
+# Direction used when the client does not give one
+DEFAULT_DESCENDING = {"cpu": True, "memory": True, "name": False, "pid": False}
+
+
+def _allowed(func):
+    # One process attribute, or None when the OS denies access to it (as process_iter reports it)
+    try:
+        return func()
+    except psutil.AccessDenied:
+        return None
+
+
+class ProcessTable:
+    """Persistent process table keyed by (pid, create_time).
+
+    Process handles are kept between refreshes so psutil can compute real
+    CPU percentages, and each row remembers the version it last changed in
+    so clients can ask for only what changed since their last poll.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._handles = {}      # pid -> (key, psutil.Process)
+        self._rows = {}         # key -> row dict
+        self._added_at = {}     # key -> version the row first appeared in
+        self._changed_at = {}   # key -> version the row last changed in
+        self._removed = []      # (version, pid) for recently removed rows
+        self._sorted = {}       # (sort key, descending) -> rows, valid for _sorted_version
+        self._sorted_version = -1
+        self.version = 0
+        self.refreshed_at = 0.0
+        self.last_access = 0.0
+        self._cpu_count = psutil.cpu_count(logical=True) or 1
+
+    def refresh(self):
+        """Walk the current pids once and record added, removed and changed rows"""
+        with self._refresh_lock:
+            self._refresh()
+
+    def refresh_if_stale(self):
+        """Refresh unless another thread refreshed the table very recently"""
+        with self._refresh_lock:
+            if self.is_stale():
+                self._refresh()
+
+    def _refresh(self):
+        seen = set()
+        updates = {}
+        for pid in psutil.pids():
+            entry = self._handles.get(pid)
+            try:
+                # is_running() re-checks the process identity; create_time() is cached
+                # on the handle, so comparing it could never detect a reused pid
+                if entry is None or not entry[1].is_running():
+                    proc = psutil.Process(pid)
+                    key = (pid, _allowed(proc.create_time))
+                else:
+                    key, proc = entry
+                with proc.oneshot():
+                    cpu_percent = _allowed(lambda: proc.cpu_percent(None))
+                    memory_info = _allowed(proc.memory_info)
+                    row = {
+                        "pid": pid,
+                        "name": _allowed(proc.name),
+                        # Normalized to total machine capacity, like Task Manager
+                        "cpu_percent": round(cpu_percent / self._cpu_count, 1) if cpu_percent is not None else None,
+                        "memory_usage": memory_info.rss if memory_info is not None else None  # Resident Set Size (RAM)
+                    }
+            except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                continue
+            seen.add(key)
+            updates[key] = (proc, row)
+
+        with self._lock:
+            version = self.version + 1
+            changed = False
+            for key, (proc, row) in updates.items():
+                self._handles[key[0]] = (key, proc)
+                old = self._rows.get(key)
+                if old is None:
+                    self._added_at[key] = version
+                if old != row:
+                    self._rows[key] = row
+                    self._changed_at[key] = version
+                    changed = True
+            for key in [key for key in self._rows if key not in seen]:
+                del self._rows[key]
+                self._added_at.pop(key, None)
+                self._changed_at.pop(key, None)
+                entry = self._handles.get(key[0])
+                if entry and entry[0] == key:
+                    del self._handles[key[0]]
+                self._removed.append((version, key[0]))
+                changed = True
+            if changed:
+                self.version = version
+            # Forget removals that are too old to be asked for
+            oldest = self.version - REMOVED_HISTORY
+            while self._removed and self._removed[0][0] <= oldest:
+                self._removed.pop(0)
+            self.refreshed_at = time.monotonic()
+
+    def snapshot(self, since=None):
+        """Full table, or the delta since a version the client already has.
+
+        Deltas list removed pids; clients should apply removals before
+        additions, since a reused pid can appear in both.
+        """
+        with self._lock:
+            self.last_access = time.monotonic()
+            if since is None or since > self.version or since < self.version - REMOVED_HISTORY:
+                return {
+                    "version": self.version,
+                    "full": True,
+                    "processes": list(self._rows.values()),
+                }
+            added = []
+            changed = []
+            for key, row in self._rows.items():
+                if self._changed_at[key] > since:
+                    (added if self._added_at[key] > since else changed).append(row)
+            removed = [pid for version, pid in self._removed if version > since]
+            return {
+                "version": self.version,
+                "full": False,
+                "added": added,
+                "changed": changed,
+                "removed": removed,
+            }
+
+    def sorted_rows(self, sort="cpu", descending=True):
+        """Rows ordered by a sort key, built at most once per table version"""
+        with self._lock:
+            self.last_access = time.monotonic()
+            if self._sorted_version != self.version:
+                self._sorted = {}
+                self._sorted_version = self.version
+            index = self._sorted.get((sort, descending))
+            if index is None:
+                index = sorted(self._rows.values(), key=SORT_KEYS[sort], reverse=descending)
+                self._sorted[(sort, descending)] = index
+            return self.version, index
+
+    def query(self, sort="cpu", order=None, name=None, regex=None, limit=None, offset=0):
+        """Sorted, filtered and paginated view of the table.
+
+        A top-N request without a filter is a slice of the shared sort index,
+        so it costs the same no matter how many processes are running.
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"Unknown sort key '{sort}'")
+        if order is None:
+            descending = DEFAULT_DESCENDING[sort]
+        elif order in ("asc", "desc"):
+            descending = order == "desc"
+        else:
+            raise ValueError(f"Unknown sort order '{order}'")
         try:
-            processes.append({
-                "pid": proc.info['pid'],
-                "name": proc.info['name'],
-                "cpu_percent": proc.info['cpu_percent'],
-                "memory_usage": proc.info['memory_info'].rss  # Resident Set Size (RAM)
-            })
-        except (psutil.NoSuchProcess, psutil.AccessDenied):
-            continue
-    return {"processes": processes}
\ No newline at end of file
+            pattern = re.compile(regex, re.IGNORECASE) if regex else None
+        except re.error as e:
+            raise ValueError(f"Invalid regex: {e}")
+
+        version, index = self.sorted_rows(sort, descending)
+        rows = index
+        if name:
+            needle = name.lower()
+            rows = [row for row in rows if needle in (row["name"] or "").lower()]
+        if pattern:
+            rows = [row for row in rows if pattern.search(row["name"] or "")]
+
+        offset = max(0, offset or 0)
+        end = offset + limit if limit is not None else None
+        return {
+            "version": version,
+            "full": True,
+            "total": len(index),
+            "matched": len(rows),
+            "processes": rows[offset:end],
+        }
+
+    def is_stale(self):
+        return time.monotonic() - self.refreshed_at > PROCESS_REFRESH_INTERVAL * 2
+
+    def is_watched(self):
+        return time.monotonic() - self.last_access < PROCESS_IDLE_TIMEOUT
+
+
+# Shared process table, kept up to date by the scheduler
+process_table = ProcessTable()
+
+
+@instrumented
+def refresh_process_table():
+    """Scheduled job: refresh the table while someone is watching it"""
+    if not process_table.is_watched():
+        return
+    if time.monotonic() - process_table.refreshed_at >= PROCESS_REFRESH_INTERVAL:
+        process_table.refresh()
+
+
+@instrumented
+def get_processes_data(since=None):
+    """Fetch process information, optionally only the changes since a version."""
+    record_cache("process_table", not process_table.is_stale())
+    if process_table.is_stale():
+        # Nobody was watching, so the scheduler let the table go idle
+        process_table.refresh_if_stale()
+    return process_table.snapshot(since)
+
+
+@instrumented
+def query_processes(sort="cpu", order=None, name=None, regex=None, limit=None, offset=0, top=None):
+    """Fetch a sorted, filtered page of processes (top=N is limit=N from the start)."""
+    if process_table.is_stale():
+        process_table.refresh_if_stale()
+    if top is not None:
+        limit, offset = top, 0
+    return process_table.query(sort, order, name, regex, limit, offset)
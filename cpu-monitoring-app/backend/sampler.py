@@ -0,0 +1,54 @@
+import os
+import time
+import threading
+import psutil
+
+# How often the background sampler takes a reading (seconds)
+SAMPLE_INTERVAL = float(os.environ.get("VAMOS_SAMPLE_INTERVAL", "1.0"))
+# The first reading has no earlier one to compare with, so it is measured over this long (seconds)
+FIRST_SAMPLE_INTERVAL = 0.1
+
+
+class Sampler:
+    """Latest CPU readings kept in memory; the scheduler calls sample() every interval"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._primed = False
+
+    def sample(self):
+        """Take one reading and publish it as the latest snapshot"""
+        # Later readings cover the time since the previous one, without blocking
+        per_cpu = psutil.cpu_percent(interval=None if self._primed else FIRST_SAMPLE_INTERVAL, percpu=True)
+        self._primed = True
+        snapshot = {
+            "timestamp": time.time(),
+            "per_cpu": per_cpu,
+            "cpu_percent": sum(per_cpu) / len(per_cpu) if per_cpu else 0.0,
+        }
+        with self._lock:
+            self._snapshot = snapshot
+        return snapshot
+
+    def snapshot(self):
+        """Return the latest snapshot, taking a first reading if none exists yet"""
+        with self._lock:
+            snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.sample()
+        return snapshot
+
+
+# Shared sampler used by all endpoints
+sampler = Sampler()
+
+
+def get_cpu_snapshot():
+    """Latest CPU snapshot from the shared sampler"""
+    return sampler.snapshot()
+
+
+def get_cpu_percent():
+    """Latest overall CPU usage percentage"""
+    return sampler.snapshot()["cpu_percent"]
@@ -0,0 +1,216 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Seconds without API requests or stream subscribers before the backend counts as idle
+IDLE_AFTER = float(os.environ.get("VAMOS_IDLE_AFTER", "30"))
+# Jobs without an explicit idle interval run this many times less often when idle
+IDLE_FACTOR = float(os.environ.get("VAMOS_IDLE_FACTOR", "10"))
+# Worker threads that run job functions
+SCHEDULER_WORKERS = int(os.environ.get("VAMOS_SCHEDULER_WORKERS", "4"))
+# Longest a failing or slow job is pushed back (seconds)
+MAX_BACKOFF = 300.0
+
+
+class Job:
+    """A collector the scheduler runs periodically, with its timing state"""
+
+    def __init__(self, name, func, interval, idle_interval=None, jitter=0.1, timeout=None,
+                 priority=0, max_backoff=MAX_BACKOFF):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.idle_interval = idle_interval if idle_interval is not None else interval * IDLE_FACTOR
+        self.jitter = jitter
+        self.timeout = timeout if timeout is not None else max(interval, 1.0) * 2
+        self.priority = priority
+        self.max_backoff = max_backoff
+        self.next_run = 0.0
+        self.backoff = 0.0        # Extra delay after failures, timeouts or slow runs
+        self.failures = 0
+        self.runs = 0
+        self.started_at = None    # Set while a run is in flight
+        self.last_run = None
+        self.last_duration = None
+        self.last_error = None
+        self.timed_out = False
+
+    def current_interval(self, active):
+        return self.interval if active else self.idle_interval
+
+    def schedule_next(self, now, active):
+        delay = max(self.current_interval(active), self.backoff)
+        self.next_run = now + delay * (1 + random.uniform(-self.jitter, self.jitter))
+
+    def status(self, now, active):
+        return {
+            "name": self.name,
+            "priority": self.priority,
+            "interval": self.current_interval(active),
+            "backoff": round(self.backoff, 2),
+            "running": self.started_at is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "lastRun": self.last_run,
+            "lastDuration": round(self.last_duration, 4) if self.last_duration is not None else None,
+            "lastError": self.last_error,
+            "nextRunIn": round(max(0.0, self.next_run - now), 2),
+        }
+
+
+class Scheduler:
+    """Runs background collectors, each on its own interval.
+
+    A job runs at its normal interval while someone is using the dashboard
+    (an API request in the last IDLE_AFTER seconds or an open stream) and
+    at its idle interval otherwise. Failures, timeouts and runs that take
+    a large share of the interval push the job back exponentially, up to
+    max_backoff; a successful, quick run clears the backoff. Due jobs are
+    started highest priority first and a job never overlaps itself.
+    """
+
+    def __init__(self, workers=SCHEDULER_WORKERS, idle_after=IDLE_AFTER):
+        self.idle_after = idle_after
+        self._workers = workers
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pool = None
+        self._subscribers = 0
+        self._last_activity = 0.0
+
+    def add_job(self, name, func, interval, **options):
+        """Register a collector; options are those of Job"""
+        with self._lock:
+            self._jobs[name] = Job(name, func, interval, **options)
+        self._wake.set()
+
+    def run_soon(self, name, delay=0.0):
+        """Bring a job's next run forward to at most delay seconds from now"""
+        with self._lock:
+            job = self._jobs[name]
+            job.next_run = min(job.next_run, time.monotonic() + delay)
+        self._wake.set()
+
+    def touch(self):
+        """Record client activity; wakes idle jobs up to their normal rate"""
+        was_active = self.is_active()
+        self._last_activity = time.monotonic()
+        if not was_active:
+            self._speed_up()
+
+    def add_subscriber(self):
+        with self._lock:
+            self._subscribers += 1
+        self.touch()
+
+    def remove_subscriber(self):
+        with self._lock:
+            self._subscribers = max(0, self._subscribers - 1)
+        self._last_activity = time.monotonic()
+
+    def is_active(self):
+        return self._subscribers > 0 or time.monotonic() - self._last_activity < self.idle_after
+
+    def _speed_up(self):
+        # Jobs waiting out an idle interval are due again within their normal one
+        now = time.monotonic()
+        with self._lock:
+            for job in self._jobs.values():
+                if not job.backoff:
+                    job.next_run = min(job.next_run, now + job.interval * random.random())
+        self._wake.set()
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="vamos-job")
+        self._thread = threading.Thread(target=self._run, name="vamos-scheduler")
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        self._wake.set()
+        if self._thread:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        if self._pool:
+            self._pool.shutdown(wait=False)
+            self._pool = None
+
+    def status(self):
+        now = time.monotonic()
+        active = self.is_active()
+        with self._lock:
+            jobs = [job.status(now, active) for job in self._jobs.values()]
+        return {"active": active, "subscribers": self._subscribers, "jobs": jobs}
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            now = time.monotonic()
+            active = self.is_active()
+            with self._lock:
+                self._check_timeouts(now, active)
+                due = [job for job in self._jobs.values() if job.started_at is None and job.next_run <= now]
+                due.sort(key=lambda job: -job.priority)
+                for job in due:
+                    job.started_at = now
+                    job.timed_out = False
+                    self._pool.submit(self._execute, job)
+                waiting = [job.next_run for job in self._jobs.values() if job.started_at is None]
+                running = [job.started_at + job.timeout for job in self._jobs.values() if job.started_at is not None]
+            wake_at = min(waiting + running, default=now + 1.0)
+            self._wake.wait(max(0.01, min(wake_at - now, 1.0 if active else self.idle_after)))
+            self._wake.clear()
+
+    def _check_timeouts(self, now, active):
+        # Threads cannot be killed, so a run past its timeout is counted as a
+        # failure now and the job is not started again until it returns
+        for job in self._jobs.values():
+            if job.started_at is not None and not job.timed_out and now - job.started_at > job.timeout:
+                job.timed_out = True
+                job.failures += 1
+                job.last_error = f"Timed out after {job.timeout}s"
+                job.backoff = min(job.max_backoff, max(job.interval, job.backoff * 2))
+                logging.error(f"Scheduled job '{job.name}' timed out after {job.timeout}s")
+
+    def _execute(self, job):
+        started = time.monotonic()
+        error = None
+        try:
+            job.func()
+        except Exception as e:
+            error = e
+            logging.error(f"Scheduled job '{job.name}' failed: {e}")
+        finished = time.monotonic()
+        duration = finished - started
+        with self._lock:
+            job.runs += 1
+            job.last_run = time.time()
+            job.last_duration = duration
+            if error is not None or job.timed_out:
+                if error is not None:
+                    job.failures += 1
+                    job.last_error = str(error)
+                    job.backoff = min(job.max_backoff, max(job.interval, job.backoff * 2))
+            elif duration > job.interval / 2:
+                # Slow but successful: give it room proportional to its cost
+                job.backoff = min(job.max_backoff, duration * 2)
+                job.last_error = None
+            else:
+                job.backoff = 0.0
+                job.last_error = None
+            job.started_at = None
+            job.schedule_next(finished, self.is_active())
+        self._wake.set()
+
+
+# Shared scheduler for all background collectors
+scheduler = Scheduler()
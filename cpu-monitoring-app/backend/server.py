@@ -1,49 +1,67 @@
 from fastapi import FastAPI
-from fastapi.responses import JSONResponse
-from fastapi import FastAPI, HTTPException
+from fast_json import FastJSONResponse, dumps_str, cached_json_response
+from fastapi import FastAPI, HTTPException, Request, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse, PlainTextResponse
+import asyncio
 from typing import Optional, List, Dict
-from process_info import get_processes_data
+from process_info import get_processes_data, query_processes, refresh_process_table
 import psutil
-import time
 import platform
 import socket
-import speedtest
 import subprocess
 import re
 import uuid
 import threading
-import logging
 from datetime import datetime, timedelta
 import urllib.request
 from fastapi.middleware.cors import CORSMiddleware
-from pynvml import nvmlInit, nvmlDeviceGetHandleByIndex, nvmlDeviceGetTemperature, nvmlDeviceGetClockInfo
 import random
-import wmi
 import subprocess
 from gaming_mode import router as gaming_mode_router
 from typing import Optional
 from collections import deque
 from disk_info import get_disk_data
 from memory_info import get_memory_data
-from system_info import get_system_info_response
+from system_info import get_system_info_response, refresh_inventory, get_uptime_data
 import batteryinfo
+from sampler import sampler, SAMPLE_INTERVAL
+from scheduler import scheduler
+from state_store import StateStore
+from instrumentation import render_metrics
+from executor import run_collector, CollectorTimeout, shutdown_executor
+from gpu_provider import set_gpu_provider
+from metric_store import get_metric_store, close_metric_store, record_samples
+import device_scanner
+import speed_tester
+from streaming import Subscription, parse_topics, next_frame, collect_snapshot, TOPICS
 from network_info import (
     get_network_data,
     get_speed_test_data,
     get_connected_devices,
     get_bandwidth_history,
+    get_bandwidth_totals,
     get_connection_quality,
     get_data_transfer_history,
     get_all_network_data,
+    get_all_network_data_token,
+    get_network_data_token,
+    get_connection_quality_token,
+    get_connected_devices_token,
+    publish_network,
+    get_history_token,
+    bandwidth_history,
+    data_transfer_history,
+    UPDATE_INTERVAL,
+    PROBE_DEADLINE,
+    get_persisted_history,
     update_network_data,
-    clear_history,
+    clear_history as clear_network_history,
     get_network_io as get_network_io_data,
+    get_inventory_devices,
+    get_mac_address,
     format_bytes,
-    DateTimeEncoder,
-    safe_json_dump
 )
 from pydantic import BaseModel
-import json
 from hardware_info import (
     get_cpu_usage,
     get_cpu_temperature,
@@ -52,8 +70,20 @@ from hardware_info import (
     get_gpu_stats,
 )
 
-app = FastAPI()
-print(app.routes)
+app = FastAPI(default_response_class=FastJSONResponse)
+
+@app.exception_handler(CollectorTimeout)
+async def collector_timeout_handler(request, exc: CollectorTimeout):
+    """Report a slow collector instead of holding the request open"""
+    return FastJSONResponse(status_code=504, content={"error": str(exc)})
+@app.middleware("http")
+async def track_client_activity(request: Request, call_next):
+    """Any API call means someone is watching, so collectors run at full rate"""
+    # Metric scrapes are not a user; counting them would keep the backend busy forever
+    if request.url.path != "/metrics":
+        scheduler.touch()
+    return await call_next(request)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -63,179 +93,164 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Start background network data update thread
-update_thread = None
-stop_thread = False
+# Network updates back off to this interval when nobody is using the dashboard (seconds)
+NETWORK_IDLE_INTERVAL = 300
 
-# Add a global variable to track speed test status
-speed_test_status = {
+# Speed test status when no test is running
+IDLE_SPEED_TEST_STATUS = {
     "running": False,
     "progress": 0,
     "phase": "",
     "start_time": None
 }
+# A test running for longer than this (seconds) is assumed to have failed
+SPEED_TEST_TIMEOUT = 120
+# Share of the reported progress covered by the test itself; the rest is the network update after it
+SPEED_TEST_PROGRESS_SHARE = 0.9
 
-# Add a flag to track the status of currently running speed test
-is_speed_test_running = False
+# Status of the current speed test; "running" doubles as the lock that keeps tests from overlapping
+speed_test_state = StateStore(IDLE_SPEED_TEST_STATUS)
 
 class PlanRequest(BaseModel):
     plan: str  # SCHEME_MIN or SCHEME_MAX
 
-def background_updater():
-    """Background thread to update network data periodically"""
-    global stop_thread
-    while not stop_thread:
-        try:
-            # Log update attempt
-            print(f"[{datetime.now().strftime('%H:%M:%S')}] Updating network data...")
-            
-            # Update network data
-            update_network_data()
-            
-            # Wait 30 seconds before next update
-            for _ in range(30):  # Check stop_thread every second
-                if stop_thread:
-                    break
-                time.sleep(1)
-        except Exception as e:
-            logging.error(f"Error in background updater: {e}")
-            time.sleep(5)  # Wait a bit before retrying after error
-
 @app.on_event("startup")
 async def startup_event():
-    """Start background threads when the server starts"""
-    global update_thread, stop_thread
-    stop_thread = False
-    update_thread = threading.Thread(target=background_updater)
-    update_thread.daemon = True
-    update_thread.start()
-    
-    # Force an immediate data update on startup
-    try:
-        print(f"[{datetime.now().strftime('%H:%M:%S')}] Performing initial data collection...")
-        update_network_data()
-    except Exception as e:
-        logging.error(f"Error in startup data collection: {e}")
+    """Start background collectors when the server starts"""
+    # CPU readings are kept in memory so CPU endpoints never block
+    scheduler.add_job("cpu", sampler.sample, SAMPLE_INTERVAL, priority=10)
+    scheduler.add_job("processes", refresh_process_table, SAMPLE_INTERVAL, priority=5)
+    scheduler.add_job("history", record_samples, SAMPLE_INTERVAL, priority=3)
+    scheduler.add_job(
+        "network", update_network_data, UPDATE_INTERVAL,
+        idle_interval=NETWORK_IDLE_INTERVAL, timeout=PROBE_DEADLINE * 3, priority=1
+    )
+    # Every job is due immediately, so this also performs the initial data collection
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] Starting background collectors...")
+    scheduler.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Stop background threads when the server shuts down"""
-    global stop_thread
-    stop_thread = True
-    if update_thread:
-        update_thread.join(timeout=1.0)
+    """Stop background collectors when the server shuts down"""
+    scheduler.stop()
+    shutdown_executor()
+    set_gpu_provider(None)  # Release the NVML session
+    close_metric_store()
 
 @app.get("/system-info")
-async def get_system_info():
-    """API endpoint to fetch system information."""
-    return get_system_info_response()
+async def get_system_info(request: Request):
+    """API endpoint to fetch system information (supports ETag/Last-Modified revalidation)."""
+    return await run_collector(
+        "system",
+        get_system_info_response,
+        request.headers.get("if-none-match"),
+        request.headers.get("if-modified-since"),
+    )
+
+@app.get("/system-info/uptime")
+def fetch_uptime():
+    """API endpoint to fetch the system uptime (never cached, unlike /system-info)."""
+    return FastJSONResponse(content=get_uptime_data())
+
+@app.post("/system-info/refresh")
+async def refresh_system_info():
+    """Re-collect the cached hardware inventory."""
+    return await run_collector("system", refresh_inventory)
 
 @app.get("/api/memory")
 async def fetch_memory():
     """API endpoint to fetch memory information."""
-    return get_memory_data()
+    return await run_collector("memory", get_memory_data)
 
 @app.get("/api/disks")
 async def fetch_disks():
     """API endpoint to fetch disk information."""
-    return get_disk_data()
+    return await run_collector("disks", get_disk_data)
 
 # Network Monitoring Endpoints
 @app.get("/api/network")
-async def fetch_network_data():
-    """API endpoint to get network data"""
-    return JSONResponse(content=get_network_data())
+async def fetch_network_data(request: Request):
+    """API endpoint to get network data (ETag-revalidated, cached per network update)"""
+    return await run_collector(
+        "network", cached_json_response, request.headers.get("if-none-match"),
+        ("network",), get_network_data_token(), get_network_data
+    )
+
+def get_speed_test_status():
+    """Speed test status with the live phase, progress and throughput of a running test"""
+    status = dict(speed_test_state.snapshot())
+    test = speed_tester.get_current_test()
+    if status["running"] and test is not None and not test.done.is_set():
+        live = test.status.snapshot()
+        status.update(
+            phase=live["label"],
+            progress=round(live["progress"] * SPEED_TEST_PROGRESS_SHARE),
+            mbps=live["mbps"],
+            bytes=live["bytes"]
+        )
+    return status
 
 @app.get("/api/speedtest/status")
 async def speed_test_status_endpoint():
     """Get the current status of a speed test"""
-    global speed_test_status
+    status = speed_test_state.snapshot()
     
     # If a test has been running for more than 2 minutes, assume it failed
-    if speed_test_status["running"] and speed_test_status["start_time"]:
-        if (datetime.now() - speed_test_status["start_time"]).total_seconds() > 120:
-            speed_test_status = {
-                "running": False,
-                "progress": 0,
-                "phase": "",
-                "start_time": None
-            }
+    if status["running"] and status["start_time"]:
+        if (datetime.now() - status["start_time"]).total_seconds() > SPEED_TEST_TIMEOUT:
+            # Only reset the test we looked at, not one started since
+            if speed_test_state.update_if(lambda current: current is status, **IDLE_SPEED_TEST_STATUS):
+                speed_tester.cancel_test()
     
-    # Make a copy and convert datetime to string to make it JSON serializable
-    status_copy = speed_test_status.copy()
-    if status_copy.get("start_time"):
-        status_copy["start_time"] = status_copy["start_time"].isoformat()
-        
-    return DateTimeJSONResponse(content=status_copy)
+    return FastJSONResponse(content=get_speed_test_status())
 
 @app.get("/api/speedtest")
 async def fetch_speed_test():
     """API endpoint to run a speed test"""
-    global speed_test_status, is_speed_test_running
+    if not speed_tester.is_configured():
+        return FastJSONResponse(status_code=503, content={"error": speed_tester.NOT_CONFIGURED})
+    # Check and claim in one step, so two requests can never both start a test
+    started = speed_test_state.update_if(
+        lambda current: not current["running"],
+        running=True,
+        progress=0,
+        phase="Starting speed test...",
+        start_time=datetime.now()
+    )
     
     # If a test is already running, return status
-    if is_speed_test_running:
-        # Convert datetime to string to make it JSON serializable
-        status_copy = speed_test_status.copy()
-        if status_copy.get("start_time"):
-            status_copy["start_time"] = status_copy["start_time"].isoformat()
-        return DateTimeJSONResponse(content={"message": "Speed test already in progress", "status": status_copy})
-    
-    # Set the status to running
-    speed_test_status = {
-        "running": True,
-        "progress": 0,
-        "phase": "Starting speed test...",
-        "start_time": datetime.now()
-    }
-    is_speed_test_running = True
+    if not started:
+        return FastJSONResponse(content={
+            "message": "Speed test already in progress",
+            "status": get_speed_test_status()
+        })
     
     # Run the speed test in a background thread
     def run_speed_test_thread():
-        global speed_test_status, is_speed_test_running
         try:
-            # Run the speed test - network data update is already handled in get_speed_test_data
-            speed_test_status["phase"] = "Running speed test..."
-            speed_test_status["progress"] = 50
+            # Run the speed test - network data update is already handled in get_speed_test_data.
+            # Its live progress is read from speed_tester by get_speed_test_status
+            speed_test_state.update(phase="Running speed test...")
             speed_test_results = get_speed_test_data()
             
+            if speed_test_results.get("cancelled"):
+                speed_test_state.update(**dict(IDLE_SPEED_TEST_STATUS, phase="Test cancelled"))
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Speed test cancelled")
+                return
+            
             # Force an immediate network data update to reflect new state
-            speed_test_status["phase"] = "Updating network data..."
-            speed_test_status["progress"] = 90
+            speed_test_state.update(phase="Updating network data...", progress=90)
             update_network_data()
             
             # Schedule an additional quick update after 5 seconds
-            def delayed_update():
-                time.sleep(5)
-                try:
-                    print(f"[{datetime.now().strftime('%H:%M:%S')}] Running post-test quick update")
-                    update_network_data()
-                except Exception as e:
-                    print(f"Error in delayed update: {e}")
-            
-            # Start a thread for the delayed update
-            update_thread = threading.Thread(target=delayed_update)
-            update_thread.daemon = True
-            update_thread.start()
+            scheduler.run_soon("network", delay=5)
             
             # Mark test as completed
-            speed_test_status = {
-                "running": False,
-                "progress": 100,
-                "phase": "Test completed",
-                "start_time": None
-            }
-            is_speed_test_running = False
+            speed_test_state.update(running=False, progress=100, phase="Test completed", start_time=None)
             
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Speed test completed successfully")
         except Exception as e:
-            speed_test_status = {
-                "running": False,
-                "progress": 0,
-                "phase": "",
-                "start_time": None
-            }
-            is_speed_test_running = False
+            speed_test_state.update(**IDLE_SPEED_TEST_STATUS)
             print(f"[{datetime.now().strftime('%H:%M:%S')}] Speed test failed: {e}")
     
     # Start the background thread
@@ -243,51 +258,145 @@ async def fetch_speed_test():
     test_thread.daemon = True
     test_thread.start()
     
-    # Return immediately with the status (convert datetime to string)
-    status_copy = speed_test_status.copy()
-    if status_copy.get("start_time"):
-        status_copy["start_time"] = status_copy["start_time"].isoformat()
-    return DateTimeJSONResponse(content={"message": "Speed test started", "status": status_copy})
+    # Return immediately with the status (FastJSONResponse serializes start_time as ISO 8601)
+    return FastJSONResponse(content={"message": "Speed test started", "status": get_speed_test_status()})
+
+@app.post("/api/speedtest/cancel")
+async def cancel_speed_test():
+    """Stop the running speed test, mid-phase if need be"""
+    if not speed_tester.cancel_test():
+        return FastJSONResponse(status_code=409, content={"error": "No speed test is running"})
+    return FastJSONResponse(content={"message": "Speed test cancelled"})
+
+@app.get("/api/speedtest/stream")
+async def speed_test_stream(request: Request):
+    """Stream the running (or most recent) speed test as Server-Sent Events.
+
+    Sends "phase" events when a phase starts, a "ping" event, one "sample"
+    event per second with the throughput and bytes moved so far, a
+    "phase_result" event per phase and a final "done" event carrying the
+    result. Events already sent by the test are replayed first.
+    """
+    test = speed_tester.get_current_test()
+    if test is None:
+        return FastJSONResponse(status_code=404, content={"error": "No speed test has been run yet"})
+
+    async def events():
+        sent = 0
+        while not await request.is_disconnected():
+            finished = test.done.is_set()
+            while sent < len(test.events):
+                event = test.events[sent]
+                yield f"event: {event['event']}\ndata: {dumps_str(event)}\n\n"
+                sent += 1
+            if finished:
+                break
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/api/devices")
-async def fetch_devices():
-    """API endpoint to get connected devices"""
-    return JSONResponse(content=get_connected_devices())
+async def fetch_devices(request: Request, stream: bool = False, since: Optional[int] = None):
+    """API endpoint to get connected devices.
+
+    since=<version> returns only devices changed or removed since then.
+    With stream=true a sweep is started (or joined) and each device is sent
+    as a Server-Sent Event as soon as it is found, followed by a final
+    "done" event carrying the complete list.
+    """
+    if not stream:
+        return await run_collector(
+            "network", cached_json_response, request.headers.get("if-none-match"),
+            ("devices", since), get_connected_devices_token(since), lambda: get_connected_devices(since)
+        )
+
+    local_mac = await run_collector("network", get_mac_address)
+    scan = await run_collector("network", device_scanner.start_scan, local_mac)
+
+    async def events():
+        # A watching client keeps the scheduler out of idle until it disconnects
+        scheduler.add_subscriber()
+        try:
+            sent = 0
+            while not await request.is_disconnected():
+                finished = scan.done.is_set()
+                while sent < len(scan.devices):
+                    yield f"event: device\ndata: {dumps_str(scan.devices[sent])}\n\n"
+                    sent += 1
+                if finished:
+                    devices = get_inventory_devices()
+                    publish_network("connected_devices", devices)
+                    yield f"event: done\ndata: {dumps_str(devices)}\n\n"
+                    break
+                await asyncio.sleep(0.25)
+        finally:
+            scheduler.remove_subscriber()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
 
 @app.get("/api/bandwidth-history")
-async def fetch_bandwidth_history(timeframe: str = "5min"):
-    """API endpoint to get bandwidth history"""
-    return JSONResponse(content=get_bandwidth_history(timeframe))
+async def fetch_bandwidth_history(request: Request, timeframe: str = "5min", max_points: Optional[int] = Query(None, ge=1)):
+    """API endpoint to get bandwidth history (rolled up when max_points is given)"""
+    return await run_collector(
+        "network", cached_json_response, request.headers.get("if-none-match"),
+        ("bandwidth-history", timeframe, max_points),
+        get_history_token(bandwidth_history, timeframe, max_points),
+        lambda: get_bandwidth_history(timeframe, max_points)
+    )
 
 @app.get("/api/data-transfer-history")
-async def fetch_data_transfer_history(timeframe: str = "5min"):
-    """API endpoint to get data transfer history"""
-    return JSONResponse(content=get_data_transfer_history(timeframe))
+async def fetch_data_transfer_history(request: Request, timeframe: str = "5min", max_points: Optional[int] = Query(None, ge=1)):
+    """API endpoint to get data transfer history (rolled up when max_points is given)"""
+    return await run_collector(
+        "network", cached_json_response, request.headers.get("if-none-match"),
+        ("data-transfer-history", timeframe, max_points),
+        get_history_token(data_transfer_history, timeframe, max_points),
+        lambda: get_data_transfer_history(timeframe, max_points)
+    )
+
+@app.get("/api/history")
+async def list_history_metrics():
+    """API endpoint to list the metrics with persisted history"""
+    return {"metrics": get_metric_store().metrics()}
+
+@app.get("/api/history/{metric}")
+async def fetch_metric_history(metric: str, timeframe: str = "1day", max_points: Optional[int] = Query(None, ge=1)):
+    """API endpoint to read persisted history of one metric (bucketed when max_points is given)"""
+    history = await run_collector("system", get_persisted_history, metric, timeframe, max_points)
+    if "error" in history:
+        raise HTTPException(status_code=404, detail=history["error"])
+    return history
 
 @app.get("/api/connection-quality")
-async def fetch_connection_quality():
-    """API endpoint to get connection quality data"""
-    return JSONResponse(content=get_connection_quality())
+async def fetch_connection_quality(request: Request):
+    """API endpoint to get connection quality data (ETag-revalidated, cached per network update)"""
+    return await run_collector(
+        "network", cached_json_response, request.headers.get("if-none-match"),
+        ("connection-quality",), get_connection_quality_token(), get_connection_quality
+    )
 
 @app.get("/api/all")
-async def fetch_all_data():
-    """API endpoint to get all network data"""
-    return DateTimeJSONResponse(content=get_all_network_data())
+async def fetch_all_data(request: Request):
+    """API endpoint to get all network data (ETag-revalidated, cached per network update)"""
+    return await run_collector(
+        "network", cached_json_response, request.headers.get("if-none-match"),
+        ("all",), get_all_network_data_token(), get_all_network_data
+    )
 
 @app.get("/api/clear-history")
 async def clear_history():
     """API endpoint to clear all history data"""
-    clear_history()
-    return JSONResponse(content={"status": "success", "message": "History cleared"})
+    # Also deletes the persisted network.* metrics, so it runs off the event loop
+    await run_collector("network", clear_network_history)
+    return FastJSONResponse(content={"status": "success", "message": "History cleared"})
 
 @app.get("/api/network-io")
 async def get_network_io():
     """Get Network I/O data"""
-    io_data = get_network_io_data()
+    io_data = await run_collector("network", get_network_io_data)
     
     # Calculate total bytes directly from bandwidth history for consistency
-    total_bytes_received = sum(item["download"] for item in get_bandwidth_history("1day"))
-    total_bytes_sent = sum(item["upload"] for item in get_bandwidth_history("1day"))
+    total_bytes_received, total_bytes_sent = get_bandwidth_totals("1day")
     
     # Replace the single-interval values with cumulative totals
     io_data["bytesSent"] = total_bytes_sent
@@ -306,12 +415,12 @@ async def cpu_usage():
 @app.get("/cpu-temperature")
 async def cpu_temperature():
     """Get CPU temperature."""
-    return get_cpu_temperature()
+    return await run_collector("cpu", get_cpu_temperature)
 
 @app.get("/gpu-usage")
 async def gpu_usage():
     """Get current GPU usage percentage."""
-    usage = get_gpu_usage()
+    usage = await run_collector("gpu", get_gpu_usage)
     if usage is not None:
         return {"gpu_usage_percent": usage}
     return {"error": "GPU usage data not available"}
@@ -319,17 +428,17 @@ async def gpu_usage():
 @app.get("/gpu-temperature")
 async def gpu_temperature():
     """Get GPU temperature."""
-    return get_gpu_temperature()
+    return await run_collector("gpu", get_gpu_temperature)
 
 @app.get("/gpu-stats")
 async def gpu_stats():
     """Fetch GPU and VRAM clock speeds, and GPU core count."""
-    return get_gpu_stats()
+    return await run_collector("gpu", get_gpu_stats)
 
 @app.get("/disk-usage")
 async def get_disk_usage():
-    disk = psutil.disk_usage('/')
-    return JSONResponse(content={
+    disk = await run_collector("disks", psutil.disk_usage, '/')
+    return FastJSONResponse(content={
         "total_disk_space": disk.total,
         "used_disk_space": disk.used,
         "free_disk_space": disk.free,
@@ -337,15 +446,41 @@ async def get_disk_usage():
     })
 
 @app.get("/processes")
-async def get_processes():
-    """API endpoint to fetch process information."""
-    processes_data = get_processes_data()
-    return JSONResponse(content=processes_data)
+async def get_processes(
+    since: Optional[int] = None,
+    sort: Optional[str] = None,
+    order: Optional[str] = None,
+    name: Optional[str] = None,
+    regex: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=0),
+    offset: int = Query(0, ge=0),
+    top: Optional[int] = Query(None, ge=0),
+):
+    """API endpoint to fetch process information.
+
+    since=<version> returns only the changes; sort/order/name/regex/limit/
+    offset/top return a sorted, filtered page instead of the whole table.
+    The two cannot be combined (400).
+    """
+    if any(param is not None for param in (sort, order, name, regex, limit, top)) or offset:
+        if since is not None:
+            return FastJSONResponse(
+                status_code=400, content={"error": "since cannot be combined with sort, filter or paging parameters"}
+            )
+        try:
+            processes_data = await run_collector(
+                "processes", query_processes, sort or "cpu", order, name, regex, limit, offset, top
+            )
+        except ValueError as e:
+            return FastJSONResponse(status_code=400, content={"error": str(e)})
+    else:
+        processes_data = await run_collector("processes", get_processes_data, since)
+    return FastJSONResponse(content=processes_data)
 
 
 @app.get("/battery")
 def battery_status():
-    return JSONResponse(content=batteryinfo.get_battery_info())
+    return FastJSONResponse(content=batteryinfo.get_battery_info())
 
 # Map of power plans with human-readable names (case-sensitive)
 power_plans = {
@@ -370,25 +505,104 @@ def set_power_plan(req: PlanRequest):
 
 @app.get("/power_consumption")
 def power_consumption_status():
-    return JSONResponse(content=batteryinfo.get_power_consumption())
+    return FastJSONResponse(content=batteryinfo.get_power_consumption())
 
 @app.on_event("shutdown")
 async def shutdown_event():
     print("Shutting down cleanly...")
 
+@app.get("/api/snapshot")
+async def fetch_snapshot(metrics: Optional[str] = None):
+    """Collect several metrics in one parallel pass (?metrics=cpu_temperature,gpu_stats; default all)."""
+    names = [name.strip() for name in metrics.split(",") if name.strip()] if metrics else list(TOPICS)
+    try:
+        snapshot = await collect_snapshot(list(dict.fromkeys(names)))
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"error": str(e)})
+    return FastJSONResponse(content=snapshot)
+
+# Metric streaming endpoints
+@app.websocket("/ws/metrics")
+async def metrics_websocket(websocket: WebSocket, topics: str = ""):
+    """Stream coalesced metric frames over a WebSocket.
+
+    Topics and rates come from ?topics=cpu:2,memory:5 and can be changed by
+    sending {"subscribe": {"cpu": 2, "memory": 5}}.
+    """
+    await websocket.accept()
+    try:
+        subscription = Subscription(parse_topics(topics))
+    except ValueError as e:
+        await websocket.send_json({"error": str(e)})
+        await websocket.close()
+        return
+    scheduler.add_subscriber()
+
+    async def receive_updates():
+        while True:
+            message = await websocket.receive_json()
+            try:
+                subscription.update(parse_topics(message.get("subscribe", {})))
+            except ValueError as e:
+                await websocket.send_json({"error": str(e)})
+
+    receiver = asyncio.ensure_future(receive_updates())
+    try:
+        while True:
+            frame_task = asyncio.ensure_future(next_frame(subscription))
+            await asyncio.wait({frame_task, receiver}, return_when=asyncio.FIRST_COMPLETED)
+            if receiver.done():
+                # Client went away (or sent something unreadable)
+                frame_task.cancel()
+                break
+            await websocket.send_text(dumps_str(frame_task.result()))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        receiver.cancel()
+        scheduler.remove_subscriber()
+
+@app.get("/api/stream")
+async def metrics_event_stream(request: Request, topics: str = "cpu"):
+    """Stream coalesced metric frames as Server-Sent Events (?topics=cpu:2,memory:5)."""
+    try:
+        subscription = Subscription(parse_topics(topics))
+    except ValueError as e:
+        return FastJSONResponse(status_code=400, content={"error": str(e)})
+    if not subscription.topics:
+        return FastJSONResponse(status_code=400, content={"error": "No topics requested"})
+
+    async def events():
+        scheduler.add_subscriber()
+        try:
+            while not await request.is_disconnected():
+                frame = await next_frame(subscription)
+                yield f"data: {dumps_str(frame)}\n\n"
+        finally:
+            scheduler.remove_subscriber()
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Backend self-overhead: collector latency, errors, cache hit rates, CPU and RSS (Prometheus format)"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/scheduler")
+async def scheduler_status():
+    """Background collector intervals, backoff and last run times"""
+    return scheduler.status()
+
 @app.get("/api/speedtest/result")
 async def get_speed_test_result():
     """Get the result of the most recent speed test"""
     from network_info import network_cache
     
-    if network_cache.get("speed_test") is None:
-        return DateTimeJSONResponse(content={"error": "No speed test has been run yet"})
+    speed_test = network_cache.get("speed_test")
+    if speed_test is None:
+        return FastJSONResponse(content={"error": "No speed test has been run yet"})
     
-    return DateTimeJSONResponse(content=network_cache["speed_test"])
+    return FastJSONResponse(content=speed_test)
 
 app.include_router(gaming_mode_router)
 
-# Custom JSONResponse that uses DateTimeEncoder for handling datetime objects
-class DateTimeJSONResponse(JSONResponse):
-    def render(self, content):
-        return json.dumps(content, cls=DateTimeEncoder).encode("utf-8")
@@ -0,0 +1,302 @@
+import os
+import time
+import logging
+import threading
+import urllib.request
+from urllib.parse import urlparse
+import latency_prober
+from state_store import StateStore
+
+# Speed test target: GET on the download URL streams bytes ({bytes} is replaced by the
+# size requested), POST to the upload URL accepts and discards a body. There is no
+# default, so no test contacts a third party unless told to: point both at a server on
+# the LAN, or at https://speed.cloudflare.com/__down?bytes={bytes} and
+# https://speed.cloudflare.com/__up to test the internet connection.
+DOWNLOAD_URL = os.environ.get("VAMOS_SPEED_TEST_DOWNLOAD_URL", "")
+UPLOAD_URL = os.environ.get("VAMOS_SPEED_TEST_UPLOAD_URL", "")
+NOT_CONFIGURED = "No speed test target configured (set VAMOS_SPEED_TEST_DOWNLOAD_URL and VAMOS_SPEED_TEST_UPLOAD_URL)"
+# Parallel connections per phase
+STREAMS = int(os.environ.get("VAMOS_SPEED_TEST_STREAMS", "4"))
+# Longest a download or upload phase runs when throughput does not converge (seconds)
+MAX_PHASE_SECONDS = float(os.environ.get("VAMOS_SPEED_TEST_MAX_SECONDS", "15"))
+# A phase ends early once this many consecutive samples are within CONVERGE_TOLERANCE of their mean
+CONVERGE_SAMPLES = 3
+CONVERGE_TOLERANCE = float(os.environ.get("VAMOS_SPEED_TEST_TOLERANCE", "0.05"))
+# Samples ignored for convergence and the result while TCP ramps up
+WARMUP_SAMPLES = 1
+# Seconds per throughput sample
+SAMPLE_INTERVAL = 1.0
+# Bytes per download request and per upload body. Each request opens a new connection
+# (urlopen does not keep them alive), so requests are large enough that this stays rare
+REQUEST_BYTES = 25_000_000
+CHUNK_SIZE = 64 * 1024
+SOCKET_TIMEOUT = 5.0
+PING_COUNT = 10
+
+# Overall progress (percent) at the start and end of each phase
+PHASE_PROGRESS = {"ping": (0, 10), "download": (10, 55), "upload": (55, 100)}
+PHASE_LABELS = {
+    "ping": "Measuring latency...",
+    "download": "Testing download speed...",
+    "upload": "Testing upload speed...",
+    "done": "Test completed",
+    "cancelled": "Test cancelled",
+}
+
+_current_test = None
+_test_lock = threading.Lock()
+
+
+class SpeedTestCancelled(Exception):
+    """Raised inside a test when it is cancelled"""
+
+
+class _Phase:
+    """Byte counter shared by the connections of one download or upload phase"""
+
+    def __init__(self, name, streams):
+        self.name = name
+        self.bytes = 0
+        self.errors = []
+        self.stop = threading.Event()
+        self._streams = streams
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.bytes += count
+
+    def fail(self, error):
+        with self._lock:
+            self.errors.append(error)
+
+    @property
+    def all_failed(self):
+        return len(self.errors) >= self._streams
+
+
+class SpeedTest:
+    """One speed test: latency, then download, then upload.
+
+    Each phase keeps STREAMS HTTP connections busy and samples the bytes
+    moved every second. A phase ends as soon as its throughput converges
+    (or after MAX_PHASE_SECONDS), and the result is the mean of the
+    converged samples. Events (phase changes, per-second samples and the
+    final result) are appended to `events` so readers can stream them
+    while the test runs; `status` holds the latest phase, progress and
+    throughput and `done` is set at the end. cancel() stops the test
+    within one chunk or sample interval, even mid-phase.
+    """
+
+    def __init__(self, download_url=DOWNLOAD_URL, upload_url=UPLOAD_URL, streams=STREAMS,
+                 max_phase_seconds=MAX_PHASE_SECONDS, tolerance=CONVERGE_TOLERANCE):
+        self.download_url = download_url
+        self.upload_url = upload_url
+        self.host = urlparse(download_url).hostname
+        self.streams = streams
+        self.max_phase_seconds = max_phase_seconds
+        self.tolerance = tolerance
+        self.events = []
+        self.status = StateStore({"phase": "starting", "label": "Starting speed test...", "progress": 0, "mbps": 0.0, "bytes": 0})
+        self.result = None
+        self.started_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _emit(self, event, **data):
+        data["event"] = event
+        self.events.append(data)
+
+    def _start_phase(self, name):
+        progress = PHASE_PROGRESS[name][0]
+        self.status.update(phase=name, label=PHASE_LABELS[name], progress=progress, mbps=0.0, bytes=0)
+        self._emit("phase", phase=name, progress=progress)
+
+    def _download_worker(self, phase):
+        url = self.download_url.replace("{bytes}", str(REQUEST_BYTES))
+        try:
+            while not phase.stop.is_set():
+                with urllib.request.urlopen(url, timeout=SOCKET_TIMEOUT) as response:
+                    while not phase.stop.is_set():
+                        chunk = response.read(CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        phase.add(len(chunk))
+        except Exception as e:
+            if not phase.stop.is_set():
+                phase.fail(e)
+
+    def _upload_worker(self, phase):
+        payload = os.urandom(CHUNK_SIZE)  # Incompressible, so nothing on the path can shrink it
+
+        def body():
+            # Counted once http.client asks for the next chunk, i.e. after the previous one was sent
+            sent = 0
+            while sent < REQUEST_BYTES and not phase.stop.is_set():
+                yield payload
+                sent += len(payload)
+                phase.add(len(payload))
+
+        try:
+            while not phase.stop.is_set():
+                # No Content-Length, so the body goes out chunked and can end early when the phase stops
+                request = urllib.request.Request(
+                    self.upload_url, data=body(), method="POST",
+                    headers={"Content-Type": "application/octet-stream"}
+                )
+                with urllib.request.urlopen(request, timeout=SOCKET_TIMEOUT) as response:
+                    response.read()
+        except Exception as e:
+            if not phase.stop.is_set():
+                phase.fail(e)
+
+    def _converged(self, samples):
+        steady = samples[WARMUP_SAMPLES:]
+        if len(steady) < CONVERGE_SAMPLES:
+            return False
+        window = steady[-CONVERGE_SAMPLES:]
+        mean = sum(window) / len(window)
+        return mean > 0 and all(abs(sample - mean) <= mean * self.tolerance for sample in window)
+
+    def _measure(self, name, worker, drain=True):
+        """Run one throughput phase; returns (Mbps, bytes, samples, converged).
+
+        With drain the phase's connections are closed before returning, so
+        they do not compete with the next phase.
+        """
+        self._start_phase(name)
+        first, last = PHASE_PROGRESS[name]
+        phase = _Phase(name, self.streams)
+        threads = [
+            threading.Thread(target=worker, args=(phase,), name=f"vamos-speedtest-{name}", daemon=True)
+            for _ in range(self.streams)
+        ]
+        started = last_time = time.monotonic()
+        last_bytes = 0
+        samples = []
+        converged = False
+        for thread in threads:
+            thread.start()
+        try:
+            while not self._cancel.wait(SAMPLE_INTERVAL):
+                now = time.monotonic()
+                total = phase.bytes
+                mbps = (total - last_bytes) * 8 / (now - last_time) / 1_000_000
+                last_bytes, last_time = total, now
+                samples.append(mbps)
+                elapsed = now - started
+                converged = self._converged(samples)
+                progress = round(first + (last - first) * min(1.0, elapsed / self.max_phase_seconds))
+                self.status.update(progress=progress, mbps=round(mbps, 2), bytes=total)
+                self._emit("sample", phase=name, second=len(samples), mbps=round(mbps, 2), bytes=total, progress=progress)
+                if converged or elapsed >= self.max_phase_seconds or phase.all_failed:
+                    break
+        finally:
+            phase.stop.set()
+        if self.cancelled:
+            raise SpeedTestCancelled()
+        if drain:
+            for thread in threads:
+                thread.join(SOCKET_TIMEOUT)
+        if not phase.bytes:
+            raise phase.errors[0] if phase.errors else RuntimeError(f"No {name} data was transferred")
+
+        steady = samples[WARMUP_SAMPLES:] or samples
+        if converged:
+            steady = steady[-CONVERGE_SAMPLES:]
+        mbps = sum(steady) / len(steady)
+        self._emit("phase_result", phase=name, mbps=round(mbps, 2), bytes=phase.bytes, converged=converged,
+                   seconds=len(samples), progress=last)
+        return mbps, phase.bytes, samples, converged
+
+    def run(self):
+        try:
+            if not (self.download_url and self.upload_url):
+                raise ValueError(NOT_CONFIGURED)
+            self._start_phase("ping")
+            latency = latency_prober.probe(self.host, count=PING_COUNT)
+            if self.cancelled:
+                raise SpeedTestCancelled()
+            ping = latency.avg or 0
+            jitter = latency.jitter if latency.received > 1 else 0
+            self._emit("ping", ping=round(ping, 1), jitter=round(jitter, 1), method=latency.method,
+                       progress=PHASE_PROGRESS["ping"][1])
+
+            download, download_bytes, download_samples, download_converged = self._measure("download", self._download_worker)
+            upload, upload_bytes, upload_samples, upload_converged = self._measure(
+                "upload", self._upload_worker, drain=False  # Nothing follows; do not wait for the target to read its backlog
+            )
+
+            logging.info(f"Speed test results - Download: {download:.1f} Mbps, Upload: {upload:.1f} Mbps, Ping: {ping:.0f} ms")
+            self.result = {
+                "download": round(download, 1),
+                "upload": round(upload, 1),
+                "ping": round(ping, 0),
+                "jitter": round(jitter, 1),
+                "server": {
+                    "name": self.host,
+                    "location": "",
+                    "sponsor": urlparse(self.download_url).netloc,
+                    "latency": round(ping, 1),
+                    "distance": ""
+                },
+                "bytes": {"download": download_bytes, "upload": upload_bytes},
+                "samples": {
+                    "download": [round(sample, 2) for sample in download_samples],
+                    "upload": [round(sample, 2) for sample in upload_samples]
+                },
+                "converged": {"download": download_converged, "upload": upload_converged}
+            }
+            self.status.update(phase="done", label=PHASE_LABELS["done"], progress=100)
+        except SpeedTestCancelled:
+            self.result = {"error": "Speed test cancelled", "cancelled": True, "download": 0, "upload": 0, "ping": 0}
+            self.status.update(phase="cancelled", label=PHASE_LABELS["cancelled"])
+        except Exception as e:
+            logging.error(f"Speed test error: {e}")
+            self.result = {"error": f"Speed test failed: {str(e)}", "download": 0, "upload": 0, "ping": 0}
+            self.status.update(phase="failed", label=self.result["error"])
+        finally:
+            self.finished_at = time.time()
+            self._emit("done", result=self.result, progress=self.status["progress"])
+            self.done.set()
+
+
+def is_configured():
+    """Whether a speed test target has been configured"""
+    return bool(DOWNLOAD_URL and UPLOAD_URL)
+
+
+def start_test(**options):
+    """Start a speed test, or return the one already running; options are those of SpeedTest"""
+    global _current_test
+    with _test_lock:
+        if _current_test is not None and not _current_test.done.is_set():
+            return _current_test
+        test = SpeedTest(**options)
+        thread = threading.Thread(target=test.run, name="vamos-speed-test")
+        thread.daemon = True
+        thread.start()
+        _current_test = test
+        return test
+
+
+def get_current_test():
+    """The running or most recent speed test (None before the first one)"""
+    return _current_test
+
+
+def cancel_test():
+    """Cancel the running speed test; returns False if none is running"""
+    test = _current_test
+    if test is None or test.done.is_set():
+        return False
+    test.cancel()
+    return True
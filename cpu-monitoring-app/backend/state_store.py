@@ -0,0 +1,113 @@
+import threading
+from types import MappingProxyType
+
+
+class StateStore:
+    """Shared state read from request handlers and written by background jobs.
+
+    The current state is an immutable snapshot that is swapped for a new one
+    on every write (copy-on-write). Readers just take the current snapshot,
+    without locking, so they never block and never see half of an update;
+    writers are serialized by a lock. Values should be replaced, not mutated
+    in place, for a reader holding an older snapshot to stay consistent.
+    """
+
+    def __init__(self, initial=None):
+        self._lock = threading.Lock()
+        self._state = MappingProxyType(dict(initial or {}))
+        self.version = 0  # Bumped by every write
+
+    def snapshot(self):
+        """Read-only view of the whole state as of now"""
+        return self._state
+
+    def get(self, key, default=None):
+        return self._state.get(key, default)
+
+    def __getitem__(self, key):
+        return self._state[key]
+
+    def __contains__(self, key):
+        return key in self._state
+
+    def _swap(self, state):
+        # Caller holds the lock
+        self._state = MappingProxyType(state)
+        self.version += 1
+
+    def update(self, **values):
+        """Replace several values in one atomic step"""
+        with self._lock:
+            state = dict(self._state)
+            state.update(values)
+            self._swap(state)
+
+    def set(self, key, value):
+        self.update(**{key: value})
+
+    __setitem__ = set
+
+    def update_if(self, predicate, **values):
+        """Apply values only if predicate(current snapshot) is true; returns whether it was"""
+        with self._lock:
+            if not predicate(self._state):
+                return False
+            state = dict(self._state)
+            state.update(values)
+            self._swap(state)
+            return True
+
+    def increment(self, **amounts):
+        """Add to numeric values atomically"""
+        with self._lock:
+            state = dict(self._state)
+            for key, amount in amounts.items():
+                state[key] = state.get(key, 0) + amount
+            self._swap(state)
+
+
+class _Call:
+    """One in-flight computation and the callers waiting for it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Runs at most one call per key at a time.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and get the same result (or exception) instead of
+    starting their own.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}  # key -> _Call
+
+    def do(self, key, func, *args, **kwargs):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def in_flight(self, key):
+        return key in self._calls
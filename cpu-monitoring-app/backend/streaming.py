@@ -0,0 +1,160 @@
+import time
+import asyncio
+import logging
+import batteryinfo
+from executor import run_collector
+from instrumentation import record_cache
+from hardware_info import get_cpu_usage, get_cpu_temperature, get_gpu_temperature, get_gpu_stats
+from memory_info import get_memory
+from disk_info import get_disks
+from process_info import query_processes
+from gaming_mode import get_gaming_mode_status
+
+# Fastest and default per-topic rates a client can ask for (seconds)
+MIN_RATE = 0.5
+DEFAULT_RATE = 2.0
+# How often a stream wakes up to check which topics are due (seconds)
+TICK = 0.25
+# /api/snapshot reuses hub values younger than this (seconds)
+SNAPSHOT_MAX_AGE = 1.0
+
+# Topic name -> (executor collector name, blocking function)
+TOPICS = {
+    "cpu": ("cpu", get_cpu_usage),
+    "cpu_temperature": ("cpu", get_cpu_temperature),
+    "gpu_temperature": ("gpu", get_gpu_temperature),
+    "gpu_stats": ("gpu", get_gpu_stats),
+    "memory": ("memory", get_memory),
+    "disks": ("disks", get_disks),
+    "battery": ("system", batteryinfo.get_battery_info),
+    "power": ("system", batteryinfo.get_power_consumption),
+    "processes": ("processes", lambda: query_processes(top=20)),
+    "gaming_mode": ("system", get_gaming_mode_status),
+}
+
+
+def _unwrap(value):
+    # Some collectors return (body, status) tuples for errors
+    if isinstance(value, tuple) and value and isinstance(value[0], dict):
+        return value[0]
+    return value
+
+
+class MetricHub:
+    """Shared per-topic cache so every subscriber reuses the same collection.
+
+    A topic is collected at most once per request window no matter how many
+    streams want it; concurrent requests for a topic wait on the same
+    in-flight collection.
+    """
+
+    def __init__(self):
+        self._values = {}     # topic -> {"timestamp": ..., "data" or "error": ...}
+        self._inflight = {}   # topic -> asyncio.Task
+
+    async def get(self, topic, max_age):
+        """Latest value for a topic, collecting it if older than max_age seconds"""
+        entry = self._values.get(topic)
+        if entry is not None and time.time() - entry["timestamp"] < max_age:
+            record_cache("metric_hub", True)
+            return entry
+        task = self._inflight.get(topic)
+        # Joining a collection already in flight is as good as a hit
+        record_cache("metric_hub", task is not None)
+        if task is None:
+            task = asyncio.ensure_future(self._collect(topic))
+            self._inflight[topic] = task
+            task.add_done_callback(lambda _: self._inflight.pop(topic, None))
+        return await asyncio.shield(task)
+
+    async def _collect(self, topic):
+        collector, func = TOPICS[topic]
+        try:
+            data = _unwrap(await run_collector(collector, func))
+            if isinstance(data, dict) and list(data) == ["error"]:
+                entry = {"timestamp": time.time(), "error": data["error"]}
+            else:
+                entry = {"timestamp": time.time(), "data": data}
+        except Exception as e:
+            logging.error(f"Stream topic '{topic}' failed: {e}")
+            entry = {"timestamp": time.time(), "error": str(e)}
+        self._values[topic] = entry
+        return entry
+
+
+# Shared hub used by every WebSocket and SSE client
+metric_hub = MetricHub()
+
+
+def parse_topics(spec):
+    """Parse 'cpu:2,memory:5' (or a {topic: rate} dict) into {topic: rate}.
+
+    Unknown topics raise ValueError; rates are clamped to MIN_RATE.
+    """
+    if isinstance(spec, dict):
+        items = spec.items()
+    else:
+        items = []
+        for part in (spec or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            name, _, rate = part.partition(":")
+            items.append((name.strip(), rate or DEFAULT_RATE))
+    topics = {}
+    for name, rate in items:
+        if name not in TOPICS:
+            raise ValueError(f"Unknown topic '{name}'")
+        try:
+            rate = float(rate) if rate is not None else DEFAULT_RATE
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid rate for topic '{name}'")
+        topics[name] = max(MIN_RATE, rate)
+    return topics
+
+
+class Subscription:
+    """A client's topics and rates, with the time each topic is next due"""
+
+    def __init__(self, topics):
+        self.update(topics)
+
+    def update(self, topics):
+        self.topics = dict(topics)
+        self._next_due = {topic: 0.0 for topic in self.topics}
+
+    def due(self, now):
+        return [topic for topic, at in self._next_due.items() if now >= at]
+
+    def mark_sent(self, topic, now):
+        self._next_due[topic] = now + self.topics[topic]
+
+
+async def next_frame(subscription):
+    """Wait until at least one topic is due and return one coalesced frame"""
+    while True:
+        now = time.time()
+        due = subscription.due(now)
+        if due:
+            break
+        await asyncio.sleep(TICK)
+    entries = await asyncio.gather(
+        *(metric_hub.get(topic, subscription.topics[topic]) for topic in due)
+    )
+    for topic in due:
+        subscription.mark_sent(topic, now)
+    return {"timestamp": now, "metrics": dict(zip(due, entries))}
+
+
+async def collect_snapshot(names):
+    """Collect several metrics concurrently into one document.
+
+    Each metric carries its own timestamp and either data or an error, so
+    one failing collector does not fail the whole snapshot. The total time
+    is that of the slowest collector rather than the sum of all of them.
+    """
+    unknown = [name for name in names if name not in TOPICS]
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(unknown)}")
+    entries = await asyncio.gather(*(metric_hub.get(name, SNAPSHOT_MAX_AGE) for name in names))
+    return {"timestamp": time.time(), "metrics": dict(zip(names, entries))}
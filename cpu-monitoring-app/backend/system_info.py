@@ -1,36 +1,46 @@
+import os
+import json
+import hashlib
 import platform
 import psutil
 import time
-import wmi  # For Windows-specific hardware information
-from fastapi.responses import JSONResponse  # Import JSONResponse
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from hw_provider import get_hardware_provider
+from fastapi.responses import Response
+from fast_json import FastJSONResponse, etag_matches
+from instrumentation import instrumented, record_cache
+from coalescing import coalesced
 
-def get_system_info_data():
-    """Fetch accurate system information."""
-    uptime_seconds = time.time() - psutil.boot_time()
-    uptime_string = time.strftime("%H:%M:%S", time.gmtime(uptime_seconds))
+# How long the hardware inventory is reused before it is collected again (seconds)
+INVENTORY_REFRESH_INTERVAL = float(os.environ.get("VAMOS_INVENTORY_REFRESH", str(6 * 3600)))
+
+# Cached hardware inventory; only refreshed on demand or when it goes stale
+_inventory = None
+_inventory_collected_at = 0.0  # Last time the inventory changed (Last-Modified)
+_inventory_checked_at = 0.0    # Last time it was collected, changed or not (staleness)
+_inventory_etag = None
+_inventory_lock = threading.Lock()
 
+# Requests that find the inventory stale at the same moment share one WMI/sysfs pass
+@coalesced
+@instrumented
+def collect_hardware_inventory():
+    """Collect the hardware details that do not change while the machine is up."""
     # Fetch CPU information
     cpu = platform.processor() or "Unknown CPU"
 
-    # Fetch GPU information using WMI
-    try:
-        w = wmi.WMI(namespace="root\\CIMV2")
-        gpu_info = w.Win32_VideoController()[0]
-        gpu = gpu_info.Name
-    except Exception:
-        gpu = "Unknown GPU"
+    # Fetch GPU and system information from the hardware provider (WMI or sysfs)
+    provider = get_hardware_provider()
+    gpu = provider.gpu_name() or "Unknown GPU"
 
     # Fetch DirectX version (mocked for now)
     directx_version = "12"  # Replace with actual detection logic if needed
 
-    # Fetch system model and manufacturer using WMI
-    try:
-        system_info = w.Win32_ComputerSystem()[0]
-        system_model = system_info.Model
-        system_manufacturer = system_info.Manufacturer
-    except Exception:
-        system_model = "Unknown Model"
-        system_manufacturer = "Unknown Manufacturer"
+    # Fetch system model and manufacturer
+    system_model, system_manufacturer = provider.computer_system()
+    system_model = system_model or "Unknown Model"
+    system_manufacturer = system_manufacturer or "Unknown Manufacturer"
 
     # Fetch computer name
     computer_name = platform.node()
@@ -40,16 +50,81 @@ def get_system_info_data():
         "os_version": platform.version(),
         "hostname": platform.node(),
         "architecture": platform.architecture()[0],
-        "uptime": uptime_string,
         "cpu": cpu,
         "gpu": gpu,
         "directxVersion": directx_version,
         "systemModel": system_model,
         "systemManufacturer": system_manufacturer,
-        "computerName": computer_name
+        "computerName": computer_name,
+        # Constant while the machine is up, unlike uptime, so the body stays cacheable
+        "bootTime": int(psutil.boot_time())
     }
 
-def get_system_info_response():
-    """API response for system information."""
+def refresh_inventory():
+    """Re-collect the hardware inventory and return it."""
+    global _inventory, _inventory_collected_at, _inventory_checked_at, _inventory_etag
+    inventory = collect_hardware_inventory()
+    digest = hashlib.sha1(json.dumps(inventory, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+    with _inventory_lock:
+        now = time.time()
+        # Only move Last-Modified forward when the inventory actually changed
+        if digest != _inventory_etag:
+            _inventory_collected_at = now
+            _inventory_etag = digest
+        _inventory_checked_at = now
+        _inventory = inventory
+    return inventory
+
+def get_hardware_inventory():
+    """Return the cached hardware inventory, collecting it if missing or stale."""
+    with _inventory_lock:
+        inventory = _inventory
+        stale = time.time() - _inventory_checked_at >= INVENTORY_REFRESH_INTERVAL
+    record_cache("hardware_inventory", inventory is not None and not stale)
+    if inventory is None or stale:
+        inventory = refresh_inventory()
+    return inventory
+
+def get_system_info_data():
+    """Fetch accurate system information."""
+    return get_hardware_inventory()
+
+def get_system_uptime():
+    """Uptime as HH:MM:SS, the only part of system info that changes."""
+    uptime_seconds = time.time() - psutil.boot_time()
+    return time.strftime("%H:%M:%S", time.gmtime(uptime_seconds))
+
+def get_uptime_data():
+    """The dynamic part of system info, served apart from the cached inventory."""
+    return {"uptime": get_system_uptime(), "bootTime": int(psutil.boot_time())}
+
+def _not_modified(if_none_match, if_modified_since, etag, last_modified):
+    if if_none_match:
+        return etag_matches(if_none_match, etag)
+    if if_modified_since:
+        try:
+            return parsedate_to_datetime(if_modified_since).timestamp() >= int(last_modified)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+@instrumented
+def get_system_info_response(if_none_match=None, if_modified_since=None):
+    """API response for system information.
+
+    The body is exactly the hardware inventory, so the ETag and
+    Last-Modified headers validate all of it; uptime is served uncached by
+    /system-info/uptime.
+    """
     system_info = get_system_info_data()
-    return JSONResponse(content=system_info)  # Use JSONResponse to return the data
\ No newline at end of file
+    with _inventory_lock:
+        etag = f'"{_inventory_etag}"'
+        last_modified = _inventory_collected_at
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+    if _not_modified(if_none_match, if_modified_since, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content=system_info, headers=headers)  # Use FastJSONResponse to return the data
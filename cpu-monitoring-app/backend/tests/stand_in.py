@@ -0,0 +1,93 @@
+"""Throttled local stand-in for the speed test target.
+
+GET /__down?bytes=N streams N bytes and POST /__up reads a (chunked)
+body; each direction is capped at a fixed rate shared by all connections.
+Used by tests/test_speed_tester.py and benchmarks/bench_speed_test.py.
+"""
+import os
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from speed_tester import CHUNK_SIZE
+
+
+class Throttle:
+    """Caps the combined rate of all connections using it"""
+
+    def __init__(self, mbps):
+        self.rate = mbps * 1_000_000 / 8  # Bytes per second
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+
+    def take(self, count):
+        with self._lock:
+            now = time.monotonic()
+            start = max(self._next, now)
+            self._next = start + count / self.rate
+            delay = self._next - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    download = None  # Throttles, set per server by start_stand_in
+    upload = None
+    payload = os.urandom(CHUNK_SIZE)
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/__down":
+            self.send_error(404)
+            return
+        remaining = int(parse_qs(url.query).get("bytes", ["0"])[0])
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(remaining))
+        self.end_headers()
+        try:
+            while remaining > 0:
+                chunk = self.payload[:min(remaining, CHUNK_SIZE)]
+                self.download.take(len(chunk))
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+        except OSError:
+            pass  # The client stopped reading at the end of the phase
+
+    def do_POST(self):
+        received = 0
+        if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+            while True:
+                size = int(self.rfile.readline().split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    self.rfile.readline()
+                    break
+                self.upload.take(size)
+                received += len(self.rfile.read(size))
+                self.rfile.readline()
+        else:
+            length = int(self.headers.get("Content-Length", "0"))
+            self.upload.take(length)
+            received = len(self.rfile.read(length))
+        body = str(received).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stand_in(download_mbps, upload_mbps):
+    """Serve the stand-in on a free 127.0.0.1 port; returns (server, SpeedTest URL options)"""
+    handler = type("Handler", (StandInHandler,), {
+        "download": Throttle(download_mbps),
+        "upload": Throttle(upload_mbps),
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_address[1]}"
+    return server, {"download_url": f"{base}/__down?bytes={{bytes}}", "upload_url": f"{base}/__up"}
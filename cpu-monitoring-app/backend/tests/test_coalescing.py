@@ -0,0 +1,84 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from coalescing import coalesced
+from instrumentation import registry
+import disk_info
+import hardware_info
+
+CONCURRENCY = 100
+
+
+def burst(func):
+    """CONCURRENCY simultaneous direct calls; each result or raised exception, in call order"""
+    def call(_):
+        try:
+            return func()
+        except Exception as e:
+            return e
+
+    with ThreadPoolExecutor(max_workers=CONCURRENCY) as pool:
+        return list(pool.map(call, range(CONCURRENCY)))
+
+
+def collector_runs(name):
+    collectors, _ = registry.snapshot()
+    return collectors.get(name, {}).get("count", 0)
+
+
+def cache_lookups(name):
+    _, caches = registry.snapshot()
+    return sum(caches.get(name, (0, 0)))
+
+
+def blocking_collector(name, result=None, error=None):
+    """A coalesced collector (no freshness window) that blocks until every caller has joined it"""
+    runs = []
+    release = threading.Event()
+
+    @coalesced(fresh_for=0, name=name)
+    def collector():
+        runs.append(1)
+        assert release.wait(10), "callers never all arrived"
+        if error is not None:
+            raise error
+        return result
+
+    def release_when_all_waiting():
+        # Every caller counts a cache lookup just before it joins the in-flight call
+        deadline = time.monotonic() + 10
+        while cache_lookups(f"coalesced:{name}") < CONCURRENCY and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+
+    threading.Thread(target=release_when_all_waiting, daemon=True).start()
+    return collector, runs
+
+
+def test_concurrent_callers_share_one_call():
+    collector, runs = blocking_collector("test_shared", result={"value": 42})
+    results = burst(collector)
+    assert len(runs) == 1
+    assert results[0] == {"value": 42}
+    assert all(result is results[0] for result in results)
+
+
+def test_errors_are_shared_with_waiting_callers():
+    error = RuntimeError("collector failed")
+    collector, runs = blocking_collector("test_failing", error=error)
+    results = burst(collector)
+    assert len(runs) == 1
+    assert all(result is error for result in results)
+
+
+@pytest.mark.parametrize("func, stats_name", [
+    (disk_info.get_disks, "get_disks"),
+    (hardware_info.get_cpu_temperature, "get_cpu_temperature"),
+    (hardware_info.get_gpu_temperature, "get_gpu_temperature"),
+])
+def test_real_collectors_run_once(func, stats_name):
+    func.coalescer.clear()
+    before = collector_runs(stats_name)
+    burst(func)
+    assert collector_runs(stats_name) - before == 1
@@ -0,0 +1,18 @@
+import asyncio
+from executor import run_collector, COLLECTOR_LIMITS, MAX_WORKERS
+
+
+def burst(count=20):
+    async def main():
+        return await asyncio.gather(*(run_collector("disks", lambda: "ok", timeout=10) for _ in range(count)))
+    return asyncio.run(main())
+
+
+def test_collectors_work_across_event_loops():
+    # More callers than the collector's limit, so later ones wait on its semaphore in each loop
+    assert burst() == ["ok"] * 20
+    assert burst() == ["ok"] * 20
+
+
+def test_pool_fits_every_collector_limit():
+    assert MAX_WORKERS >= sum(limit for limit, _ in COLLECTOR_LIMITS.values())
@@ -0,0 +1,74 @@
+import pytest
+import gpu_provider
+import hardware_info
+from gpu_provider import GpuProvider, FakeGpuProvider, set_gpu_provider
+
+DEVICE = {
+    "index": 0, "name": "Test GPU", "utilization": 37, "memory_utilization": 12, "temperature": 64,
+    "gpu_clock": 1800, "memory_clock": 7000, "power_watts": 120.5, "memory_total": 8 << 30, "memory_used": 2 << 30,
+}
+GPU_COLLECTORS = (hardware_info.get_gpu_usage, hardware_info.get_gpu_temperature, hardware_info.get_gpu_stats)
+
+
+class CountingProvider(GpuProvider):
+    name = "counting"
+
+    def __init__(self, devices=None, error=None, ttl=60):
+        super().__init__(ttl)
+        self.reads = 0
+        self._devices_to_read = devices or []
+        self._error = error
+
+    def read_devices(self):
+        self.reads += 1
+        if self._error is not None:
+            raise self._error
+        return [dict(device) for device in self._devices_to_read]
+
+
+@pytest.fixture
+def use_provider():
+    """Installs a provider for the GPU collectors, and forgets their coalesced results around it"""
+    def install(provider):
+        set_gpu_provider(provider)
+        for collector in GPU_COLLECTORS:
+            collector.coalescer.clear()
+        return provider
+
+    yield install
+    set_gpu_provider(None)
+    for collector in GPU_COLLECTORS:
+        collector.coalescer.clear()
+
+
+def test_base_provider_is_abstract():
+    with pytest.raises(TypeError):
+        GpuProvider()
+
+
+def test_gpu_collectors_read_the_provider(use_provider):
+    use_provider(FakeGpuProvider([DEVICE]))
+    assert hardware_info.get_gpu_usage() == 37.0
+    assert hardware_info.get_gpu_temperature() == {"gpu_temperature": 64}
+    stats = hardware_info.get_gpu_stats()
+    assert stats["gpu_clock_speed"] == 1800 and stats["vram_clock_speed"] == 7000
+    assert stats["devices"] == [DEVICE]
+
+
+def test_gpu_stats_without_devices(use_provider):
+    use_provider(FakeGpuProvider())
+    stats = hardware_info.get_gpu_stats()
+    assert stats["devices"] == [] and "error" in stats
+
+
+def test_devices_are_read_once_per_ttl(use_provider):
+    provider = use_provider(CountingProvider([DEVICE]))
+    for _ in range(5):
+        assert gpu_provider.get_gpu_devices() == [DEVICE]
+    assert provider.reads == 1
+
+
+def test_failed_read_reports_no_devices(use_provider):
+    provider = use_provider(CountingProvider(error=RuntimeError("driver gone")))
+    assert gpu_provider.get_gpu_devices() == []
+    assert provider.reads == 1
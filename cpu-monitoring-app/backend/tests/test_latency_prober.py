@@ -0,0 +1,65 @@
+import errno
+import socket
+import pytest
+import latency_prober
+
+
+@pytest.fixture
+def listener():
+    """A local listening TCP socket; yields its port"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.listen(16)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_icmp_loopback():
+    result = latency_prober.probe("127.0.0.1", count=3, interval=0, method="icmp")
+    if result.method.startswith("tcp"):
+        pytest.skip("ICMP sockets are not available to this user")
+    assert result.method in ("icmp-dgram", "icmp-raw")
+    assert result.received == 3
+    assert result.loss_percent == 0
+
+
+def test_tcp_listening_port(listener):
+    result = latency_prober.probe("127.0.0.1", count=3, interval=0, method="tcp", ports=(listener,))
+    assert result.method == f"tcp:{listener}"
+    assert result.received == 3
+    assert all(rtt is not None and rtt >= 0 for rtt in result.rtts)
+
+
+def test_tcp_refused_counts_as_reply(closed_port):
+    result = latency_prober.probe("127.0.0.1", count=2, interval=0, method="tcp", ports=(closed_port,))
+    assert result.received == 2
+
+
+def test_tcp_tries_every_fallback_port(monkeypatch, listener, closed_port):
+    # The first port behaves as if filtered; the probe must still answer on the next one
+    connect_ex = socket.socket.connect_ex
+
+    def filtered_first(sock, address):
+        if address[1] == closed_port:
+            return errno.EHOSTUNREACH  # No answer on this port
+        return connect_ex(sock, address)
+
+    monkeypatch.setattr(socket.socket, "connect_ex", filtered_first)
+    result = latency_prober.probe("127.0.0.1", count=2, interval=0, method="tcp", ports=(closed_port, listener))
+    assert result.received == 2
+    assert result.method == f"tcp:{listener}"
+
+
+def test_tcp_windows_refused_counts_as_reply(monkeypatch, closed_port):
+    monkeypatch.setattr(socket.socket, "connect_ex", lambda sock, address: 10061)  # WSAECONNREFUSED
+    result = latency_prober.probe("127.0.0.1", count=2, interval=0, method="tcp", ports=(closed_port,))
+    assert result.received == 2
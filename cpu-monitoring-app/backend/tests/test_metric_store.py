@@ -0,0 +1,64 @@
+import os
+import metric_store
+from metric_store import MetricStore, MetricLog, Segment, HEADER, COMPACT_AFTER, COMPACT_RESOLUTION
+
+DAY = 20_000 * 86400  # Start of a day, far enough in the past to compact
+
+
+def write_raw_segment(directory, samples):
+    segment = Segment.create(os.path.join(directory, metric_store._segment_name(samples[0][0])))
+    for timestamp, value in samples:
+        segment.append(timestamp, value)
+    segment.seal()
+    segment.close()
+
+
+def test_compaction_weights_existing_averages(tmp_path):
+    directory = str(tmp_path / "cpu.percent")
+    os.makedirs(directory)
+    now = DAY + COMPACT_AFTER + 3600
+    write_raw_segment(directory, [(DAY, 10.0), (DAY + 1, 20.0), (DAY + 2, 30.0)])
+    log = MetricLog(directory)
+    log.compact(now)
+    assert log.read() == [(DAY, 20.0)]
+    log.close()
+
+    # A late raw sample for the same minute is merged with the 3-sample average, not averaged with it 1:1
+    write_raw_segment(directory, [(DAY + 30, 60.0)])
+    log = MetricLog(directory)
+    log.compact(now)
+    assert log.read() == [(DAY, 30.0)]
+    assert log.read(samples=True) == [(DAY, 30.0, 4)]
+    log.close()
+
+    store = MetricStore(str(tmp_path))
+    (_, stats), = store.buckets("cpu.percent", width=COMPACT_RESOLUTION)
+    assert stats["count"] == 4 and stats["sum"] == 120.0 and stats["avg"] == 30.0
+    store.close()
+
+
+def test_bad_magic_segment_is_moved_aside(tmp_path):
+    directory = tmp_path / "cpu.percent"
+    directory.mkdir()
+    bad = directory / metric_store._segment_name(DAY)
+    bad.write_bytes(HEADER.pack(b"XXXX", 1, 0, 1, DAY, DAY) + b"\0" * 16)
+
+    log = MetricLog(str(directory))
+    assert log.read() == []
+    assert not bad.exists()
+    assert (directory / (bad.name + ".corrupt")).exists()
+    log.close()
+
+
+def test_reads_compacted_segments_without_sample_counts(tmp_path):
+    # Format version 1 compacted segment: plain (timestamp, value) records
+    directory = tmp_path / "cpu.percent"
+    directory.mkdir()
+    path = directory / metric_store._segment_name(DAY, COMPACT_RESOLUTION)
+    records = b"".join(metric_store.RECORD.pack(DAY + i * 60, float(i)) for i in range(3))
+    path.write_bytes(HEADER.pack(metric_store.MAGIC, 1, COMPACT_RESOLUTION, 3, DAY, DAY + 120) + records)
+
+    log = MetricLog(str(directory))
+    assert log.read() == [(DAY, 0.0), (DAY + 60, 1.0), (DAY + 120, 2.0)]
+    assert log.read(samples=True) == [(DAY, 0.0, 1), (DAY + 60, 1.0, 1), (DAY + 120, 2.0, 1)]
+    log.close()
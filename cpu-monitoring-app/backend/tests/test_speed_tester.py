@@ -0,0 +1,52 @@
+import time
+import threading
+import pytest
+import speed_tester
+from speed_tester import SpeedTest
+from stand_in import start_stand_in
+
+DOWNLOAD_MBPS = 80.0
+UPLOAD_MBPS = 20.0
+# Allowed distance of a result from the stand-in's rate
+ACCURACY = 0.15
+
+
+@pytest.fixture
+def target():
+    server, options = start_stand_in(DOWNLOAD_MBPS, UPLOAD_MBPS)
+    yield options
+    server.shutdown()
+    server.server_close()
+
+
+def test_throughput_matches_target(target):
+    test = SpeedTest(max_phase_seconds=8, **target)
+    test.run()
+    result = test.result
+    assert "error" not in result, result
+    assert result["download"] == pytest.approx(DOWNLOAD_MBPS, rel=ACCURACY)
+    assert result["upload"] == pytest.approx(UPLOAD_MBPS, rel=ACCURACY)
+    assert test.events[-1]["event"] == "done"
+    assert test.status["phase"] == "done"
+
+
+def test_cancel_mid_phase_stops_quickly(target):
+    test = SpeedTest(**target)
+    threading.Thread(target=test.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not any(event["event"] == "sample" for event in list(test.events)):
+        assert time.monotonic() < deadline, "no download sample within 10s"
+        time.sleep(0.05)
+    cancelled_at = time.monotonic()
+    test.cancel()
+    assert test.done.wait(2)
+    assert time.monotonic() - cancelled_at < 1.5
+    assert test.result["cancelled"] is True
+    assert test.status["phase"] == "cancelled"
+
+
+def test_unconfigured_target_fails_without_network():
+    test = SpeedTest(download_url="", upload_url="")
+    test.run()
+    assert speed_tester.NOT_CONFIGURED in test.result["error"]
+    assert test.status["phase"] == "failed"
@@ -0,0 +1,272 @@
+import time
+import threading
+from array import array
+
+# Retention for sampled histories, in samples (e.g. 7 days at one sample per 30s)
+DEFAULT_CAPACITY = 7 * 24 * 120
+
+
+class TimeSeries:
+    """Fixed-capacity columnar ring buffer for numeric samples.
+
+    Timestamps are epoch seconds stored as 64-bit ints and every column is
+    a fixed-width array, so each sample costs a few bytes per column
+    instead of a dict of strings. Formatting for the API happens when rows
+    are read, not when they are stored.
+
+    Timestamps never decrease, so time ranges are found by binary search.
+    Columns named in totals keep a running total next to their values so
+    sums over any index range take constant time; leave out columns that
+    are already cumulative (their totals would grow quadratically).
+    """
+
+    def __init__(self, columns, capacity=DEFAULT_CAPACITY, totals=()):
+        """columns maps column name -> array typecode ('q' for ints, 'd' for floats)"""
+        self.columns = dict(columns)
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._timestamps = array("q", bytes(8 * capacity))
+        self._data = {
+            name: array(code, bytes(array(code).itemsize * capacity))
+            for name, code in self.columns.items()
+        }
+        # Running total of each summed column up to and including the sample in the slot
+        self._totals = {
+            name: array(self.columns[name], bytes(array(self.columns[name]).itemsize * capacity))
+            for name in totals
+        }
+        self._start = 0  # Physical index of the oldest sample
+        self._size = 0
+        self.version = 0  # Bumped by every append and clear
+
+    def __len__(self):
+        return self._size
+
+    def _physical(self, index):
+        return (self._start + index) % self.capacity
+
+    def append(self, timestamp=None, **values):
+        """Add a sample, overwriting the oldest once the buffer is full.
+
+        A timestamp older than the newest sample (e.g. after a clock step)
+        is stored as the newest timestamp so the index stays sorted.
+        """
+        timestamp = int(time.time() if timestamp is None else timestamp)
+        with self._lock:
+            previous = self._physical(self._size - 1) if self._size else None
+            if previous is not None:
+                timestamp = max(timestamp, self._timestamps[previous])
+            full = self._size == self.capacity
+            slot = self._start if full else self._physical(self._size)
+            try:
+                self._timestamps[slot] = timestamp
+                for name, column in self._data.items():
+                    column[slot] = values.get(name, 0)
+                for name, column in self._totals.items():
+                    column[slot] = (column[previous] if previous is not None else 0) + self._data[name][slot]
+            except (OverflowError, TypeError):
+                # A value that does not fit its typecode: the slot is not published, and
+                # when it held the oldest sample, that sample is dropped (partly overwritten)
+                if full:
+                    self._start = (self._start + 1) % self.capacity
+                    self._size -= 1
+                self.version += 1
+                raise
+            if full:
+                self._start = (self._start + 1) % self.capacity
+            else:
+                self._size += 1
+            self.version += 1
+
+    def clear(self):
+        with self._lock:
+            self._start = 0
+            self._size = 0
+            self.version += 1
+
+    def _bisect(self, timestamp, right):
+        # First logical index whose timestamp is >= (or > when right) timestamp
+        low, high = 0, self._size
+        while low < high:
+            middle = (low + high) // 2
+            value = self._timestamps[self._physical(middle)]
+            if value < timestamp or (right and value == timestamp):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def index_range(self, since=None, until=None):
+        """Logical [start, stop) of the samples with since <= timestamp <= until"""
+        with self._lock:
+            start = 0 if since is None else self._bisect(since, right=False)
+            stop = self._size if until is None else self._bisect(until, right=True)
+            return start, max(start, stop)
+
+    def _sum(self, name, start, stop):
+        # Sum of one column (named in totals) over logical indexes [start, stop), in constant
+        # time; caller holds the lock
+        stop = self._size if stop is None else min(stop, self._size)
+        if start >= stop:
+            return 0
+        totals = self._totals[name]
+        first = self._physical(start)
+        return totals[self._physical(stop - 1)] - totals[first] + self._data[name][first]
+
+    def sum_range(self, names, since=None, until=None):
+        """Sums of several columns over the samples between two timestamps, from one consistent view"""
+        with self._lock:
+            start = 0 if since is None else self._bisect(since, right=False)
+            stop = self._size if until is None else self._bisect(until, right=True)
+            return tuple(self._sum(name, start, stop) for name in names)
+
+    def last(self):
+        """Newest sample as (timestamp, {column: value}), or None"""
+        with self._lock:
+            if not self._size:
+                return None
+            slot = self._physical(self._size - 1)
+            return self._timestamps[slot], {name: column[slot] for name, column in self._data.items()}
+
+    def _range(self, array_, start, stop):
+        # Logical [start, stop) as a list, handling the wrap-around
+        first = self._physical(start)
+        count = stop - start
+        if first + count <= self.capacity:
+            return array_[first:first + count].tolist()
+        split = self.capacity - first
+        return array_[first:].tolist() + array_[:count - split].tolist()
+
+    def column(self, name, start=0, stop=None):
+        """Values of one column for logical indexes [start, stop)"""
+        with self._lock:
+            stop = self._size if stop is None else min(stop, self._size)
+            if start >= stop:
+                return []
+            return self._range(self._data[name], start, stop)
+
+    def rows(self, start=0, stop=None):
+        """Samples for logical indexes [start, stop) as (timestamp, {column: value})"""
+        with self._lock:
+            stop = self._size if stop is None else min(stop, self._size)
+            if start >= stop:
+                return []
+            timestamps = self._range(self._timestamps, start, stop)
+            columns = {name: self._range(data, start, stop) for name, data in self._data.items()}
+        return [
+            (timestamp, {name: values[i] for name, values in columns.items()})
+            for i, timestamp in enumerate(timestamps)
+        ]
+
+    def nbytes(self):
+        """Memory held by the sample arrays"""
+        return self._timestamps.itemsize * self.capacity + sum(
+            column.itemsize * self.capacity for column in list(self._data.values()) + list(self._totals.values())
+        )
+
+
+# Bucket widths (seconds) of the rollup tiers kept next to the raw samples
+ROLLUP_TIERS = (60, 3600)
+
+
+class RollupSeries(TimeSeries):
+    """TimeSeries that also keeps min/max/sum/count rollups per time bucket.
+
+    Each tier is itself a TimeSeries of closed buckets; the bucket still
+    being filled is kept aside and updated on every append, so rollups cost
+    a few comparisons per sample and nothing at query time. Retention is
+    in seconds and applies to every tier.
+    """
+
+    def __init__(self, columns, retention, interval=1, tiers=ROLLUP_TIERS, totals=()):
+        super().__init__(columns, max(1, retention // interval), totals)
+        self.interval = interval
+        self.tiers = {}
+        for width in sorted(tiers):
+            tier_columns = {"count": "q"}
+            for name, code in self.columns.items():
+                tier_columns.update({f"{name}_min": code, f"{name}_max": code, f"{name}_sum": code})
+            self.tiers[width] = TimeSeries(tier_columns, max(1, retention // width))
+        self._open = {}  # width -> (bucket start, aggregate values)
+        self._rollup_lock = threading.Lock()
+
+    def append(self, timestamp=None, **values):
+        with self._rollup_lock:
+            super().append(timestamp, **values)
+            timestamp = self.last()[0]  # As stored, after clamping
+            for width, tier in self.tiers.items():
+                bucket = timestamp - timestamp % width
+                current = self._open.get(width)
+                if current is not None and current[0] != bucket:
+                    tier.append(current[0], **current[1])
+                    current = None
+                if current is None:
+                    current = (bucket, {"count": 0})
+                    self._open[width] = current
+                aggregate = current[1]
+                first = aggregate["count"] == 0
+                aggregate["count"] += 1
+                for name in self.columns:
+                    value = values.get(name, 0)
+                    aggregate[f"{name}_min"] = value if first else min(aggregate[f"{name}_min"], value)
+                    aggregate[f"{name}_max"] = value if first else max(aggregate[f"{name}_max"], value)
+                    aggregate[f"{name}_sum"] = aggregate.get(f"{name}_sum", 0) + value
+
+    def clear(self):
+        with self._rollup_lock:
+            super().clear()
+            for tier in self.tiers.values():
+                tier.clear()
+            self._open.clear()
+
+    def _tier_rows(self, width, since, until, rows=True):
+        # Closed buckets overlapping the range plus the open one, if it does
+        tier = self.tiers[width]
+        start, stop = tier.index_range(None if since is None else since - since % width, until)
+        current = self._open.get(width)
+        include_open = current is not None and (since is None or current[0] + width > since) and (
+            until is None or current[0] <= until)
+        if not rows:
+            return stop - start + (1 if include_open else 0)
+        result = tier.rows(start, stop)
+        if include_open:
+            result.append((current[0], dict(current[1])))
+        return result
+
+    def downsample(self, since=None, until=None, max_points=None):
+        """Samples between two timestamps at the finest resolution that fits.
+
+        Returns (resolution, rows). With resolution None the rows are raw
+        (timestamp, {column: value}); otherwise resolution is the bucket
+        width in seconds and each row is (bucket start, {column: {"min",
+        "max", "avg", "sum"}, "count": samples}). When no tier is small
+        enough the coarsest one is used.
+        """
+        with self._rollup_lock:
+            start, stop = self.index_range(since, until)
+            if max_points is None or stop - start <= max_points or not self.tiers:
+                return None, self.rows(start, stop)
+            widths = list(self.tiers)
+            chosen = widths[-1]
+            for width in widths:
+                if self._tier_rows(width, since, until, rows=False) <= max_points:
+                    chosen = width
+                    break
+            buckets = self._tier_rows(chosen, since, until)
+        rows = []
+        for timestamp, aggregate in buckets:
+            count = aggregate["count"]
+            entry = {"count": count}
+            for name in self.columns:
+                total = aggregate[f"{name}_sum"]
+                entry[name] = {
+                    "min": aggregate[f"{name}_min"],
+                    "max": aggregate[f"{name}_max"],
+                    "avg": total / count if count else 0,
+                    "sum": total,
+                }
+            rows.append((timestamp, entry))
+        return chosen, rows
+
+    def nbytes(self):
+        return super().nbytes() + sum(tier.nbytes() for tier in self.tiers.values())
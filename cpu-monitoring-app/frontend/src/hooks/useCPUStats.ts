@@ -1,4 +1,5 @@
-import { useState, useEffect } from "react";
+import { useMemo } from "react";
+import useMetricStream from "./useMetricStream";
 
 interface CPUStats {
   cpu_usage: number;
@@ -9,36 +10,27 @@ interface CPUStats {
   error?: string;
 }
 
-const useCPUStats = () => {
-  const [cpuStats, setCPUStats] = useState<CPUStats | null>(null);
-  const [loading, setLoading] = useState<boolean>(true);
+const FAILED_STATS: CPUStats = {
+  cpu_usage: 0,
+  base_speed_ghz: 0,
+  sockets: 0,
+  cores: 0,
+  logical_processors: 0,
+  error: "Failed to fetch CPU stats",
+};
 
-  useEffect(() => {
-    const fetchCPUStats = async () => {
-      try {
-        const response = await fetch("http://localhost:5000/cpu-usage");
-        const data: CPUStats = await response.json();
-        setCPUStats(data);
-      } catch (error) {
-        setCPUStats({
-          cpu_usage: 0,
-          base_speed_ghz: 0,
-          sockets: 0,
-          cores: 0,
-          logical_processors: 0,
-          error: "Failed to fetch CPU stats",
-        });
-      } finally {
-        setLoading(false);
-      }
-    };
+const useCPUStats = () => {
+  // Streamed every 2 seconds instead of polling /cpu-usage
+  const { metrics } = useMetricStream({ cpu: 2 });
+  const entry = metrics.cpu;
 
-    fetchCPUStats();
-    const interval = setInterval(fetchCPUStats, 2000); // Refresh every 2 seconds
-    return () => clearInterval(interval); // Cleanup on unmount
-  }, []);
+  const cpuStats = useMemo<CPUStats | null>(() => {
+    if (!entry) return null;
+    if (entry.error || !entry.data) return FAILED_STATS;
+    return entry.data as CPUStats;
+  }, [entry]);
 
-  return { cpuStats, loading };
+  return { cpuStats, loading: !entry };
 };
 
-export default useCPUStats;
\ No newline at end of file
+export default useCPUStats;
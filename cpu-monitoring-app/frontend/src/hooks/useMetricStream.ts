@@ -0,0 +1,40 @@
+import { useState, useEffect } from "react";
+
+export interface MetricEntry<T = any> {
+  timestamp: number;
+  data?: T;
+  error?: string;
+}
+
+// Map of topic name to refresh rate in seconds, e.g. { cpu: 2, memory: 5 }
+export type TopicRates = Record<string, number>;
+
+/**
+ * Subscribe to metric topics over the backend's Server-Sent Events stream.
+ * One connection carries every topic; the server only collects each topic
+ * once per tick no matter how many widgets are listening.
+ */
+const useMetricStream = (topics: TopicRates) => {
+  const [metrics, setMetrics] = useState<Record<string, MetricEntry>>({});
+  const [connected, setConnected] = useState(false);
+  const spec = Object.entries(topics)
+    .map(([topic, rate]) => `${topic}:${rate}`)
+    .join(",");
+
+  useEffect(() => {
+    const source = new EventSource(`http://localhost:5000/api/stream?topics=${encodeURIComponent(spec)}`);
+
+    source.onopen = () => setConnected(true);
+    source.onerror = () => setConnected(false); // EventSource reconnects on its own
+    source.onmessage = (event) => {
+      const frame = JSON.parse(event.data);
+      setMetrics((previous) => ({ ...previous, ...frame.metrics }));
+    };
+
+    return () => source.close();
+  }, [spec]);
+
+  return { metrics, connected };
+};
+
+export default useMetricStream;
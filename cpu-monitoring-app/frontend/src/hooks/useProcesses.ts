@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 
 interface Process {
   pid: number;
@@ -11,6 +11,9 @@ const useProcesses = (showModal: boolean) => {
   const [processes, setProcesses] = useState<Process[]>([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState<string | null>(null);
+  // Process table keyed by pid and the server version it reflects
+  const tableRef = useRef<Map<number, Process>>(new Map());
+  const versionRef = useRef<number | null>(null);
 
   useEffect(() => {
     let interval: NodeJS.Timeout;
@@ -18,12 +21,23 @@ const useProcesses = (showModal: boolean) => {
     const fetchProcesses = async () => {
       try {
         setError(null);
-        const response = await fetch("http://localhost:5000/processes");
+        const query = versionRef.current !== null ? `?since=${versionRef.current}` : "";
+        const response = await fetch(`http://localhost:5000/processes${query}`);
         if (!response.ok) {
           throw new Error(`Failed to fetch processes: ${response.statusText}`);
         }
         const data = await response.json();
-        setProcesses(data.processes || []); // Extract the processes array
+        const table = tableRef.current;
+        if (data.full) {
+          table.clear();
+          (data.processes || []).forEach((proc: Process) => table.set(proc.pid, proc));
+        } else {
+          // Apply removals first, a reused pid can be both removed and added
+          (data.removed || []).forEach((pid: number) => table.delete(pid));
+          [...(data.added || []), ...(data.changed || [])].forEach((proc: Process) => table.set(proc.pid, proc));
+        }
+        versionRef.current = data.version;
+        setProcesses(Array.from(table.values()));
       } catch (error) {
         console.error("Error fetching processes:", error);
         setError("Failed to load processes. Please try again.");
@@ -33,6 +47,8 @@ const useProcesses = (showModal: boolean) => {
     };
 
     if (showModal) {
+      // Start from a full table each time the modal opens
+      versionRef.current = null;
       fetchProcesses(); // Fetch immediately when the modal is shown
       interval = setInterval(fetchProcesses, 1000); // Fetch every second
     }
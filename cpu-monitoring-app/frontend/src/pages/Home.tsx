@@ -36,23 +36,15 @@ const TemperatureBar = ({ isGamingMode }: TemperatureBarProps) => {
 
     const fetchTemperatures = async () => {
       try {
-        // Fetch CPU temperature
-        const cpuResponse = await fetch("http://localhost:5000/cpu-temperature", {
-          headers: { Accept: "application/json" },
-        })
-        const cpuData = await cpuResponse.json()
-
-        // Fetch GPU temperature
-        const gpuResponse = await fetch("http://localhost:5000/gpu-temperature", {
-          headers: { Accept: "application/json" },
-        })
-        const gpuData = await gpuResponse.json()
-
-        // Fetch GPU stats (clock speeds)
-        const gpuStatsResponse = await fetch("http://localhost:5000/gpu-stats", {
-          headers: { Accept: "application/json" },
-        })
-        const gpuStatsData = await gpuStatsResponse.json()
+        // Fetch CPU temperature, GPU temperature and GPU clocks in one parallel pass
+        const response = await fetch(
+          "http://localhost:5000/api/snapshot?metrics=cpu_temperature,gpu_temperature,gpu_stats",
+          { headers: { Accept: "application/json" } },
+        )
+        const snapshot = await response.json()
+        const cpuData = snapshot.metrics?.cpu_temperature?.data ?? {}
+        const gpuData = snapshot.metrics?.gpu_temperature?.data ?? {}
+        const gpuStatsData = snapshot.metrics?.gpu_stats?.data ?? {}
 
         if (cpuData.cpu_temperature !== undefined) {
           setCpuTemp(Math.round(cpuData.cpu_temperature))
@@ -36,6 +36,8 @@ const animationStyles = `
 `
 
 const API_URL = "http://localhost:5000/api"
+// Charts never need more points than this; the backend rolls longer ranges up
+const MAX_CHART_POINTS = 300
 
 interface NetworkData {
   connectionType: string
@@ -397,7 +399,7 @@ export const Network = ({ networkState, setNetworkState, onRunSpeedTest }: Netwo
   // Fetch bandwidth history
   const fetchBandwidthHistory = async () => {
     try {
-      const response = await fetch(`${API_URL}/bandwidth-history?timeframe=${timeRange}`)
+      const response = await fetch(`${API_URL}/bandwidth-history?timeframe=${timeRange}&max_points=${MAX_CHART_POINTS}`)
       const data = await response.json()
       setBandwidthHistory(data)
     } catch (err) {
@@ -408,7 +410,7 @@ export const Network = ({ networkState, setNetworkState, onRunSpeedTest }: Netwo
   // Fetch data transfer history
   const fetchDataTransferHistory = async () => {
     try {
-      const response = await fetch(`${API_URL}/data-transfer-history?timeframe=${timeRange}`)
+      const response = await fetch(`${API_URL}/data-transfer-history?timeframe=${timeRange}&max_points=${MAX_CHART_POINTS}`)
       const data = await response.json()
       setDataTransferHistory(data)
     } catch (err) {